@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+"""Benchmark converting a large nested ``FoamDict`` to text against the
+previous implementation, which built the text with repeated concatenation
+and re-split nested sub-dictionaries at every level. Usage:
+
+    python benchmarks/bench_foamdict_str.py [nentries] [depth]
+"""
+
+from __future__ import division, print_function
+import sys
+import timeit
+import foampy
+from foampy.types import FoamDict, FoamSubDict
+
+
+def old_subdict_str(d):
+    txt = d.name + "\n{\n"
+    for key, val in d.items():
+        strval = str(val)
+        if isinstance(val, bool):
+            strval = strval.lower()
+        if not isinstance(val, FoamSubDict):
+            if len(key) < 12:
+                txt += "    {:12s}{};\n".format(key, strval)
+            else:
+                txt += "    {} {};\n".format(key, strval)
+        else:
+            val.name = key
+            txt += "\n"
+            for line in old_subdict_str(val).split("\n"):
+                txt += "    " + line + "\n"
+    txt += "}"
+    return txt
+
+
+def old_dict_str(d):
+    txt = d.header + "\n" + old_subdict_str(d.foamfile) + "\n"
+    txt += foampy.dictionaries.upper_rule + "\n\n"
+    for key, val in d.items():
+        strval = str(val)
+        if isinstance(val, bool):
+            strval = strval.lower()
+        if isinstance(val, FoamSubDict):
+            val.name = key
+            txt += old_subdict_str(val) + "\n\n"
+        elif len(key) < 16:
+            txt += "{:16s}{};\n\n".format(key, strval)
+        else:
+            txt += "{} {};\n\n".format(key, strval)
+    txt += foampy.dictionaries.lower_rule + "\n"
+    return txt
+
+
+def make_dict(nentries, depth):
+    """Create a dictionary with ``nentries`` entries at each of ``depth``
+    nested levels, plus as many top-level entries.
+    """
+    d = FoamDict(name="benchDict", casedir="/nonexistent")
+    for n in range(nentries):
+        d["entry{}".format(n)] = n*0.5
+    parent = d
+    for level in range(depth):
+        sub = FoamSubDict()
+        for n in range(nentries):
+            sub["key{}".format(n)] = "value{}".format(n)
+        parent["level{}".format(level)] = sub
+        parent = sub
+    return d
+
+
+def main(nentries=200, depth=8):
+    d = make_dict(nentries, depth)
+    assert str(d) == old_dict_str(d)
+    number = 20
+    t_old = min(timeit.repeat(lambda: old_dict_str(d), number=number,
+                              repeat=3))/number
+    t_new = min(timeit.repeat(lambda: str(d), number=number,
+                              repeat=3))/number
+    print("{} entries per level, {} levels, {} characters".format(
+          nentries, depth, len(str(d))))
+    print("Old: {:.2f} ms".format(t_old*1e3))
+    print("New: {:.2f} ms ({:.1f}x)".format(t_new*1e3, t_old/t_new))
+
+
+if __name__ == "__main__":
+    main(*[int(a) for a in sys.argv[1:]])
@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+"""Benchmark building and writing large lists with ``FoamList`` and
+``FoamArray`` against the previous ``FoamList``, which converted items and
+built its text in Python loops. Usage:
+
+    python benchmarks/bench_foamlist.py [npoints]
+"""
+
+from __future__ import division, print_function
+import sys
+import timeit
+import numpy as np
+from foampy.types import FoamList, FoamArray
+
+
+class OldFoamList(list):
+    def __init__(self, list_in=None, dtype=float):
+        if isinstance(list_in, list) or isinstance(list_in, np.ndarray):
+            py_list = [dtype(i) for i in list_in]
+        elif isinstance(list_in, str):
+            list_in = list_in.replace("(", "").replace(")", "").split()
+            py_list = [dtype(i) for i in list_in]
+        else:
+            py_list = []
+        list.__init__(self, py_list)
+
+    def __str__(self):
+        txt = "("
+        for i in self:
+            txt += str(i) + " "
+        txt = txt.rstrip(" ")
+        txt += ")"
+        return txt
+
+
+def best(f, number=3):
+    return min(timeit.repeat(f, number=number, repeat=3))/number
+
+
+def report(label, t_old, t_new):
+    print("{}: old {:.1f} ms, new {:.1f} ms ({:.1f}x)".format(
+          label, t_old*1e3, t_new*1e3, t_old/t_new))
+
+
+def main(npoints=100000):
+    values = np.random.rand(npoints)
+    points = np.random.rand(npoints, 3)
+    txt = str(FoamArray(values))
+    assert str(FoamList(values)) == str(OldFoamList(values)) == txt
+    vector_txt = str(FoamArray(points))
+    assert str(OldFoamList([OldFoamList(p) for p in points],
+                           dtype=OldFoamList)) == vector_txt
+    print("{} scalars, {} vectors".format(npoints, npoints))
+    report("Build scalar list", best(lambda: OldFoamList(values)),
+           best(lambda: FoamArray(values)))
+    old, new = OldFoamList(values), FoamArray(values)
+    report("Write scalar list", best(lambda: str(old)),
+           best(lambda: str(new)))
+    report("Parse scalar list", best(lambda: OldFoamList(txt)),
+           best(lambda: FoamArray(txt)))
+    def old_vectors():
+        return str(OldFoamList([OldFoamList(p) for p in points],
+                               dtype=OldFoamList))
+    report("Build and write vector list", best(old_vectors),
+           best(lambda: str(FoamArray(points))))
+    report("Build and write vector list with %.6g", best(old_vectors),
+           best(lambda: FoamArray(points).format("%.6g")))
+    report("FoamList build and write", best(lambda: str(OldFoamList(values))),
+           best(lambda: str(FoamList(values))))
+
+
+if __name__ == "__main__":
+    main(*[int(a) for a in sys.argv[1:]])
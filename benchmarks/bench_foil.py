@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+"""Benchmark reading and writing foil data against the previous
+implementation, which parsed and formatted one line at a time, and batched
+interpolation with ``FoilDatabase``. Usage:
+
+    python benchmarks/bench_foil.py [nrows] [nqueries]
+"""
+
+from __future__ import division, print_function
+import os
+import sys
+import timeit
+import tempfile
+import numpy as np
+from foampy.foil import FoilData, FoilDatabase
+
+
+def old_read(fpath):
+    alpha, cl, cd, cm = [], [], [], []
+    in_block = False
+    with open(fpath, "r") as f:
+        for line in f.readlines():
+            try:
+                line = line.replace("(", "")
+                line = line.replace(")", "")
+                a = [float(n) for n in line.replace(",", " ").split()]
+                alpha.append(a[0])
+                cl.append(a[1])
+                cd.append(a[2])
+                cm.append(a[3] if len(a) > 3 else 0.0)
+                in_block = True
+            except (ValueError, IndexError):
+                if in_block:
+                    break
+    return [np.asarray(v) for v in [alpha, cl, cd, cm]]
+
+
+def old_write(fpath, alpha, cl, cd, cm):
+    with open(fpath, "w") as f:
+        for a, l, d, m in zip(alpha, cl, cd, cm):
+            f.write("({} {} {} {})\n".format(a, l, d, m))
+
+
+def main(nrows=100000, nqueries=1000000):
+    tmpdir = tempfile.mkdtemp()
+    fpath = os.path.join(tmpdir, "foil.dat")
+    fd = FoilData()
+    fd.alpha = np.linspace(-180, 180, nrows)
+    fd.cl = np.sin(np.radians(2*fd.alpha))
+    fd.cd = 1 - np.cos(np.radians(2*fd.alpha))
+    fd.cm = 0.1*fd.cl
+    fd.write(fpath)
+    new = FoilData()
+    number = 3
+    t_old = min(timeit.repeat(lambda: old_read(fpath), number=number,
+                              repeat=3))/number
+    t_new = min(timeit.repeat(lambda: new.read(fpath), number=number,
+                              repeat=3))/number
+    assert all(np.array_equal(a, b) for a, b in
+               zip(old_read(fpath), [new.alpha, new.cl, new.cd, new.cm]))
+    print("Read {} rows".format(nrows))
+    print("  Old: {:.1f} ms".format(t_old*1e3))
+    print("  New: {:.1f} ms ({:.1f}x)".format(t_new*1e3, t_old/t_new))
+    cols = [fd.alpha, fd.cl, fd.cd, fd.cm]
+    fd.comments = []
+    t_old = min(timeit.repeat(lambda: old_write(fpath, *cols),
+                              number=number, repeat=3))/number
+    t_new = min(timeit.repeat(lambda: fd.write(fpath), number=number,
+                              repeat=3))/number
+    print("Write {} rows".format(nrows))
+    print("  Old: {:.1f} ms".format(t_old*1e3))
+    print("  New: {:.1f} ms ({:.1f}x)".format(t_new*1e3, t_old/t_new))
+    tables = {}
+    for re in np.logspace(4, 7, 20):
+        table = FoilData()
+        table.alpha = np.linspace(-180, 180, 721)
+        table.cl = np.sin(np.radians(2*table.alpha))*np.log10(re)
+        table.cd = table.cm = table.cl
+        tables[re] = table
+    db = FoilDatabase(tables)
+    alpha = np.random.uniform(-180, 180, nqueries)
+    re = np.random.uniform(1e4, 1e7, nqueries)
+    t = min(timeit.repeat(lambda: db.coefficients(alpha, re), number=1,
+                          repeat=3))
+    print("Interpolate cl, cd, cm at {} points in {} tables: {:.1f} ms "
+          "({:.0f} ns per point)".format(nqueries, len(tables), t*1e3,
+                                         t/nqueries*1e9))
+    os.remove(fpath)
+    os.rmdir(tmpdir)
+
+
+if __name__ == "__main__":
+    main(*[int(a) for a in sys.argv[1:]])
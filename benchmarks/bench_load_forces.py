@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+"""Benchmark parsing a large ``forces.dat`` file.
+
+Compares the old line-by-line ``gen_stripped_lines``/``np.loadtxt`` approach
+with the bulk ``foampy.read_numeric_data`` parser. On NumPy 1.23 and newer
+both end in the C ``loadtxt``, so expect only a small speedup there; the
+large gain is on older NumPy, where ``loadtxt`` runs in Python. Usage:
+
+    python benchmarks/bench_load_forces.py [size_mb]
+"""
+
+from __future__ import division, print_function
+import os
+import sys
+import shutil
+import tempfile
+import time
+import numpy as np
+import foampy
+from foampy.core import gen_stripped_lines
+
+header = ("# Forces\n"
+          "# CofR           : (0 0 0)\n"
+          "# Time           forces(pressure viscous porous) "
+          "moment(pressure viscous porous)\n")
+
+
+def make_forces_file(fpath, size_mb=100):
+    """Write a synthetic forces file of approximately ``size_mb`` MB."""
+    rows = np.random.randn(10000, 18)
+    chunk = ""
+    for n, r in enumerate(rows):
+        vecs = ["({:.10e} {:.10e} {:.10e})".format(*r[i:i + 3])
+                for i in range(0, 18, 3)]
+        chunk += "{:.10e}\t(({} {} {})) (({} {} {}))\n".format(n*1e-3, *vecs)
+    nchunks = max(1, int(size_mb*1e6/len(chunk)))
+    with open(fpath, "w") as f:
+        f.write(header)
+        for n in range(nchunks):
+            f.write(chunk)
+
+
+def timeit(func, *args):
+    t0 = time.time()
+    result = func(*args)
+    return time.time() - t0, result
+
+
+def main(size_mb=100):
+    tmpdir = tempfile.mkdtemp()
+    try:
+        fpath = os.path.join(tmpdir, "forces.dat")
+        make_forces_file(fpath, size_mb)
+        print("File size: {:.1f} MB".format(os.path.getsize(fpath)/1e6))
+        t_old, old = timeit(lambda p: np.loadtxt(gen_stripped_lines(p)),
+                            fpath)
+        t_new, new = timeit(foampy.read_numeric_data, fpath)
+        assert np.array_equal(old, new)
+        print("gen_stripped_lines + np.loadtxt: {:.2f} s".format(t_old))
+        print("read_numeric_data:               {:.2f} s".format(t_new))
+        print("Speedup: {:.1f}x".format(t_old/t_new))
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        main(float(sys.argv[1]))
+    else:
+        main()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+"""Benchmark summarizing a parameter sweep with ``foampy.summarize_cases``
+for different numbers of worker processes. Usage:
+
+    python benchmarks/bench_summarize_cases.py [ncases]
+"""
+
+from __future__ import division, print_function
+import os
+import sys
+import shutil
+import tempfile
+import time
+import multiprocessing
+import foampy
+
+case_files = ["system/controlDict", "log.checkMesh", "log.icoFoam"]
+
+
+def make_sweep(root, ncases):
+    """Copy the files of the test case needed by ``summary`` ``ncases``
+    times.
+    """
+    casedirs = []
+    for n in range(ncases):
+        casedir = os.path.join(root, "case{}".format(n))
+        os.makedirs(os.path.join(casedir, "system"))
+        for f in case_files:
+            shutil.copy(os.path.join("test", f), os.path.join(casedir, f))
+        casedirs.append(casedir)
+    return casedirs
+
+
+def main(ncases=500):
+    root = tempfile.mkdtemp()
+    try:
+        casedirs = make_sweep(root, ncases)
+        print("Summarizing {} cases".format(ncases))
+        nprocs = [1, 2, 4, 8, 16]
+        nprocs = [n for n in nprocs if n <= max(multiprocessing.cpu_count(),
+                                                 2)]
+        t_serial = None
+        for nproc in nprocs:
+            t0 = time.time()
+            df = foampy.summarize_cases(casedirs, nproc=nproc)
+            dt = time.time() - t0
+            assert df.error.isnull().all()
+            if t_serial is None:
+                t_serial = dt
+            print("{:3d} workers: {:.2f} s ({:.1f}x)".format(nproc, dt,
+                                                           t_serial/dt))
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        main(int(sys.argv[1]))
+    else:
+        main()
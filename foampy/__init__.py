@@ -8,9 +8,20 @@ try:
 except KeyError:
     foam_version = "x.x.x"
 
+from . import asyncrun
+from .asyncrun import run_async
+from . import batch
+from . import cache
 from . import core
 from .core import *
+from . import decomposed
 from . import dictionaries
+from . import fields
 from . import foil
+from . import logs
+from . import mesh
+from . import monitor
+from . import stats
+from . import sweep
 from . import types
 from . import templates
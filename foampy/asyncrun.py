@@ -0,0 +1,117 @@
+"""Running OpenFOAM applications as asyncio subprocesses.
+
+Many applications can be supervised from one thread, e.g.::
+
+    async def main():
+        await asyncio.gather(*[run_async("simpleFoam", casedir=c)
+                               for c in casedirs])
+
+    asyncio.run(main())
+"""
+
+from __future__ import division, print_function, absolute_import
+import os
+import asyncio
+import subprocess
+from .core import app_argv, ProgressParser
+
+
+async def _stream_output(proc, log, on_output, on_progress, chunksize):
+    """Copy the output of a process to a log file line by line, calling the
+    callbacks for each line and progress event.
+    """
+    parser = ProgressParser()
+    partial = b""
+    while True:
+        chunk = await proc.stdout.read(chunksize)
+        if not chunk:
+            lines = [partial] if partial else []
+        else:
+            log.write(chunk)
+            lines = (partial + chunk).split(b"\n")
+            partial = lines.pop()
+        for line in lines:
+            if on_output is not None:
+                on_output(line.decode("utf-8", "replace"))
+            if on_progress is not None:
+                event = parser.feed(line)
+                if event is not None:
+                    on_progress(event)
+        if not chunk:
+            log.flush()
+            return
+
+
+async def _stop(proc, grace_period):
+    """Terminate a process, killing it if it does not exit in time."""
+    if proc.returncode is not None:
+        return
+    try:
+        proc.terminate()
+        await asyncio.wait_for(proc.wait(), grace_period)
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+    except ProcessLookupError:
+        pass
+
+
+async def run_async(appname, casedir="./", nproc=1, args=[], logname=None,
+                    overwrite=False, append=False, on_output=None,
+                    on_progress=None, timeout=None, grace_period=5.0,
+                    chunksize=65536):
+    """Run an application as a subprocess without a shell, streaming its
+    output to a log file as it is written.
+
+    Parameters
+    ----------
+    appname : str
+        Application name.
+    casedir : str
+        Case directory to run in.
+    nproc : int
+        Number of processors. If greater than one, the application is run
+        in parallel with ``mpirun``.
+    args : list or str
+        Application arguments.
+    logname : str
+        Log file name in ``casedir``. Defaults to ``log.<appname>``.
+    overwrite : bool
+        Whether to overwrite an existing log file.
+    append : bool
+        Whether to append to an existing log file.
+    on_output : callable
+        Called with each line of output, without the newline.
+    on_progress : callable
+        Called with a dict of ``time``, ``delta_t``, ``exectime``, and
+        ``clocktime`` at the end of each time step.
+    timeout : float
+        Time in seconds after which the application is stopped and
+        ``asyncio.TimeoutError`` is raised.
+    grace_period : float
+        Time in seconds to wait for the application to exit after it is
+        terminated, due to a timeout or cancellation, before it is killed.
+
+    Returns
+    -------
+    int
+        Exit code of the application.
+    """
+    if logname is None:
+        logname = "log." + appname
+    logpath = os.path.join(casedir, logname)
+    if os.path.isfile(logpath) and not overwrite and not append:
+        raise IOError(logpath + " exists; remove or use overwrite=True")
+    with open(logpath, "ab" if append else "wb") as log:
+        proc = await asyncio.create_subprocess_exec(
+            *app_argv(appname, nproc, args), cwd=casedir,
+            stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        try:
+            await asyncio.wait_for(_stream_output(proc, log, on_output,
+                                                  on_progress, chunksize),
+                                   timeout)
+            return await proc.wait()
+        except BaseException:
+            # Timed out or cancelled
+            await asyncio.shield(_stop(proc, grace_period))
+            raise
@@ -0,0 +1,229 @@
+"""Running batches of OpenFOAM applications over many cases.
+
+Jobs are packed onto the available cores and their states are recorded in
+a ledger file, so an interrupted batch can be resumed by running it again.
+"""
+
+from __future__ import division, print_function, absolute_import
+import os
+import json
+import time
+import threading
+import subprocess
+import multiprocessing
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+import pandas
+from .core import app_argv
+
+
+def _normalize_job(job):
+    """Convert a ``(casedir, application, nproc[, args])`` tuple or a dict
+    to a job dict.
+    """
+    if isinstance(job, dict):
+        job = dict(job)
+    else:
+        job = dict(zip(["casedir", "application", "nproc", "args"], job))
+    job.setdefault("nproc", 1)
+    job.setdefault("args", [])
+    if isinstance(job["args"], str):
+        job["args"] = job["args"].split()
+    job["nproc"] = int(job["nproc"] or 1)
+    job["casepath"] = os.path.abspath(job["casedir"])
+    job["key"] = "{}:{}".format(job["casepath"],
+                                " ".join([job["application"]] + job["args"]))
+    return job
+
+
+class Ledger(object):
+    """Record of job states kept in a JSON lines file.
+
+    Each state change is appended as one line, and the last line for a job
+    wins when the file is read back.
+    """
+    def __init__(self, fpath=None):
+        self.fpath = fpath
+        self.records = {}
+        if fpath is not None and os.path.isfile(fpath):
+            with open(fpath) as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # Partial line from an interrupted write
+                        continue
+                    self.records[record["key"]] = record
+
+    def record(self, job, state, **kwargs):
+        """Record the state of a job."""
+        record = {"key": job["key"], "casedir": job["casedir"],
+                  "application": job["application"], "nproc": job["nproc"],
+                  "args": job["args"], "state": state, "returncode": None,
+                  "start": None, "walltime": None, "error": None}
+        record.update(kwargs)
+        self.records[job["key"]] = record
+        if self.fpath is not None:
+            with open(self.fpath, "a") as f:
+                f.write(json.dumps(record) + "\n")
+        return record
+
+
+def _wait(proc, log, job, started, results):
+    proc.wait()
+    log.close()
+    results.put((job, proc.returncode, time.time() - started))
+
+
+def run_batch(jobs, ncores=None, ledger=None,
+              rerun_failed=False, verbose=True):
+    """Run a batch of applications, packing them onto the available cores.
+
+    Jobs are started in order as soon as enough cores are free, with later
+    jobs filling cores that earlier, larger jobs cannot use. Jobs on the same
+    case directory run one at a time in order, and if one fails, the rest for
+    that case are skipped. Each application runs without a shell in its case
+    directory, with output written to ``log.<application>``.
+
+    Parameters
+    ----------
+    jobs : list
+        Jobs as ``(casedir, application, nproc)`` tuples, optionally with a
+        fourth item for the application arguments, or dicts with these keys.
+    ncores : int
+        Number of cores to use. Defaults to the number of CPUs.
+    ledger : str
+        Path of the ledger file, e.g., ``"batch-ledger.jsonl"`` in the
+        directory that holds the cases. Jobs that completed successfully
+        according to the ledger are not run again. If ``None``, no ledger is
+        kept.
+    rerun_failed : bool
+        Whether to run jobs that failed in a previous batch again.
+    verbose : bool
+        Whether to print when jobs start and finish.
+
+    Returns
+    -------
+    pandas.DataFrame
+        State, exit code, start time, and wall time of each job.
+    """
+    if ncores is None:
+        ncores = multiprocessing.cpu_count()
+    jobs = [_normalize_job(job) for job in jobs]
+    keys = set()
+    for job in jobs:
+        if job["key"] in keys:
+            raise ValueError("Duplicate job {}".format(job["key"]))
+        keys.add(job["key"])
+    ledger = Ledger(ledger)
+    pending = []
+    failed_cases = set()
+    for job in jobs:
+        record = ledger.records.get(job["key"])
+        state = record["state"] if record is not None else None
+        if state == "failed" and not rerun_failed:
+            failed_cases.add(job["casepath"])
+        elif state != "done":
+            if job["casepath"] in failed_cases:
+                if state != "skipped":
+                    ledger.record(job, "skipped", error="previous job failed")
+            else:
+                pending.append(job)
+    results = queue.Queue()
+    running = {}
+    free = ncores
+    try:
+        while pending or running:
+            # Start jobs in order when enough cores are free and their case
+            # is not busy
+            busy = set(job["casepath"] for job in running.values())
+            n = 0
+            while n < len(pending):
+                job = pending[n]
+                ncores_job = min(job["nproc"], ncores)
+                if job["casepath"] in busy or ncores_job > free:
+                    busy.add(job["casepath"])
+                    n += 1
+                    continue
+                pending.pop(n)
+                busy.add(job["casepath"])
+                proc = _start(job, ledger, results, verbose)
+                if proc is not None:
+                    running[job["key"]] = job
+                    free -= ncores_job
+                else:
+                    pending = _skip_case(pending, job, ledger)
+            if not running:
+                continue
+            job, returncode, walltime = results.get()
+            del running[job["key"]]
+            free += min(job["nproc"], ncores)
+            state = "done" if returncode == 0 else "failed"
+            ledger.record(job, state, returncode=returncode,
+                          start=ledger.records[job["key"]]["start"],
+                          walltime=walltime)
+            if verbose:
+                print("Finished {} in {} ({}, {:.1f} s)".format(
+                      job["application"], job["casedir"], state, walltime))
+            if state == "failed":
+                pending = _skip_case(pending, job, ledger)
+    except BaseException:
+        for job in running.values():
+            job["proc"].terminate()
+            ledger.record(job, "interrupted",
+                          start=ledger.records[job["key"]]["start"])
+        raise
+    rows = [ledger.records[job["key"]] for job in jobs]
+    return pandas.DataFrame(rows, columns=["casedir", "application", "nproc",
+                                           "args", "state", "returncode",
+                                           "start", "walltime", "error"])
+
+
+def _start(job, ledger, results, verbose):
+    """Start a job and a thread that waits for it to finish, or record it
+    as failed if it cannot be started.
+    """
+    logpath = os.path.join(job["casedir"], "log." + job["application"])
+    started = time.time()
+    try:
+        log = open(logpath, "w")
+        try:
+            proc = subprocess.Popen(app_argv(job["application"], job["nproc"],
+                                             job["args"]),
+                                    cwd=job["casedir"], stdout=log,
+                                    stderr=subprocess.STDOUT)
+        except Exception:
+            log.close()
+            raise
+    except (IOError, OSError) as e:
+        ledger.record(job, "failed", start=started, error=str(e))
+        if verbose:
+            print("Failed to start {} in {}: {}".format(job["application"],
+                  job["casedir"], e))
+        return None
+    job["proc"] = proc
+    ledger.record(job, "running", start=started)
+    if verbose:
+        print("Running {} in {} on {} processor(s)".format(
+              job["application"], job["casedir"], job["nproc"]))
+    thread = threading.Thread(target=_wait, args=(proc, log, job, started,
+                                                  results))
+    thread.daemon = True
+    thread.start()
+    return proc
+
+
+def _skip_case(pending, failed_job, ledger):
+    """Remove pending jobs on the case of a failed job, recording them as
+    skipped.
+    """
+    remaining = []
+    for job in pending:
+        if job["casepath"] == failed_job["casepath"]:
+            ledger.record(job, "skipped", error="{} failed".format(
+                          failed_job["application"]))
+        else:
+            remaining.append(job)
+    return remaining
@@ -0,0 +1,182 @@
+"""Binary sidecar cache for parsed postProcessing data.
+
+When enabled, arrays parsed from ASCII files are saved as ``.npy`` sidecars
+next to the source file, keyed on its size and modification time, and
+memory-mapped on later loads instead of being parsed again. All sidecars are
+recorded in an index file so the cache can be cleared or capped in size with
+least recently used eviction.
+"""
+
+from __future__ import division, print_function, absolute_import
+import os
+import glob
+import threading
+import tempfile
+import numpy as np
+
+
+enabled = os.environ.get("FOAMPY_CACHE", "0") == "1"
+max_bytes = None
+index_fpath = os.path.join(os.path.expanduser("~"), ".foampy", "cache_index")
+
+_lock = threading.RLock()
+
+
+def enable(max_size=None):
+    """Enable the cache, optionally capping its total size in bytes."""
+    global enabled, max_bytes
+    enabled = True
+    max_bytes = max_size
+
+
+def disable():
+    """Disable the cache. Existing sidecars are left in place."""
+    global enabled
+    enabled = False
+
+
+def sidecar_path(fpath, stat=None):
+    """Return the sidecar path for the current state of ``fpath``."""
+    if stat is None:
+        stat = os.stat(fpath)
+    dirname, basename = os.path.split(os.path.abspath(fpath))
+    name = ".{}.{}-{}.npy".format(basename, stat.st_size, stat.st_mtime_ns)
+    return os.path.join(dirname, name)
+
+
+def _sidecars_for(fpath):
+    dirname, basename = os.path.split(os.path.abspath(fpath))
+    return glob.glob(os.path.join(dirname, "." + glob.escape(basename)
+                                  + ".*-*.npy"))
+
+
+def _remove(fpath):
+    try:
+        os.remove(fpath)
+    except OSError:
+        pass
+
+
+def _read_index():
+    if not os.path.isfile(index_fpath):
+        return []
+    with open(index_fpath) as f:
+        lines = [line.strip() for line in f]
+    # Preserve order but drop duplicates and sidecars removed elsewhere
+    seen = set()
+    sidecars = []
+    for line in lines:
+        if line and line not in seen and os.path.isfile(line):
+            seen.add(line)
+            sidecars.append(line)
+    return sidecars
+
+
+def _write_index(sidecars):
+    dirname = os.path.dirname(index_fpath)
+    if dirname and not os.path.isdir(dirname):
+        os.makedirs(dirname)
+    with open(index_fpath, "w") as f:
+        for sidecar in sidecars:
+            f.write(sidecar + "\n")
+
+
+def _register(sidecar):
+    dirname = os.path.dirname(index_fpath)
+    if dirname and not os.path.isdir(dirname):
+        os.makedirs(dirname)
+    with open(index_fpath, "a") as f:
+        f.write(sidecar + "\n")
+
+
+def _save(sidecar, data):
+    """Write a sidecar atomically so concurrent readers never see a partial
+    file.
+    """
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(sidecar), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.save(f, np.ascontiguousarray(data))
+        os.replace(tmp, sidecar)
+    except Exception:
+        _remove(tmp)
+        raise
+
+
+def load(fpath, reader):
+    """Load an array from ``fpath`` with ``reader``, using the sidecar cache
+    if it is enabled.
+
+    Parameters
+    ----------
+    fpath : str
+        Path to the source file.
+    reader : callable
+        Function that parses ``fpath`` and returns a NumPy array.
+    """
+    if not enabled:
+        return reader(fpath)
+    stat = os.stat(fpath)
+    sidecar = sidecar_path(fpath, stat)
+    if os.path.isfile(sidecar):
+        try:
+            data = np.load(sidecar, mmap_mode="r")
+        except (IOError, ValueError):
+            _remove(sidecar)
+        else:
+            # Bump the modification time to mark the sidecar recently used
+            os.utime(sidecar, None)
+            return data
+    data = reader(fpath)
+    with _lock:
+        for old in _sidecars_for(fpath):
+            _remove(old)
+        try:
+            _save(sidecar, data)
+        except (IOError, OSError):
+            # Read-only case directories are parsed every time
+            return data
+        _register(sidecar)
+        if max_bytes is not None:
+            evict(max_bytes)
+    return data
+
+
+def invalidate(fpath):
+    """Remove any sidecars for ``fpath``."""
+    with _lock:
+        for sidecar in _sidecars_for(fpath):
+            _remove(sidecar)
+
+
+def clear():
+    """Remove all sidecars recorded in the index."""
+    with _lock:
+        for sidecar in _read_index():
+            _remove(sidecar)
+        _write_index([])
+
+
+def size():
+    """Return the total size of all cached sidecars in bytes."""
+    return sum(os.path.getsize(s) for s in _read_index())
+
+
+def evict(max_size):
+    """Remove least recently used sidecars until the total cache size is at
+    most ``max_size`` bytes.
+    """
+    with _lock:
+        sidecars = _read_index()
+        # Most recently used first
+        sidecars.sort(key=lambda s: os.path.getmtime(s), reverse=True)
+        keep = []
+        total = 0
+        for sidecar in sidecars:
+            nbytes = os.path.getsize(sidecar)
+            if total + nbytes <= max_size:
+                keep.append(sidecar)
+                total += nbytes
+            else:
+                _remove(sidecar)
+        _write_index(keep)
@@ -3,6 +3,7 @@
 from __future__ import division, print_function
 import numpy as np
 import os
+import copy
 import re
 import datetime
 import sys
@@ -10,8 +11,23 @@ import time
 import subprocess
 import pandas
 import glob
+import io
+import itertools
+import multiprocessing
+from multiprocessing.pool import ThreadPool
 from .dictionaries import *
 from .templates import *
+from . import cache
+from .mesh import mesh_stats
+
+
+_paren_table = bytes.maketrans(b"(),", b"   ")
+_comment_regex = re.compile(br"^[ \t]*#[^\n]*", re.MULTILINE)
+_omega_table_regex = re.compile(br"\bomega\s+table\s*\(")
+_table_end_regex = re.compile(br"\)\s*;")
+# NumPy 1.23 and newer parse text in C with ``loadtxt``, which beats
+# ``fromstring`` on an in-memory buffer
+_c_loadtxt = tuple(int(v) for v in np.__version__.split(".")[:2]) >= (1, 23)
 
 
 def gen_stripped_lines(fpath):
@@ -20,14 +36,96 @@ def gen_stripped_lines(fpath):
             yield line.replace("(", " ").replace(")", " ")
 
 
-def load_forces(casedir="./", object_name="forces", start_time=0):
-    """Load forces and moments as a pandas DataFrame."""
-    glob_string = os.path.join(
-        casedir,
-        "postProcessing/{}/{}/forces*.dat".format(object_name, start_time)
-    )
-    fpath = sorted(glob.glob(glob_string))[-1]
-    data = np.loadtxt(gen_stripped_lines(fpath))
+def parse_numeric_data(data, complete=False):
+    """Parse the raw bytes of a function object output file into a 2-D
+    ``float64`` array.
+
+    Leading ``#`` header lines are skipped, parentheses are converted to
+    whitespace with a single ``bytes.translate``, and all numbers are parsed
+    in one call over the in-memory buffer. On NumPy 1.23 and newer this is
+    the C ``loadtxt``, which line-by-line parsing also ends in, so the gain
+    over it is small there; older NumPy uses ``np.fromstring``, which is
+    much faster than its pure Python ``loadtxt``.
+
+    An incomplete trailing line, e.g., one still being written by a running
+    solver, is ignored, unless ``complete`` is ``True``, for files that are
+    not being written, whose last line may have no newline.
+    """
+    start = 0
+    while data.startswith(b"#", start):
+        start = data.find(b"\n", start) + 1
+        if start == 0:
+            return np.empty((0, 0))
+    end = len(data) if complete else data.rfind(b"\n") + 1
+    if end <= start:
+        return np.empty((0, 0))
+    if start or end < len(data):
+        data = data[start:end]
+    data = data.translate(_paren_table)
+    if _c_loadtxt:
+        return np.loadtxt(io.BytesIO(data), ndmin=2)
+    if b"#" in data:
+        data = _comment_regex.sub(b"", data)
+    # Detect the number of columns from the first non-empty line
+    ncols, pos = 0, 0
+    while not ncols and pos < len(data):
+        newline = data.find(b"\n", pos)
+        if newline < 0:
+            newline = len(data)
+        ncols = len(data[pos:newline].split())
+        pos = newline + 1
+    if not ncols:
+        return np.empty((0, 0))
+    return np.fromstring(data, sep=" ").reshape(-1, ncols)
+
+
+def read_numeric_data(fpath):
+    """Read a numeric function object output file, e.g., ``forces.dat`` or
+    a probes file, as a 2-D ``float64`` array.
+
+    If ``foampy.cache`` is enabled, the array is memory-mapped from a binary
+    sidecar when the file has not changed since it was last parsed.
+    """
+    return cache.load(fpath, _read_numeric_data)
+
+
+def _skip_header(f):
+    """Move a binary file object past its ``#`` header lines."""
+    pos = f.tell()
+    line = f.readline()
+    while line.startswith(b"#"):
+        pos = f.tell()
+        line = f.readline()
+    f.seek(pos)
+
+
+def _read_numeric_data(fpath):
+    with open(fpath, "rb") as f:
+        # Skip the header here so the body is not copied again when parsed
+        _skip_header(f)
+        data = f.read()
+    return parse_numeric_data(data, complete=True)
+
+
+def iter_numeric_data(fpath, chunksize=100000):
+    """Iterate over a numeric function object output file in chunks of
+    ``chunksize`` rows, so files larger than memory can be processed.
+
+    Yields 2-D ``float64`` arrays; the last chunk may be shorter.
+    """
+    with open(fpath, "rb") as f:
+        _skip_header(f)
+        while True:
+            lines = list(itertools.islice(f, chunksize))
+            if not lines:
+                break
+            data = parse_numeric_data(b"".join(lines), complete=True)
+            if data.size:
+                yield data
+
+
+def _forces_dataframe(data):
+    """Build the ``load_forces`` DataFrame from parsed forces data."""
     df = pandas.DataFrame()
     df["time"] = data[:, 0]
     df["fx_pressure"] = data[:, 1]
@@ -56,102 +154,440 @@ def load_forces(casedir="./", object_name="forces", start_time=0):
     return df
 
 
-def load_probes_data(casedir="./", object_name="probes", start_time=0,
-                     field_name="U"):
-    """Load probes data as pandas ``DataFrame``."""
-    fpath = os.path.join(casedir, "postProcessing", object_name,
-                         str(start_time), field_name)
-    # First get probe locations to use as column names
-    with open(fpath) as f:
-        txt = f.read()
-    probe_lines = re.findall(r"# Probe \d.*\n", txt)
+def _is_number(s):
+    try:
+        float(s)
+        return True
+    except ValueError:
+        return False
+
+
+def find_forces_files(casedir="./", object_name="forces"):
+    """Find forces files from every start time directory of a forces function
+    object, in the order they were written.
+
+    Within a start time directory, ``forces.dat`` is followed by any
+    ``forces_<time>.dat`` files created when a run restarted from that
+    directory's time.
+    """
+    folder = os.path.join(casedir, "postProcessing", object_name)
+    start_times = sorted([d for d in os.listdir(folder) if _is_number(d)],
+                         key=float)
+    fpaths = []
+    for start_time in start_times:
+        fpaths += _sorted_forces_files(folder, start_time)
+    return fpaths
+
+
+def _sorted_forces_files(folder, start_time):
+    """List forces files in a start time directory in the order written."""
+    def file_time(fpath):
+        suffix = os.path.basename(fpath)[len("forces"):-len(".dat")]
+        suffix = suffix.lstrip("_")
+        return float(suffix) if _is_number(suffix) else float(start_time)
+    files = glob.glob(os.path.join(folder, str(start_time), "forces*.dat"))
+    return sorted(files, key=file_time)
+
+
+def _forces_fpath(casedir="./", object_name="forces", start_time=None):
+    """Find the latest forces file, optionally for a given start time."""
+    if start_time is None:
+        return find_forces_files(casedir, object_name)[-1]
+    folder = os.path.join(casedir, "postProcessing", object_name)
+    return _sorted_forces_files(folder, start_time)[-1]
+
+
+def merge_restarts(segments):
+    """Merge 2-D arrays of time series data from consecutive runs into one
+    array, where the first column is time.
+
+    Later segments win where time ranges overlap, i.e., rows of earlier
+    segments at or after the first time of any later segment are dropped.
+    The output is preallocated and each segment is copied once.
+    """
+    segments = [s for s in segments if s.size]
+    if not segments:
+        return np.empty((0, 0))
+    cutoff = np.inf
+    nrows = []
+    for segment in reversed(segments):
+        nrows.insert(0, np.searchsorted(segment[:, 0], cutoff, side="left"))
+        cutoff = min(cutoff, segment[0, 0])
+    data = np.empty((sum(nrows), segments[0].shape[1]))
+    row = 0
+    for segment, n in zip(segments, nrows):
+        data[row:row + n] = segment[:n]
+        row += n
+    return data
+
+
+def load_all_forces_data(casedir="./", object_name="forces", nproc=None):
+    """Load forces data from all start time directories as one 2-D array,
+    with timesteps duplicated by restarts removed.
+
+    Files are parsed concurrently with ``nproc`` threads (defaults to the
+    number of CPUs).
+    """
+    fpaths = find_forces_files(casedir, object_name)
+    if len(fpaths) > 1:
+        pool = ThreadPool(nproc)
+        try:
+            segments = pool.map(read_numeric_data, fpaths)
+        finally:
+            pool.close()
+    else:
+        segments = [read_numeric_data(f) for f in fpaths]
+    return merge_restarts(segments)
+
+
+def load_forces(casedir="./", object_name="forces", start_time=None):
+    """Load forces and moments as a pandas DataFrame.
+
+    If ``start_time`` is ``None``, data from all start time directories are
+    concatenated, with later restarts taking precedence where they overlap.
+    """
+    if start_time is None:
+        data = load_all_forces_data(casedir, object_name)
+    else:
+        data = read_numeric_data(_forces_fpath(casedir, object_name,
+                                               start_time))
+    return _forces_dataframe(data)
+
+
+def iter_forces(casedir="./", object_name="forces", start_time=None,
+                chunksize=100000, as_array=False):
+    """Iterate over forces and moments in chunks of ``chunksize`` rows with
+    bounded memory.
+
+    Yields DataFrames with the same columns as ``load_forces``, or raw 2-D
+    arrays if ``as_array`` is ``True``. If ``start_time`` is ``None``, all
+    start time directories are streamed in order, and rows replaced by later
+    restarts are skipped.
+    """
+    if start_time is None:
+        fpaths = find_forces_files(casedir, object_name)
+    else:
+        fpaths = [_forces_fpath(casedir, object_name, start_time)]
+    # Rows at or after the first time of any later file are overwritten
+    first_times = [_first_time(f) for f in fpaths]
+    cutoffs = [min(first_times[n + 1:] or [np.inf])
+               for n in range(len(fpaths))]
+    for fpath, cutoff in zip(fpaths, cutoffs):
+        for data in iter_numeric_data(fpath, chunksize):
+            n = np.searchsorted(data[:, 0], cutoff, side="left")
+            if n:
+                yield data[:n] if as_array else _forces_dataframe(data[:n])
+            if n < len(data):
+                break
+
+
+def _first_time(fpath):
+    """Read the first time from a numeric function object output file."""
+    with open(fpath, "rb") as f:
+        _skip_header(f)
+        data = parse_numeric_data(f.readline(), complete=True)
+    return data[0, 0] if data.size else np.inf
+
+
+def _probes_fpath(casedir="./", object_name="probes", start_time=0,
+                  field_name="U"):
+    return os.path.join(casedir, "postProcessing", object_name,
+                        str(start_time), field_name)
+
+
+def _read_probe_locs(raw):
+    """Read probe locations from the raw bytes of a probes file header."""
+    probe_lines = re.findall(br"# Probe \d.*\n", raw)
     probe_locs = []
     for line in probe_lines:
+        line = line.decode()
         probe_locs.append(line.split("(")[-1].split(")")[0].split())
-    data = np.loadtxt(gen_stripped_lines(fpath))
+    return probe_locs
+
+
+component_names = {1: ["value"],
+                   3: ["x", "y", "z"],
+                   6: ["xx", "xy", "xz", "yy", "yz", "zz"],
+                   9: ["xx", "xy", "xz", "yx", "yy", "yz", "zx", "zy", "zz"]}
+
+
+def _probes_dataframe(data, probe_locs):
+    """Build the ``load_probes_data`` DataFrame from parsed probes data."""
     df = pandas.DataFrame()
     df["time"] = data[:, 0]
     # Determine the rank of the data
     nprobes = len(probe_locs)
     nsamps = data.shape[0]
-    dims = (data.shape[1] - 1) // nprobes
+    dims = (data.shape[1] - 1) // nprobes if nprobes else 0
     for n, probe_loc in enumerate(probe_locs):
         probe_loc = [float(pl) for pl in probe_loc]
-        d = data[:, n + 1:n + dims + 1]
+        d = data[:, 1 + n*dims:1 + (n + 1)*dims]
         if dims > 1:
             d = [tuple(p) for p in d]
         df[tuple(probe_loc)] = d
     return df
 
 
+def _probes_array(data, nprobes):
+    """Reshape parsed probes data into time and a ``(nsamples, nprobes,
+    ncomponents)`` view, without copying.
+    """
+    t = data[:, 0]
+    ncomponents = (data.shape[1] - 1) // nprobes
+    return t, data[:, 1:].reshape(len(t), nprobes, ncomponents)
+
+
+def _probe_locations_dataframe(probe_locs):
+    locs = pandas.DataFrame(np.array(probe_locs, dtype=float).reshape(-1, 3),
+                            columns=["x", "y", "z"])
+    locs.index.name = "probe"
+    return locs
+
+
+def _read_probes_header(fpath):
+    header = []
+    with open(fpath, "rb") as f:
+        for line in f:
+            if not line.startswith(b"#"):
+                break
+            header.append(line)
+    return _read_probe_locs(b"".join(header))
+
+
+def load_probe_locations(casedir="./", object_name="probes", start_time=0,
+                         field_name="U"):
+    """Load probe locations as a pandas ``DataFrame`` indexed by probe number
+    with ``x``, ``y``, and ``z`` columns.
+    """
+    fpath = _probes_fpath(casedir, object_name, start_time, field_name)
+    return _probe_locations_dataframe(_read_probes_header(fpath))
+
+
+def load_probes_array(casedir="./", object_name="probes", start_time=0,
+                      field_name="U"):
+    """Load probes data as NumPy arrays.
+
+    Returns
+    -------
+    t : numpy.ndarray
+        Sample times.
+    data : numpy.ndarray
+        Samples with shape ``(nsamples, nprobes, ncomponents)``. This is a view
+        into the parsed (or memory-mapped) buffer, so no data are copied.
+    locations : pandas.DataFrame
+        Probe locations as returned by ``load_probe_locations``.
+    """
+    fpath = _probes_fpath(casedir, object_name, start_time, field_name)
+    probe_locs = _read_probes_header(fpath)
+    t, data = _probes_array(read_numeric_data(fpath), len(probe_locs))
+    return t, data, _probe_locations_dataframe(probe_locs)
+
+
+def load_probes_data(casedir="./", object_name="probes", start_time=0,
+                     field_name="U", multiindex=False):
+    """Load probes data as pandas ``DataFrame``.
+
+    By default, columns are named by probe location tuples, and vector or
+    tensor samples are stored as tuples. If ``multiindex`` is ``True``, the
+    DataFrame is instead indexed by time and has float columns with a
+    ``(probe, component)`` MultiIndex, built on top of the parsed buffer.
+    Probe locations can then be looked up with ``load_probe_locations``.
+    """
+    fpath = _probes_fpath(casedir, object_name, start_time, field_name)
+    # First get probe locations from the header to use as column names
+    probe_locs = _read_probes_header(fpath)
+    data = read_numeric_data(fpath)
+    if not multiindex:
+        return _probes_dataframe(data, probe_locs)
+    return _probes_multiindex_dataframe(data, len(probe_locs))
+
+
+def _probes_multiindex_dataframe(data, nprobes):
+    t, samples = _probes_array(data, nprobes)
+    nsamps, nprobes, ncomponents = samples.shape
+    components = component_names.get(ncomponents, range(ncomponents))
+    columns = pandas.MultiIndex.from_product([range(nprobes), components],
+                                             names=["probe", "component"])
+    index = pandas.Index(t, name="time")
+    return pandas.DataFrame(samples.reshape(nsamps, -1), index=index,
+                            columns=columns, copy=False)
+
+
+def iter_probes_data(casedir="./", object_name="probes", start_time=0,
+                     field_name="U", chunksize=100000, multiindex=False,
+                     as_array=False):
+    """Iterate over probes data in chunks of ``chunksize`` rows with bounded
+    memory.
+
+    Yields DataFrames formatted as by ``load_probes_data``, or, if
+    ``as_array`` is ``True``, tuples of sample times and ``(nsamples, nprobes,
+    ncomponents)`` arrays as returned by ``load_probes_array``.
+    """
+    fpath = _probes_fpath(casedir, object_name, start_time, field_name)
+    probe_locs = _read_probes_header(fpath)
+    for data in iter_numeric_data(fpath, chunksize):
+        if as_array:
+            yield _probes_array(data, len(probe_locs))
+        elif multiindex:
+            yield _probes_multiindex_dataframe(data, len(probe_locs))
+        else:
+            yield _probes_dataframe(data, probe_locs)
+
+
+class DataFileFollower(object):
+    """Incrementally read rows appended to a function object output file,
+    e.g., while a case is still running.
+
+    The byte offset after the last complete line is remembered, so each call
+    to ``read`` only parses data written since the previous call. Incomplete
+    trailing lines are left for the next call. If the file shrinks, e.g.,
+    because the case was restarted, it is read again from the beginning.
+    """
+    def __init__(self, fpath):
+        self.fpath = fpath
+        self.offset = 0
+        self.ncols = None
+
+    def read_new_bytes(self):
+        """Return complete lines appended since the last call as bytes."""
+        with open(self.fpath, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell() < self.offset:
+                self.offset = 0
+            f.seek(self.offset)
+            data = f.read()
+        end = data.rfind(b"\n") + 1
+        if end == 0:
+            return b""
+        data = data[:end]
+        self.offset += end
+        return data
+
+    def _parse(self, raw):
+        data = parse_numeric_data(raw)
+        if data.size:
+            self.ncols = data.shape[1]
+        elif self.ncols is not None:
+            data = np.empty((0, self.ncols))
+        return data
+
+    def read(self):
+        """Return rows appended since the last call as a 2-D array."""
+        return self._parse(self.read_new_bytes())
+
+
+class ForcesFollower(DataFileFollower):
+    """Incrementally read a forces file as ``load_forces`` DataFrames.
+
+    By default the latest forces file of the latest start time is followed.
+    """
+    def __init__(self, casedir="./", object_name="forces", start_time=None):
+        DataFileFollower.__init__(self, _forces_fpath(casedir, object_name,
+                                                      start_time))
+
+    def read(self):
+        """Return rows appended since the last call as a DataFrame."""
+        return _forces_dataframe(DataFileFollower.read(self).reshape(-1, 19))
+
+
+class ProbesFollower(DataFileFollower):
+    """Incrementally read a probes file as ``load_probes_data``
+    DataFrames.
+    """
+    def __init__(self, casedir="./", object_name="probes", start_time=0,
+                 field_name="U"):
+        DataFileFollower.__init__(self, _probes_fpath(casedir, object_name,
+                                                      start_time, field_name))
+        self.probe_locs = []
+        self.ncomponents = None
+
+    def _read_header(self):
+        """Parse the probe locations and number of components once the
+        whole header and the first row of data have been written.
+        """
+        with open(self.fpath, "rb") as f:
+            header = []
+            for line in f:
+                if not line.endswith(b"\n"):
+                    return False
+                if line.startswith(b"#"):
+                    header.append(line)
+                elif line.strip():
+                    break
+            else:
+                return False
+        probe_locs = _read_probe_locs(b"".join(header))
+        if not probe_locs:
+            return False
+        ntokens = len(line.translate(None, b"()").split())
+        self.ncomponents = (ntokens - 1) // len(probe_locs)
+        self.probe_locs = probe_locs
+        return True
+
+    def read(self):
+        """Return rows appended since the last call as a DataFrame.
+
+        Nothing is read until the header and first row are complete, e.g.,
+        when following a file before the solver writes to it.
+        """
+        if not self.probe_locs and not self._read_header():
+            return _probes_dataframe(np.empty((0, 1)), [])
+        data = self._parse(self.read_new_bytes())
+        if self.ncols is None:
+            data = np.empty((0, 1 + len(self.probe_locs)*self.ncomponents))
+        return _probes_dataframe(data, self.probe_locs)
+
+
+def _torque_drag(data, torque_axis="z", drag_axis="x"):
+    """Sum pressure and viscous torque and drag from parsed forces data."""
+    axes = {"x": 0, "y": 1, "z": 2}
+    t = data[:, 0]
+    torque = data[:, 10 + axes[torque_axis]] + data[:, 13 + axes[torque_axis]]
+    drag = data[:, 1 + axes[drag_axis]] + data[:, 4 + axes[drag_axis]]
+    return t, torque, drag
+
+
 def load_torque_drag(casedir="", folder="0", filename=None,
                      torque_axis="z", drag_axis="x"):
     """Loads time, z-axis torque, and streamwise force from specified forces
     folder. Case name can be left empty if running within a case folder."""
-    # Create empty lists
-    t = []
-    fpx = []; fpy = []; fpz = []
-    fpox = []; fpoy = []; fpoz = []
-    fvx = []; fvy = []; fvz = []
-    mpx = []; mpy = []; mpz = []
-    mpox = []; mpoy = []; mpoz = []
-    mvx = []; mvy = []; mvz = []
-    # Cycle through file
-    if casedir: casedir += "/"
     if not filename: filename = "forces.dat"
-    with open(casedir+"postProcessing/forces/"+str(folder)+"/"+filename, "r") as f:
-        for line in f.readlines():
-            line = line.replace("(", "")
-            line = line.replace(")", "")
-            line = line.replace(",", " ")
-            line = line.split()
-            if line[0] != "#":
-                t.append(float(line[0]))
-                fpx.append(float(line[1]))
-                fpy.append(float(line[2]))
-                fpz.append(float(line[3]))
-                fvx.append(float(line[4]))
-                fvy.append(float(line[5]))
-                fvz.append(float(line[6]))
-                fpox.append(float(line[7]))
-                fpoy.append(float(line[8]))
-                fpoz.append(float(line[9]))
-                mpx.append(float(line[10]))
-                mpy.append(float(line[11]))
-                mpz.append(float(line[12]))
-                mvx.append(float(line[13]))
-                mvy.append(float(line[14]))
-                mvz.append(float(line[15]))
-                mpox.append(float(line[16]))
-                mpoy.append(float(line[17]))
-                mpoz.append(float(line[18]))
-    #Convert to numpy arrays
-    t = np.asarray(t)
-    if torque_axis == "z":
-        torque = np.asarray(np.asarray(mpz) + np.asarray(mvz))
-    elif torque_axis == "x":
-        torque = np.asarray(np.asarray(mpx) + np.asarray(mvx))
-    if drag_axis == "x":
-        drag = np.asarray(np.asarray(fpx) + np.asarray(fvx))
-    return t, torque, drag
+    fpath = os.path.join(casedir, "postProcessing", "forces", str(folder),
+                         filename)
+    return _torque_drag(read_numeric_data(fpath), torque_axis, drag_axis)
 
 
 def load_all_torque_drag(casedir="", torque_axis="z", drag_axis="x"):
-    t, torque, drag = np.array([]), np.array([]), np.array([])
-    if casedir: casedir += "/"
-    folders = sorted(os.listdir(casedir+"postProcessing/forces"))
-    for folder in folders:
-        files = sorted(os.listdir(casedir+"postProcessing/forces/"+folder))
-        for f in files:
-            t1, torque1, drag1 = load_torque_drag(casedir=casedir,
-                                                  folder=folder,
-                                                  filename=f,
-                                                  torque_axis=torque_axis,
-                                                  drag_axis=drag_axis)
-            t = np.append(t, t1)
-            torque = np.append(torque, torque1)
-            drag = np.append(drag, drag1)
-    return t, torque, drag
+    """Load time, torque, and drag from all forces start time directories,
+    trimming timesteps overwritten by restarts.
+    """
+    data = load_all_forces_data(casedir=casedir or "./")
+    return _torque_drag(data, torque_axis, drag_axis)
+
+
+def _read_omega_table(fpath):
+    """Read the ``omega table`` of a ``dynamicMeshDict`` as arrays of t and
+    omega, which are empty if there is no table.
+    """
+    with open(fpath, "rb") as f:
+        data = f.read()
+    m = _omega_table_regex.search(data)
+    if m is None:
+        return np.array([]), np.array([])
+    end = _table_end_regex.search(data, m.end())
+    end = end.start() if end else len(data)
+    table = np.fromstring(data[m.end():end].translate(_paren_table), sep=" ")
+    table = table.reshape(-1, 2)
+    return table[:, 0], table[:, 1]
+
+
+def cumulative_trapezoid(y, x):
+    """Integrate ``y`` over ``x`` with the trapezoidal rule, returning the
+    running integral at each point, starting from zero.
+    """
+    integral = np.zeros(len(y))
+    integral[1:] = np.cumsum(0.5*(y[1:] + y[:-1])*np.diff(x))
+    return integral
 
 
 def load_theta_omega(casedir="", t_interp=[], theta_units="degrees"):
@@ -161,23 +597,10 @@ def load_theta_omega(casedir="", t_interp=[], theta_units="degrees"):
     `t_interp` is a keyword argument for an array over which omega and theta
     will be interpolated.
     """
-    t = []
-    omega = []
-    if casedir != "":
-        casedir += "/"
-    with open(casedir+"constant/dynamicMeshDict", "r") as f:
-        regex = r"\d+.\d+"
-        for line in f.readlines():
-            match = re.findall(regex, line)
-            if len(match)==2:
-                t.append(float(match[0]))
-                omega.append(float(match[1]))
-    omega = np.asarray(omega)
-    t = np.asarray(t)
+    t, omega = _read_omega_table(os.path.join(casedir, "constant",
+                                              "dynamicMeshDict"))
     # Integrate omega to obtain theta
-    theta = np.zeros(len(t))
-    for n in range(len(t)):
-        theta[n] = np.trapz(omega[:n], t[:n])
+    theta = cumulative_trapezoid(omega, t)
     # If provided, interpolate omega to match t vector
     if len(t_interp) > 0:
         omega = np.interp(t_interp, t, omega)
@@ -187,119 +610,232 @@ def load_theta_omega(casedir="", t_interp=[], theta_units="degrees"):
     return t, theta, omega
 
 
-def load_set(casedir="./", name="profile", quantity="U", fmt="xy", axis="xyz"):
-    """Import text data created with the OpenFOAM sample utility."""
-    folder = os.path.join(casedir, "postProcessing", "sets")
-    t = []
-    times = os.listdir(folder)
-    for time1 in times:
-        try:
-            float(time1)
-        except ValueError:
-            times.remove(time1)
+def _time_name_value(name):
+    """Return the numerical value of a time directory name, preserving
+    integers, or ``None`` if it is not a time.
+    """
+    try:
+        return int(name)
+    except ValueError:
         try:
-            t.append(int(time1))
+            return float(name)
         except ValueError:
-            t.append(float(time1))
-    t.sort()
-    data = {"time" : t}
-    for ts in t:
-        filename = "{folder}/{time}/{name}_{q}.{fmt}".format(folder=folder,
-            time=ts, name=name, q=quantity, fmt=fmt)
-        with open(filename) as f:
-            d = np.loadtxt(f)
-            if quantity == "U":
-                data[ts] = {"u" : d[:, len(axis)],
-                            "v" : d[:, len(axis)+1],
-                            "w" : d[:, len(axis)+2]}
-                if len(axis) == 1:
-                    data[ts][axis] = d[:,0]
-                else:
-                    data[ts]["x"] = d[:,0]
-                    data[ts]["y"] = d[:,1]
-                    data[ts]["z"] = d[:,2]
+            return None
+
+
+class SetCollection(object):
+    """Index of sampled sets written to ``postProcessing/<folder>/<time>``,
+    e.g., by the OpenFOAM ``sample`` utility.
+
+    Time directories are listed on construction, but no data is read until
+    it is requested with ``load``, which stacks the data from a range of
+    times into one array. Files are parsed with ``read_numeric_data``, so
+    the sidecar cache is used if it is enabled.
+
+    Parameters
+    ----------
+    casedir : str
+        Case directory.
+    folder : str
+        Name of the function object folder in ``postProcessing``.
+    axis : str
+        Coordinate axis setting of the sets. ``"xyz"`` sets have three
+        coordinate columns, and all others one.
+    nproc : int
+        Number of threads used to read files (defaults to the number of
+        CPUs).
+    """
+    def __init__(self, casedir="./", folder="sets", axis="xyz", nproc=None):
+        self.folder = os.path.join(casedir, "postProcessing", folder)
+        self.axis = axis
+        self.ncoords = 3 if axis == "xyz" else 1
+        self.nproc = nproc
+        times = []
+        for dirname in os.listdir(self.folder):
+            value = _time_name_value(dirname)
+            if value is not None:
+                times.append((value, dirname))
+        times.sort()
+        self.time_values = [v for v, d in times]
+        self.time_dirs = [d for v, d in times]
+        self.times = np.array(self.time_values, dtype=float)
+        self._names = None
+
+    def __len__(self):
+        return len(self.times)
+
+    @property
+    def names(self):
+        """Set file names in the first time directory, e.g.,
+        ``"profile_U.xy"``. Hidden files, such as cache sidecars, are
+        skipped.
+        """
+        if self._names is None:
+            if len(self.time_dirs) == 0:
+                self._names = []
+            else:
+                self._names = sorted(
+                    name for name in os.listdir(os.path.join(
+                        self.folder, self.time_dirs[0]))
+                    if not name.startswith("."))
+        return self._names
+
+    def fpath(self, name, index):
+        """Return the path of set file ``name`` at time index ``index``."""
+        return os.path.join(self.folder, self.time_dirs[index], name)
+
+    def select(self, time=None, start=None, stop=None):
+        """Return the indices of the times matching ``time`` or within the
+        range ``start <= t <= stop``.
+        """
+        if time is not None:
+            matches = np.flatnonzero(np.isclose(self.times, float(time)))
+            if len(matches) == 0:
+                raise KeyError("No set data at time {}".format(time))
+            return matches[:1]
+        mask = np.ones(len(self.times), dtype=bool)
+        if start is not None:
+            mask &= self.times >= start
+        if stop is not None:
+            mask &= self.times <= stop
+        return np.flatnonzero(mask)
+
+    def read(self, name, index):
+        """Read the raw 2-D array of set file ``name`` at time index
+        ``index``, including coordinate columns.
+        """
+        return read_numeric_data(self.fpath(name, index))
+
+    def coordinates(self, name, index=0):
+        """Return the coordinate columns of set file ``name``."""
+        return np.asarray(self.read(name, index)[:, :self.ncoords])
+
+    def load(self, name, time=None, start=None, stop=None,
+             coordinates=False):
+        """Load the data of set file ``name`` for one time or a range of
+        times.
+
+        Returns
+        -------
+        t : numpy.ndarray
+            Times of the data.
+        data : numpy.ndarray
+            Array with shape ``(ntimes, npoints, ncomponents)``. Coordinate
+            columns are excluded unless ``coordinates`` is ``True``, in which
+            case they come first.
+        """
+        indices = self.select(time, start, stop)
+        if len(indices) == 0:
+            return self.times[indices], np.empty((0, 0, 0))
+        col = 0 if coordinates else self.ncoords
+        first = self.read(name, indices[0])
+        data = np.empty((len(indices), first.shape[0], first.shape[1] - col))
+        data[0] = first[:, col:]
+
+        def fill(n):
+            data[n] = self.read(name, indices[n])[:, col:]
+
+        if len(indices) > 2:
+            pool = ThreadPool(self.nproc)
+            try:
+                pool.map(fill, range(1, len(indices)))
+            finally:
+                pool.close()
+        else:
+            for n in range(1, len(indices)):
+                fill(n)
+        return self.times[indices], data
+
+
+def load_set(casedir="./", name="profile", quantity="U", fmt="xy", axis="xyz"):
+    """Import text data created with the OpenFOAM sample utility."""
+    sets = SetCollection(casedir, axis=axis)
+    fname = "{}_{}.{}".format(name, quantity, fmt)
+    data = {"time" : sets.time_values}
+    if quantity != "U":
+        return data
+    _, values = sets.load(fname, coordinates=True)
+    for ts, d in zip(sets.time_values, values):
+        data[ts] = {"u" : d[:, len(axis)],
+                    "v" : d[:, len(axis)+1],
+                    "w" : d[:, len(axis)+2]}
+        if len(axis) == 1:
+            data[ts][axis] = d[:, 0]
+        else:
+            data[ts]["x"] = d[:, 0]
+            data[ts]["y"] = d[:, 1]
+            data[ts]["z"] = d[:, 2]
     return data
 
 
 def load_sample_xy(casedir="./", profile="U"):
     """Import text data created with the OpenFOAM sample utility."""
-    folder = os.path.join(casedir, "postProcessing", "sets")
-    t = []
-    times = os.listdir(folder)
-    for time1 in times:
-        try:
-            float(time1)
-        except ValueError:
-            times.remove(time1)
-        try:
-            t.append(int(time1))
-        except ValueError:
-            t.append(float(time1))
-    t.sort()
+    sets = SetCollection(casedir, axis="y")
+    fname = "profile_{}.xy".format(profile)
     # Load a y vector from a single file since they are identical
-    with open(folder+"/0/profile_"+profile+".xy") as f:
-        y = np.loadtxt(f)[:,0]
+    y = sets.coordinates(fname)[:, 0]
+    t, values = sets.load(fname)
+    # Profiles are stored with shape (npoints, ntimes)
+    values = values.transpose(2, 1, 0)
     if profile == "U":
-        u = np.zeros((len(y), len(times)))
-        v = np.zeros((len(y), len(times)))
+        data = {"t" : t, "u" : values[0], "v": values[1], "y" : y}
     elif profile == "R":
-        uu = np.zeros((len(y), len(times)))
-        uv = np.zeros((len(y), len(times)))
-        uw = np.zeros((len(y), len(times)))
-        vv = np.zeros((len(y), len(times)))
-        vw = np.zeros((len(y), len(times)))
-        ww = np.zeros((len(y), len(times)))
-    for n in range(len(times)):
-        with open(folder+"/"+str(t[n])+"/profile_"+profile+".xy") as f:
-            data = np.loadtxt(f)
-            if profile == "U":
-                u[:,n] = data[:,1]
-                v[:,n] = data[:,2]
-            elif profile == "R":
-                uu[:,n] = data[:,1]
-                uv[:,n] = data[:,2]
-                uw[:,n] = data[:,3]
-                vv[:,n] = data[:,4]
-                vw[:,n] = data[:,5]
-                ww[:,n] = data[:,6]
-    t = np.asarray(t, dtype=float)
-    if profile == "U":
-        data = {"t" : t, "u" : u, "v": v, "y" : y}
-    elif profile == "R":
-        data = {"t" : t, "uu" : uu, "vv": vv, "ww" : ww,
-                "uv" : uv, "y" : y}
+        data = {"t" : t, "uu" : values[0], "vv": values[3], "ww" : values[5],
+                "uv" : values[1], "y" : y}
     return data
 
 
-def get_endtime():
+def _read_controldict(casedir):
+    """Return the cached, shared tree of the ``controlDict``, for reading
+    single values without copying it.
+    """
+    return read_dict_cached(dictpath_from_name("controlDict", casedir))
+
+
+def get_endtime(casedir="./"):
     """Get run ``endTime``."""
-    with open("system/controlDict", "r") as f:
-        for line in f.readlines():
-            line = line.replace(";", "").split()
-            if "endTime" in line and line[0] == "endTime":
-                endtime = float(line[1])
-    return endtime
+    return float(_read_controldict(casedir)["endTime"])
 
 
 def get_deltat(casedir="./"):
     """Get run ``deltaT``."""
-    fpath = os.path.join(casedir, "system", "controlDict")
-    with open(fpath) as f:
-        for line in f.readlines():
-            line = line.replace(";", "").split()
-            if "deltaT" in line and line[0] == "deltaT":
-                deltat = float(line[1])
-    return deltat
+    return float(_read_controldict(casedir)["deltaT"])
 
 
 def get_ncells(casedir="./", logname="log.checkMesh", keyword="cells",
                autogen=True):
+    """Get the number of cells, or another count from the ``checkMesh`` log
+    by keyword.
+
+    If there is no log, counts of cells, faces, internal faces, and points
+    are read from the mesh files with ``mesh_stats``. Otherwise, if
+    ``autogen`` is ``True``, ``checkMesh`` is run to create the log, which
+    is kept only if it succeeds. Raises a ``KeyError`` if the keyword is not
+    in the log.
+    """
     fpath = os.path.join(casedir, logname)
-    if not os.path.isfile(fpath) and autogen:
-        start_dir = os.getcwd()
-        os.chdir(casedir)
-        run("checkMesh", args="-time 0")
-        os.chdir(start_dir)
+    if not os.path.isfile(fpath):
+        key = keyword.rstrip(":").replace(" ", "_")
+        if key in ["cells", "faces", "internal_faces", "points"]:
+            try:
+                return mesh_stats(casedir)[key]
+            except (IOError, OSError, ValueError):
+                pass
+        if autogen:
+            print("Running checkMesh")
+            # Write to a temporary file, so a failed run leaves no log
+            tmppath = fpath + ".tmp"
+            with open(tmppath, "w") as f:
+                try:
+                    returncode = subprocess.call(
+                        app_argv("checkMesh", args=["-time", "0"]),
+                        cwd=casedir, stdout=f, stderr=subprocess.STDOUT)
+                except OSError:
+                    returncode = None
+            if returncode != 0:
+                os.remove(tmppath)
+                raise RuntimeError("checkMesh failed in {}".format(casedir))
+            os.replace(tmppath, fpath)
     if keyword == "cells":
         keyword = "cells:"
     with open(fpath) as f:
@@ -308,27 +844,32 @@ def get_ncells(casedir="./", logname="log.checkMesh", keyword="cells",
             if ls and ls[0] == keyword:
                 value = ls[1]
                 return int(value)
+    raise KeyError("No {} in {}".format(keyword, fpath))
 
 
-def get_max_courant_no():
-    with open("system/controlDict") as f:
-        for line in f.readlines():
-            if ";" in line:
-                ls = line.replace(";", " ").split()
-                if ls[0] == "maxCo":
-                    return float(ls[1])
+def get_max_courant_no(casedir="./"):
+    """Get ``maxCo`` from the ``controlDict``, or ``None`` if not set."""
+    maxco = _read_controldict(casedir).get("maxCo")
+    if maxco is not None:
+        return float(maxco)
 
 
-def read_dict(dictname=None, dictpath=None, casedir="./"):
-    """Read an OpenFOAM dict into a Python dict. Right now this is quite
-    crude, but gets the job done decently for 1 word parameters."""
-    foamdict = {}
+def read_dict(dictname=None, dictpath=None, casedir="./", tree=False):
+    """Read an OpenFOAM dict into a Python dict.
+
+    By default every ``keyword value;`` line, at any level of nesting, is
+    read into one flat dict of strings, keeping the first word of each
+    value. If ``tree`` is ``True``, the result is instead a ``FoamSubDict``
+    (an ``OrderedDict``) as returned by ``dictionaries.parse_dict``, with
+    nested sub-dictionaries and lists and numeric values converted. It is a
+    copy of the tree in a process-wide cache that is refreshed when the file
+    changes on disk, so it may be modified by the caller.
+    """
     if dictpath is None and dictname is not None:
-        if dictname in system_dicts:
-            p = "system/" + dictname
-        elif dictname in constant_dicts:
-            p = "constant/" + dictname
-        dictpath = os.path.join(casedir, p)
+        dictpath = dictpath_from_name(dictname, casedir)
+    if tree:
+        return copy.deepcopy(read_dict_cached(dictpath))
+    foamdict = {}
     with open(dictpath) as f:
         for line in f.readlines():
             if ";" in line:
@@ -344,16 +885,42 @@ def read_case():
     pass
 
 
+def format_omega_table(t, omega, indent=12):
+    """Format a table of ``(t omega)`` rows for a ``dynamicMeshDict``, one
+    row per line without a trailing newline.
+    """
+    rows = np.column_stack((np.asarray(t, dtype=float),
+                            np.asarray(omega, dtype=float)))
+    fmt = " "*indent + "(%r %r)\n"
+    # One format operation over all values is much faster than formatting
+    # row by row
+    return ((fmt*len(rows)) % tuple(rows.ravel().tolist()))[:-1]
+
+
 def gen_dynmeshdict(U, R, meantsr, cellzone="AMIsurface", rpm_fluc=3.7,
-                    npoints=400, axis="(0 0 1)", direction=1):
+                    npoints=400, axis="(0 0 1)", direction=1, t=None,
+                    omega=None, casedir="./"):
     """Generates a dynamicMeshDict for a given U, R, meantsr, and an optional
-    rpm fluctuation amplitude. Phase is fixed."""
+    rpm fluctuation amplitude. Phase is fixed.
+
+    A custom rotation schedule can be supplied with ``omega``, either as an
+    array of values at times ``t`` or as a function of ``t``, in which case
+    `U`, `R`, `meantsr`, and `rpm_fluc` are ignored. If ``t`` is not
+    provided, it is spaced evenly from zero to the end time.
+    """
     meanomega = meantsr*U/R
-    if npoints > 0:
-        amp_omega = rpm_fluc*2*np.pi/60.0
-        endtime = get_endtime()
-        t = np.linspace(0, endtime, npoints)
-        omega = meanomega + amp_omega*np.sin(3*meanomega*t - np.pi/1.2)
+    if omega is not None and not callable(omega):
+        npoints = len(omega)
+    if omega is not None or npoints > 0:
+        if t is None:
+            t = np.linspace(0, get_endtime(casedir), npoints)
+        if omega is None:
+            amp_omega = rpm_fluc*2*np.pi/60.0
+            omega = meanomega + amp_omega*np.sin(3*meanomega*t - np.pi/1.2)
+        elif callable(omega):
+            omega = omega(t)
+        if len(t) != len(omega):
+            raise ValueError("t and omega must have the same length")
     # Write to file
     top = \
     r"""/*--------------------------------*- C++ -*----------------------------------*\
@@ -384,7 +951,7 @@ solidBodyMotionFvMeshCoeffs
     {
         origin\t\t(0 0 0);
         axis\t\t""" + axis + ";\n"
-    if npoints > 0:
+    if omega is not None:
         top += """        omega\t\ttable
         (
 """
@@ -392,10 +959,7 @@ solidBodyMotionFvMeshCoeffs
         		(t0 omega0)
         		(t1 omega1)
         """
-        table = ""
-        for n in range(len(t)-1):
-            table += "            (" + str(t[n]) + " " + str(omega[n]) + ")\n"
-        table += "            (" + str(t[-1]) + " " + str(omega[-1]) + ")"
+        table = format_omega_table(t, omega)
         bottom = """
         );
     }
@@ -404,108 +968,191 @@ solidBodyMotionFvMeshCoeffs
     else:
         alltxt = top + "\n        omega\t\t" + str(direction*meanomega)\
                 + ";\n    }\n}\n"
-    with open("constant/dynamicMeshDict", "w") as f:
+    with open(os.path.join(casedir, "constant", "dynamicMeshDict"), "w") as f:
         f.write(alltxt)
 
 
-def get_solver_times(casedir="./", solver=None, log_fpath=None, window=400):
+class ProgressParser(object):
+    """Incremental parser for the progress of a solver from its log.
+
+    Output is passed to ``feed`` line by line, or to ``feed_bytes`` in
+    blocks of complete lines, as it is written. The ``Time`` and ``deltaT``
+    of the current step are remembered, and when its ``ExecutionTime`` line
+    is reached, a progress dict with keys ``"time"``, ``"delta_t"``,
+    ``"exectime"``, and ``"clocktime"`` is emitted. ``finished`` is set when
+    the solver writes ``End``.
+    """
+    _regex = re.compile(br"^(?:Time = (\S+)|deltaT = (\S+)|ExecutionTime = "
+                        br"(\S+) s\s+ClockTime = (\S+) s|(End)\s*$)",
+                        re.MULTILINE)
+
+    def __init__(self):
+        self.time = None
+        self.delta_t = None
+        self.finished = False
+
+    def feed_bytes(self, data):
+        """Parse a block of complete lines and return a list of progress
+        dicts for the time steps completed in it.
+        """
+        events = []
+        for m in self._regex.finditer(data):
+            time, deltat, exectime, clocktime, end = m.groups()
+            if time is not None:
+                self.time = _float_or_none(time)
+            elif deltat is not None:
+                self.delta_t = _float_or_none(deltat)
+            elif exectime is not None:
+                events.append({"time": self.time, "delta_t": self.delta_t,
+                               "exectime": _float_or_none(exectime),
+                               "clocktime": _float_or_none(clocktime)})
+            else:
+                self.finished = True
+        return events
+
+    def feed(self, line):
+        """Parse one line of the log, as bytes or text. Returns a progress
+        dict at the end of each time step and ``None`` otherwise.
+        """
+        if not isinstance(line, bytes):
+            line = line.encode()
+        events = self.feed_bytes(line)
+        return events[-1] if events else None
+
+
+def _float_or_none(txt):
+    try:
+        return float(txt)
+    except ValueError:
+        return None
+
+
+def tail_lines(fpath, nlines=None, pattern=None, count=1, blocksize=4096):
+    """Read lines from the end of a file without reading all of it.
+
+    Blocks are read backwards, doubling in size each time, and only newlines
+    or matches in each new block are counted.
+
+    Parameters
+    ----------
+    fpath : str
+        Path to the file.
+    nlines : int
+        Number of lines to return.
+    pattern : str or bytes
+        Regular expression. If given instead of ``nlines``, lines are read
+        until ``count`` lines match it, and the lines from the first of
+        these matches to the end are returned.
+    count : int
+        Number of lines matching ``pattern`` to read back to.
+    blocksize : int
+        Size of the first block in bytes.
+
+    Returns
+    -------
+    list
+        Lines as bytes, without newlines.
+    """
+    if pattern is not None:
+        if not isinstance(pattern, bytes):
+            pattern = pattern.encode()
+        regex = re.compile(pattern, re.MULTILINE)
+    elif nlines is None:
+        raise ValueError("Either nlines or pattern must be given")
+    chunks = []
+    found = 0
+    head = b""
+    with open(fpath, "rb") as f:
+        pos = f.seek(0, os.SEEK_END)
+        while pos > 0:
+            start = max(0, pos - blocksize)
+            f.seek(start)
+            chunk = f.read(pos - start)
+            pos = start
+            chunks.append(chunk)
+            blocksize *= 2
+            if pattern is None:
+                # One more newline than lines, since the first line may be
+                # incomplete
+                found += chunk.count(b"\n")
+                if found > nlines:
+                    break
+            else:
+                # Only count matches in lines that are now complete
+                text = chunk + head
+                end = text.find(b"\n") + 1 if pos > 0 else 0
+                found += len(regex.findall(text, end))
+                head = text[:end]
+                if found >= count:
+                    break
+    data = b"".join(reversed(chunks))
+    if pos > 0:
+        data = data[data.find(b"\n") + 1:]
+    if pattern is None:
+        return data.splitlines()[-nlines:] if nlines else []
+    starts = [m.start() for m in regex.finditer(data)]
+    if len(starts) >= count:
+        data = data[starts[-count]:]
+    return data.splitlines()
+
+
+_solver_time_regexes = {
+    "time": re.compile(br"^Time = (\S+)", re.MULTILINE),
+    "delta_t": re.compile(br"^deltaT = (\S+)", re.MULTILINE),
+    "exectime": re.compile(br"^ExecutionTime = (\S+)", re.MULTILINE),
+    "clocktime": re.compile(br"ClockTime = (\S+)", re.MULTILINE)}
+
+
+def get_solver_times(casedir="./", solver=None, log_fpath=None, window=400,
+                     nsteps=None):
     """Read last N lines from file solver log and return t (current Time),
     `deltaT`, and `clockTime`.
+
+    If ``nsteps`` is given, the log is instead read back to the start of the
+    last ``nsteps + 1`` time steps, so at least ``nsteps`` complete time
+    steps are included even if the solver is in the middle of one.
     """
     if log_fpath is None and solver is None:
-        log_fpath = "log." + read_dict("controlDict",
-                                       casedir=casedir)["application"]
+        log_fpath = os.path.join(casedir, "log." + str(
+            _read_controldict(casedir)["application"]))
         if not os.path.isfile(log_fpath):
             log_fpath = glob.glob(os.path.join(casedir, "log.*Foam"))[0]
     elif log_fpath is None and solver is not None:
         log_fpath = os.path.join(casedir, "log." + solver)
-    with open(log_fpath, "rb") as f:
-        BUFSIZ = 1024
-        # True if open() was overridden and file was opened in text
-        # mode. In that case readlines() will return unicode strings
-        # instead of bytes.
-        encoded = getattr(f, "encoding", False)
-        CR = "\n" if encoded else b"\n"
-        data = "" if encoded else b""
-        f.seek(0, os.SEEK_END)
-        fsize = f.tell()
-        block = -1
-        exit = False
-        while not exit:
-            step = (block * BUFSIZ)
-            if abs(step) >= fsize:
-                f.seek(0)
-                newdata = f.read(BUFSIZ - (abs(step) - fsize))
-                exit = True
-            else:
-                f.seek(step, os.SEEK_END)
-                newdata = f.read(BUFSIZ)
-            data = newdata + data
-            if data.count(CR) >= window:
-                break
-            else:
-                block -= 1
-    log = data.splitlines()[-window:]
-    t = []
-    clocktime = []
-    exectime = []
-    deltat = []
-    for entry in log:
-        try:
-            line = entry.split()
-            if line[0] == b"Time":
-                t.append(float(line[-1]))
-            if b"ClockTime" in line:
-                clocktime.append(float(line[-2]))
-            if b"ExecutionTime" in line:
-                exectime.append(float(line[2]))
-            if b"deltaT" in line:
-                deltat.append(float(line[-1]))
-        except:
-            pass
-    return {"time": t, "delta_t": deltat, "exectime": exectime,
-            "clocktime": clocktime}
-
-
-def monitor_progress():
-    """Monitor solver progress."""
-    controldict = read_dict("controlDict")
-    endtime = float(controldict["endTime"])
-    done = False
+    if nsteps is None:
+        lines = tail_lines(log_fpath, nlines=window)
+    else:
+        lines = tail_lines(log_fpath, pattern=br"^Time = ",
+                           count=nsteps + 1)
+    data = b"\n".join(lines)
+    times = {}
+    for key, regex in _solver_time_regexes.items():
+        times[key] = [v for v in map(_float_or_none, regex.findall(data))
+                      if v is not None]
+    return times
+
+
+def monitor_progress(casedir="./", **kwargs):
+    """Monitor solver progress, printing the percentage done, solve rate, and
+    estimated time remaining. Keyword arguments are passed to
+    ``foampy.monitor.ProgressMonitor``.
+    """
+    # Imported here since the monitor module depends on this one
+    from .monitor import ProgressMonitor
+
+    def show(monitor):
+        if monitor.solve_rate is None:
+            return
+        solve_time_left = str(datetime.timedelta(seconds=int(
+            monitor.time_left)))
+        print("\r" + " "*66, end="")
+        print("\r[{}%] - solving at {:0.2f} h/s - {} remaining".format\
+                (int(monitor.fraction_done*100), monitor.solve_rate/3600,
+                 solve_time_left), end="")
+        sys.stdout.flush()
+
     try:
-        while not done:
-            for d in os.listdir("./"):
-                try:
-                    if float(d) == endtime:
-                        done = True
-                except:
-                    pass
-            solver_times = get_solver_times()
-            t = solver_times["time"]
-            deltat = solver_times["delta_t"]
-            exectime = solver_times["exectime"]
-            try:
-                t_per_step = exectime[-1] - exectime[-2]
-                tps2 = exectime[-2] - exectime[-3]
-                t_per_step = (t_per_step + tps2)/2
-            except IndexError:
-                solver_times = get_solver_times(window=2000)
-                t = solver_times["time"]
-                deltat = solver_times["delta_t"]
-                exectime = solver_times["exectime"]
-                t_per_step = exectime[-1] - exectime[-2]
-            try:
-                deltat = deltat[-1]
-            except IndexError:
-                deltat = get_deltat()
-            percent_done = int(t[-1]/endtime*100)
-            time_left, solve_rate = endtime - t[-1], t_per_step/deltat/3600
-            slt = time_left*solve_rate
-            solve_time_left = str(datetime.timedelta(hours=slt))[:-7]
-            print("\r" + " "*66, end="")
-            print("\r[{}%] - solving at {:0.2f} h/s - {} remaining".format\
-                    (percent_done, solve_rate, solve_time_left), end="")
-            time.sleep(1)
+        ProgressMonitor([casedir], **kwargs).run(show)
         print("\nEnd")
     except KeyboardInterrupt:
         print("")
@@ -513,47 +1160,14 @@ def monitor_progress():
 
 def read_log_end(logname, nlines=20):
     """Read last lines from log and return as a list."""
-    window = nlines
-    with open("log."+logname, "rb") as f:
-        BUFSIZ = 1024
-        # True if open() was overridden and file was opened in text
-        # mode. In that case readlines() will return unicode strings
-        # instead of bytes.
-        encoded = getattr(f, 'encoding', False)
-        CR = '\n' if encoded else b'\n'
-        data = '' if encoded else b''
-        f.seek(0, os.SEEK_END)
-        fsize = f.tell()
-        block = -1
-        exit = False
-        while not exit:
-            step = (block * BUFSIZ)
-            if abs(step) >= fsize:
-                f.seek(0)
-                newdata = f.read(BUFSIZ - (abs(step) - fsize))
-                exit = True
-            else:
-                f.seek(step, os.SEEK_END)
-                newdata = f.read(BUFSIZ)
-            data = newdata + data
-            if data.count(CR) >= window:
-                break
-            else:
-                block -= 1
-    log = data.splitlines()[-window:]
-    return [line.decode("utf-8") for line in log]
+    return [line.decode("utf-8") for line in tail_lines("log." + logname,
+                                                         nlines)]
 
 
 def get_n_processors(casedir="./", dictpath="system/decomposeParDict"):
     """Read number of processors from decomposeParDict."""
     dictpath = os.path.join(casedir, dictpath)
-    with open(dictpath) as f:
-        for line in f.readlines():
-            line = line.strip().replace(";", " ")
-            if line:
-                line = line.split()
-                if line[0] == "numberOfSubdomains":
-                    return int(line[1])
+    return int(read_dict_cached(dictpath)["numberOfSubdomains"])
 
 
 def run(appname, tee=False, logname=None, parallel=False, nproc=None, args=[],
@@ -591,6 +1205,17 @@ def run(appname, tee=False, logname=None, parallel=False, nproc=None, args=[],
                                logname=logname), shell=True)
 
 
+def app_argv(appname, nproc=1, args=[]):
+    """Return the command line to run an application as a list of
+    arguments, using ``mpirun`` if ``nproc`` is greater than one.
+    """
+    if isinstance(args, str):
+        args = args.split()
+    if nproc is not None and nproc > 1:
+        return ["mpirun", "-np", str(nproc), appname, "-parallel"] + list(args)
+    return [appname] + list(args)
+
+
 def run_parallel(appname, **kwargs):
     """Run application in parallel."""
     run(appname, parallel=True, **kwargs)
@@ -610,7 +1235,7 @@ def summary(casedir="./", **extra_params):
     s = pandas.Series()
     s["delta_t"] = get_deltat(casedir=casedir)
     s["n_cells"] = get_ncells(casedir=casedir)
-    td = get_solver_times(casedir=casedir)
+    td = get_solver_times(casedir=casedir, nsteps=1)
     s["simulated_time"] = td["time"][-1]
     s["clocktime"] = td["clocktime"][-1]
     s["exectime"] = td["exectime"][-1]
@@ -619,6 +1244,50 @@ def summary(casedir="./", **extra_params):
     return s
 
 
+def _summary_or_error(args):
+    """Summarize a case, capturing any exception as an error message."""
+    casedir, extra_params = args
+    try:
+        s = summary(casedir=casedir, **extra_params)
+        s["error"] = None
+    except Exception as e:
+        s = pandas.Series({"error": "{}: {}".format(type(e).__name__, e)})
+    return s.rename(casedir)
+
+
+def summarize_cases(casedirs, nproc=None, **extra_params):
+    """Summarize many cases in parallel and return as a pandas DataFrame
+    indexed by case directory.
+
+    Parameters
+    ----------
+    casedirs : list
+        Case directories to be summarized.
+    nproc : int
+        Number of worker processes. Defaults to the number of CPUs; if 1,
+        cases are summarized serially in this process.
+    extra_params : dict
+        Extra key/value pairs passed to ``summary`` for every case.
+
+    Cases that fail to be summarized are not fatal: their row has missing
+    values and the exception is recorded in the ``error`` column.
+    """
+    args = [(casedir, extra_params) for casedir in casedirs]
+    if nproc == 1 or len(args) < 2:
+        rows = [_summary_or_error(a) for a in args]
+    else:
+        pool = multiprocessing.Pool(nproc)
+        try:
+            chunksize = max(1, len(args)//(4*(nproc or os.cpu_count() or 1)))
+            rows = pool.map(_summary_or_error, args, chunksize=chunksize)
+        finally:
+            pool.close()
+            pool.join()
+    df = pandas.DataFrame(rows)
+    df.index.name = "casedir"
+    return df
+
+
 def clean(leave_mesh=False, remove_zero=False, extra=[]):
     """Clean case."""
     if not leave_mesh:
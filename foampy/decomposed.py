@@ -0,0 +1,268 @@
+"""Reading fields of decomposed cases from their ``processor*`` directories,
+without running ``reconstructPar``.
+
+The part of a field in each processor directory is mapped to global cells
+with the processor's ``cellProcAddressing``, so the global field is
+assembled in memory. Processor files are read concurrently by a pool of
+worker processes.
+"""
+
+from __future__ import division, print_function, absolute_import
+import os
+import multiprocessing
+import numpy as np
+from .fields import FoamField
+from .mesh import _mesh_file, _skip_comments, processor_dirs
+
+
+def _time_value(name):
+    try:
+        return float(name)
+    except ValueError:
+        return None
+
+
+def read_addressing(procdir, time=None):
+    """Read the global cell index of each cell of a processor from its
+    ``cellProcAddressing``, from ``<time>/polyMesh`` if it exists there,
+    e.g., for changing meshes, otherwise from ``constant/polyMesh``.
+    """
+    meshdirs = [os.path.join(procdir, "constant", "polyMesh")]
+    if time is not None:
+        meshdirs.insert(0, os.path.join(procdir, str(time), "polyMesh"))
+    for meshdir in meshdirs:
+        fpath = _mesh_file(meshdir, "cellProcAddressing")
+        if os.path.isfile(fpath):
+            break
+    else:
+        raise IOError("No cellProcAddressing in {}".format(procdir))
+    field = FoamField(fpath)
+    data = field.read_list(_skip_comments(field._buf, field._header_end),
+                           "label")[0]
+    return np.array(data, dtype=int)
+
+
+def _read_addressing(args):
+    return read_addressing(*args)
+
+
+def _read_part(args):
+    """Read the internal field of one processor, optionally only at local
+    cell indices.
+    """
+    fpath, ncells, local = args
+    field = FoamField(fpath)
+    values = field.internal_field
+    if field.uniform:
+        values = np.broadcast_to(values, (ncells,) + np.shape(values))
+    if local is not None:
+        values = values[local]
+    # Copy out of the memory-mapped file before returning
+    return np.array(values)
+
+
+class DecomposedCase(object):
+    """Object that represents a decomposed case, for reading fields from
+    its processor directories.
+
+    Processor addressing is read when first needed and kept, for each time
+    with its own ``polyMesh`` and for ``constant/polyMesh``. Only internal
+    fields are read.
+
+    Parameters
+    ----------
+    casedir : str
+        Case directory.
+    workers : int
+        Number of worker processes. Defaults to the number of CPUs; if 1,
+        processor files are read serially in this process.
+    """
+    def __init__(self, casedir="./", workers=None):
+        self.casedir = casedir
+        self.workers = workers
+        self.processors = processor_dirs(casedir)
+        if not self.processors:
+            raise IOError("No processor directories in {}".format(casedir))
+        self._addressing = {}
+        self._owners = {}
+
+    @property
+    def times(self):
+        """Time directory names of the first processor, sorted by value."""
+        procdir = self.processors[0]
+        names = [name for name in os.listdir(procdir)
+                 if _time_value(name) is not None
+                 and os.path.isdir(os.path.join(procdir, name))]
+        return sorted(names, key=_time_value)
+
+    def time_dir(self, time):
+        """Find the name of the time directory for a time name or value."""
+        names = self.times
+        if str(time) in names:
+            return str(time)
+        for name in names:
+            if np.isclose(_time_value(name), float(time)):
+                return name
+        raise ValueError("No time {} in {}".format(time,
+                                                   self.processors[0]))
+
+    def _map(self, func, args):
+        workers = self.workers or multiprocessing.cpu_count()
+        if workers == 1 or len(args) < 2:
+            return [func(a) for a in args]
+        pool = multiprocessing.Pool(workers)
+        try:
+            return pool.map(func, args)
+        finally:
+            pool.close()
+            pool.join()
+
+    def _mesh_time(self, time):
+        """Return ``time`` if it has its own processor addressing, e.g., for
+        changing meshes, otherwise ``None`` for ``constant/polyMesh``.
+        """
+        if time is not None:
+            meshdir = os.path.join(self.processors[0], time, "polyMesh")
+            if os.path.isfile(_mesh_file(meshdir, "cellProcAddressing")):
+                return time
+        return None
+
+    def get_addressing(self, time=None):
+        """Return a list of arrays of the global cell indices of each
+        processor's cells, for the mesh at a time directory name, or in
+        ``constant/polyMesh`` if ``None``.
+        """
+        key = self._mesh_time(time)
+        if key not in self._addressing:
+            self._addressing[key] = self._map(
+                _read_addressing, [(d, key) for d in self.processors])
+        return self._addressing[key]
+
+    @property
+    def addressing(self):
+        """Processor addressing in ``constant/polyMesh``. See
+        ``get_addressing``.
+        """
+        return self.get_addressing()
+
+    @property
+    def ncells(self):
+        """Number of cells of the global mesh in ``constant/polyMesh``."""
+        return sum(len(a) for a in self.addressing)
+
+    def _owners_local(self, time=None):
+        """Return the processor number and local index of each global
+        cell.
+        """
+        key = self._mesh_time(time)
+        if key not in self._owners:
+            addressing = self.get_addressing(key)
+            ncells = sum(len(a) for a in addressing)
+            owners = np.empty(ncells, dtype=int)
+            local = np.empty(ncells, dtype=int)
+            for n, a in enumerate(addressing):
+                owners[a] = n
+                local[a] = np.arange(len(a))
+            self._owners[key] = owners, local
+        return self._owners[key]
+
+    @property
+    def owners(self):
+        """Processor number of each global cell."""
+        return self._owners_local()[0]
+
+    def cells(self, processors=None, time=None):
+        """Return the sorted global cell indices of a list of processor
+        numbers, or of all cells.
+        """
+        addressing = self.get_addressing(time)
+        if processors is None:
+            return np.arange(sum(len(a) for a in addressing))
+        return np.sort(np.concatenate([addressing[n] for n in processors]))
+
+    def _plan(self, processors, cells, time=None):
+        """Find the processors to read, the local cells to read from each,
+        and the positions of their values in the output.
+        """
+        addressing = self.get_addressing(time)
+        if cells is None:
+            if processors is None:
+                processors = range(len(self.processors))
+                positions = [addressing[n] for n in processors]
+                cells = self.cells(time=time)
+            else:
+                cells = self.cells(processors, time)
+                positions = [np.searchsorted(cells, addressing[n])
+                             for n in processors]
+            return cells, [(n, None, p) for n, p in zip(processors,
+                                                        positions)]
+        cells = np.asarray(cells, dtype=int)
+        owners, local = self._owners_local(time)
+        owners = owners[cells]
+        if processors is not None:
+            missing = ~np.isin(owners, list(processors))
+            if missing.any():
+                raise ValueError("Cell {} is not in the processors".format(
+                    cells[missing][0]))
+        parts = []
+        for n in np.unique(owners):
+            positions = np.flatnonzero(owners == n)
+            parts.append((n, local[cells[positions]], positions))
+        return cells, parts
+
+    def read_fields(self, names, time, processors=None, cells=None):
+        """Read and assemble the internal fields of a list of names at one
+        time, with one pass of the worker pool.
+
+        Parameters
+        ----------
+        names : list
+            Field names, e.g., ``["U", "p"]``.
+        time : str or float
+            Time directory name or value.
+        processors : list
+            Processor numbers to read. Defaults to all.
+        cells : array_like
+            Global cell indices to read. Only the processors owning them
+            are read.
+
+        Returns
+        -------
+        dict
+            Arrays with shape ``(n,)`` or ``(n, ncomponents)`` keyed by
+            field name, with one row for each of ``cells``, or, if not
+            given, for each cell of ``processors`` in order of global cell
+            index.
+        """
+        time = self.time_dir(time)
+        cells, parts = self._plan(processors, cells, time)
+        addressing = self.get_addressing(time)
+        args = [(os.path.join(self.processors[n], time, name),
+                 len(addressing[n]), local)
+                for name in names for n, local, _ in parts]
+        results = self._map(_read_part, args)
+        fields = {}
+        for i, name in enumerate(names):
+            values = results[i*len(parts):(i + 1)*len(parts)]
+            shape = (len(cells),) + values[0].shape[1:] if values else (0,)
+            dtype = values[0].dtype if values else float
+            out = np.empty(shape, dtype=dtype)
+            for (_, _, positions), part in zip(parts, values):
+                out[positions] = part
+            fields[name] = out
+        return fields
+
+    def read_field(self, name, time, processors=None, cells=None):
+        """Read and assemble the internal field of ``name`` at one time.
+        See ``read_fields``.
+        """
+        return self.read_fields([name], time, processors, cells)[name]
+
+
+def load_decomposed_field(casedir="./", time=0, name="U", processors=None,
+                          cells=None, workers=None):
+    """Load the internal field values of a decomposed case, assembled into
+    global cell order. See ``DecomposedCase.read_fields``.
+    """
+    case = DecomposedCase(casedir, workers=workers)
+    return case.read_field(name, time, processors, cells)
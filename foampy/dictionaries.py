@@ -2,6 +2,14 @@
 
 from __future__ import division, print_function
 import os
+import re
+import copy
+import textwrap
+import tempfile
+import threading
+import multiprocessing
+import numpy as np
+from .types import FoamSubDict, FoamList, FoamArray
 
 
 system_dicts = ["controlDict", "snappyHexMeshDict", "fvSchemes", "fvSolution",
@@ -40,6 +48,34 @@ FoamFile
     return txt
 
 
+# Read once, since setting the umask to read it is not thread-safe
+_umask = os.umask(0)
+os.umask(_umask)
+
+
+def write_atomic(fpath, txt):
+    """Write text to a file through a temporary file in the same directory
+    that then replaces it, so readers see either the old or new contents.
+    """
+    dirname = os.path.dirname(os.path.abspath(fpath))
+    fd, tmp = tempfile.mkstemp(dir=dirname, prefix=".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(txt)
+        if os.path.isfile(fpath):
+            mode = os.stat(fpath).st_mode & 0o777
+        else:
+            mode = 0o666 & ~_umask
+        os.chmod(tmp, mode)
+        os.replace(tmp, fpath)
+    except Exception:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
 def replace_value(dictpath, keyword, newvalue):
     """Replace a value in a dictionary."""
     newvalue = str(newvalue)
@@ -47,6 +83,7 @@ def replace_value(dictpath, keyword, newvalue):
         in_block = False
         lines = f.readlines()
         single_line = True
+        nstart = None
         for n in range(len(lines)):
             sl = lines[n].split()
             if len(sl) > 0 and sl[0] == keyword:
@@ -57,15 +94,15 @@ def replace_value(dictpath, keyword, newvalue):
             if ";" in lines[n] and in_block:
                 in_block = False
                 nend = n
+    if nstart is None:
+        raise KeyError("{} not found in {}".format(keyword, dictpath))
     if single_line:
         oldvalue = lines[nstart].replace(";", "").split()[1]
         newvalue = lines[nstart].replace(oldvalue, newvalue)
         new_text = lines[:nstart] + [newvalue] + lines[nstart+1:]
     else:
         new_text = lines[:nstart] + [newvalue] + lines[nend+1:]
-    with open(dictpath, "w") as f:
-        for line in new_text:
-            f.write(line)
+    write_atomic(dictpath, "".join(new_text))
 
 
 def read_text(dictpath, keyword):
@@ -90,16 +127,570 @@ def read_single_line_value(dictname=None, dictpath=None, keyword="",
                            dtype=float, casedir="./"):
     """Read value from a dictionary that appears on a single line."""
     if dictpath is None and dictname is not None:
-        if dictname in system_dicts:
-            dictpath = os.path.join(casedir, "system", dictname)
-        elif dictname in constant_dicts:
-            dictpath = os.path.join(casedir, "constant", dictname)
+        dictpath = dictpath_from_name(dictname, casedir)
     elif dictpath is None and dictname is None:
         raise ValueError("Neither dictionary name nor dictionary path supplied")
+    val = lookup_keyword(read_dict_cached(dictpath), keyword)
+    if val is not None:
+        return dtype(val)
+
+
+_token_regex = re.compile(r"""
+    (?P<space>\s+)
+  | (?P<comment>//[^\n]*|/\*.*?\*/)
+  | (?P<verbatim>\#\{.*?\#\})
+  | (?P<string>"(?:[^"\\]|\\.)*")
+  | (?P<directive>\#[A-Za-z]+)
+  | (?P<word>\$\{[^{}\s;]*\})
+  | (?P<punct>[{}();])
+""", re.VERBOSE | re.DOTALL)
+_word_regex = re.compile(r'[^\s{}();"]+')
+_int_regex = re.compile(r"[-+]?\d+$")
+_float_regex = re.compile(r"[-+]?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?$")
+_include_directives = ["#include", "#includeIfPresent", "#sinclude"]
+
+
+def _case_dir(fpath):
+    """Find the case directory of a dictionary file, the parent of the
+    ``system`` or ``constant`` directory it is in, or ``None``.
+    """
+    dirname = os.path.dirname(os.path.abspath(fpath))
+    while True:
+        parent, name = os.path.split(dirname)
+        if name in ("system", "constant"):
+            return parent
+        if parent == dirname:
+            return None
+        dirname = parent
+
+
+def _word_end(text, pos):
+    """Find the end of a word token starting at ``pos``. Words may contain
+    balanced parentheses, e.g., ``div(phi,U)``, but a run of digits directly
+    followed by ``(`` is the size prefix of a list.
+    """
+    n = len(text)
+    end = pos
+    while True:
+        m = _word_regex.match(text, end)
+        if m:
+            end = m.end()
+        if end == pos or end >= n or text[end] != "(" \
+                or text[pos:end].isdigit():
+            return end
+        depth = 0
+        for i in range(end, n):
+            c = text[i]
+            if c == "(":
+                depth += 1
+            elif c == ")":
+                depth -= 1
+                if depth == 0:
+                    break
+            elif c.isspace() or c in ';{}"':
+                return end
+        else:
+            return end
+        end = i + 1
+
+
+def tokenize_dict(text):
+    """Split OpenFOAM dictionary text into a list of ``(kind, text, start,
+    end)`` tokens, dropping whitespace and comments.
+    """
+    tokens = []
+    pos = 0
+    n = len(text)
+    match = _token_regex.match
+    while pos < n:
+        m = match(text, pos)
+        if m is None:
+            end = _word_end(text, pos)
+            if end == pos:
+                raise ValueError("Unexpected character {!r} at position "
+                                 "{}".format(text[pos], pos))
+            tokens.append(("word", text[pos:end], pos, end))
+            pos = end
+            continue
+        kind = m.lastgroup
+        if kind == "punct":
+            tokens.append((m.group(), m.group(), pos, m.end()))
+        elif kind not in ("space", "comment"):
+            tokens.append((kind, m.group(), pos, m.end()))
+        pos = m.end()
+    return tokens
+
+
+def _dedent_value(txt):
+    """Remove the common indentation of the lines after the first of a
+    multi-line value, which is indented again when written, so values keep
+    their layout when read and written repeatedly.
+    """
+    first, sep, rest = txt.partition("\n")
+    if not sep:
+        return txt
+    return first + sep + textwrap.dedent(rest)
+
+
+def _convert(word):
+    """Convert a word token to an ``int`` or ``float`` if it is numeric."""
+    if _int_regex.match(word):
+        return int(word)
+    elif _float_regex.match(word):
+        return float(word)
+    return word
+
+
+class _DictParser(object):
+    """Recursive-descent parser building a tree of ``FoamSubDict`` and
+    ``FoamList`` objects from a list of tokens in a single pass.
+    """
+    def __init__(self, text, fpath=None, scopes=None, included=None):
+        self.text = text
+        self.fpath = fpath
+        self.tokens = tokenize_dict(text)
+        self.pos = 0
+        self.scopes = scopes if scopes is not None else []
+        self.included = included if included is not None else []
+
+    def peek(self, offset=0):
+        try:
+            return self.tokens[self.pos + offset]
+        except IndexError:
+            return None
+
+    def next(self):
+        tok = self.peek()
+        self.pos += 1
+        return tok
+
+    def parse_entries(self, target, closing=None):
+        """Parse entries into ``target`` until ``closing`` or the end."""
+        self.scopes.append(target)
+        try:
+            while True:
+                tok = self.next()
+                if tok is None or tok[0] == closing:
+                    return target
+                kind, value = tok[:2]
+                if kind == ";":
+                    continue
+                elif kind == "directive":
+                    self.parse_directive(target, tok)
+                elif kind in ("word", "string"):
+                    self.parse_entry(target, value)
+                else:
+                    raise ValueError("Unexpected {!r} at position "
+                                     "{}".format(value, tok[2]))
+        finally:
+            self.scopes.pop()
+
+    def parse_entry(self, target, key):
+        tok = self.peek()
+        if tok is not None and tok[0] == "{":
+            self.next()
+            target[key] = self.parse_entries(FoamSubDict(name=key), "}")
+        elif key.startswith("$") and tok is not None and tok[0] == ";":
+            # Merge the entries of another dictionary
+            self.next()
+            val = self.lookup(key)
+            if isinstance(val, dict):
+                for k, v in val.items():
+                    target[k] = copy.deepcopy(v)
+        else:
+            target[key] = self.parse_value()
+
+    def parse_value(self):
+        """Parse tokens up to the terminating ``;``."""
+        items = []
+        start = end = None
+        while True:
+            tok = self.peek()
+            if tok is None or tok[0] == "}":
+                break
+            if tok[0] == ";":
+                self.next()
+                break
+            if start is None:
+                start = tok[2]
+            item = self.parse_item()
+            if item is not _skip:
+                items.append(item)
+            end = self.tokens[self.pos - 1][3]
+        if not items:
+            return ""
+        elif len(items) == 1:
+            return items[0]
+        return _dedent_value(self.text[start:end])
+
+    def parse_item(self):
+        kind, value, start, end = self.next()
+        if kind == "(":
+            return self.parse_list()
+        elif kind == "{":
+            return self.parse_entries(FoamSubDict(), "}")
+        elif kind == "word":
+            nxt = self.peek()
+            if value.isdigit() and nxt is not None and nxt[0] == "(" \
+                    and nxt[2] == end:
+                # Size prefix of a list, e.g., 3(0 1 2)
+                return _skip
+            if value.startswith("$"):
+                val = self.lookup(value)
+                if val is not None:
+                    return copy.deepcopy(val)
+            return _convert(value)
+        elif kind == "verbatim":
+            return _dedent_value(value)
+        return value
+
+    def parse_list(self):
+        items = FoamList()
+        while True:
+            tok = self.peek()
+            if tok is None:
+                raise ValueError("Unterminated list")
+            if tok[0] == ")":
+                self.next()
+                return items
+            nxt = self.peek(1)
+            if tok[0] in ("word", "string") and nxt is not None \
+                    and nxt[0] == "{":
+                # Named dictionary inside a list
+                self.pos += 2
+                items.append(self.parse_entries(FoamSubDict(name=tok[1]),
+                                                "}"))
+                continue
+            item = self.parse_item()
+            if item is not _skip:
+                items.append(item)
+
+    def parse_directive(self, target, tok):
+        directive = tok[1]
+        if directive in _include_directives:
+            arg = self.next()
+            if arg is None or arg[0] not in ("word", "string"):
+                raise ValueError("Expected a file name after {} at position "
+                                 "{}".format(directive, tok[2]))
+            fname = arg[1].strip('"')
+            casedir = _case_dir(self.fpath) if self.fpath else None
+            if casedir is not None:
+                # $FOAM_CASE is set by OpenFOAM applications, but usually
+                # not in the environment of Python scripts
+                fname = re.sub(r"\$(FOAM_CASE\b|\{FOAM_CASE\})",
+                               lambda m: casedir.replace("\\", "/"), fname)
+            fname = os.path.expandvars(fname)
+            if self.fpath is not None and not os.path.isabs(fname):
+                fname = os.path.join(os.path.dirname(self.fpath), fname)
+            if os.path.isfile(fname):
+                self.included.append(fname)
+                with open(fname) as f:
+                    parser = _DictParser(f.read(), fpath=fname,
+                                         scopes=self.scopes[:-1],
+                                         included=self.included)
+                parser.parse_entries(target)
+            elif directive == "#include":
+                raise IOError("Included file {} not found".format(fname))
+            else:
+                # Kept as a dependency, so creating the file later changes
+                # the parsed result
+                self.included.append(fname)
+        else:
+            # Other directives, e.g., #inputMode or #includeFunc, take
+            # arguments on the same line and are ignored
+            line_end = self.text.find("\n", tok[3])
+            if line_end < 0:
+                line_end = len(self.text)
+            while self.peek() is not None and self.peek()[2] < line_end:
+                self.next()
+
+    def lookup(self, macro):
+        """Resolve a ``$name``, ``$name.sub``, or ``$:top.sub`` macro."""
+        name = macro[1:].strip("{}")
+        if name.startswith(":"):
+            scopes = self.scopes[:1]
+            name = name[1:]
+        else:
+            scopes = self.scopes[::-1]
+        for scope in scopes:
+            if name in scope:
+                return scope[name]
+            val = scope
+            for part in re.split(r"[./]", name):
+                if not isinstance(val, dict) or part not in val:
+                    break
+                val = val[part]
+            else:
+                return val
+        return None
+
+
+_skip = object()
+
+
+def parse_dict(text, fpath=None):
+    """Parse the text of an OpenFOAM dictionary into a ``FoamSubDict`` tree.
+
+    Sub-dictionaries become ``FoamSubDict`` objects and lists become
+    ``FoamList`` objects. Single numeric values are converted to ``int`` or
+    ``float``, other single words and quoted strings are kept as ``str``,
+    and values made up of several tokens, e.g., ``Gauss linear``, are kept as
+    their source text. ``#include`` directives are resolved relative to
+    ``fpath`` and ``$macro`` references are expanded.
+    """
+    return _DictParser(text, fpath=fpath).parse_entries(FoamSubDict())
+
+
+def parse_dict_file(dictpath):
+    """Read and parse an OpenFOAM dictionary file."""
     with open(dictpath) as f:
-        for line in f.readlines():
-            line = line.strip()
-            if ";" in line:
-                ls = line.replace(";", " ").split()
-                if ls[0] == keyword:
-                    return dtype(ls[1])
+        return parse_dict(f.read(), fpath=dictpath)
+
+
+_dict_cache = {}
+_dict_cache_lock = threading.Lock()
+_dict_cache_stats = {"hits": 0, "misses": 0}
+
+
+def _file_state(fpath):
+    try:
+        stat = os.stat(fpath)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def read_dict_cached(dictpath):
+    """Return the parsed tree of a dictionary file from a process-wide cache.
+
+    Cache entries are keyed on the absolute path and are reparsed only when
+    the modification time or size of the file, or of any file it includes,
+    changes, or when an ``#includeIfPresent`` file that was missing is
+    created. The returned tree is shared between callers and must not be
+    modified; ``core.read_dict`` returns a copy that may be.
+    """
+    key = os.path.abspath(dictpath)
+    with _dict_cache_lock:
+        entry = _dict_cache.get(key)
+    if entry is not None:
+        states, tree = entry
+        if all(_file_state(f) == state for f, state in states):
+            with _dict_cache_lock:
+                _dict_cache_stats["hits"] += 1
+            return tree
+    with _dict_cache_lock:
+        _dict_cache_stats["misses"] += 1
+    state = _file_state(key)
+    with open(key) as f:
+        parser = _DictParser(f.read(), fpath=key)
+    tree = parser.parse_entries(FoamSubDict())
+    states = [(key, state)] + [(f, _file_state(f)) for f in parser.included]
+    with _dict_cache_lock:
+        _dict_cache[key] = (states, tree)
+    return tree
+
+
+def dict_cache_info():
+    """Return a dict of cache ``hits``, ``misses``, and current ``size``."""
+    with _dict_cache_lock:
+        return dict(_dict_cache_stats, size=len(_dict_cache))
+
+
+def clear_dict_cache():
+    """Clear the parsed dictionary cache and reset its counters."""
+    with _dict_cache_lock:
+        _dict_cache.clear()
+        _dict_cache_stats["hits"] = 0
+        _dict_cache_stats["misses"] = 0
+
+
+def lookup_keyword(tree, keyword):
+    """Look up a keyword in a parsed dictionary tree.
+
+    ``keyword`` may be a path to a nested entry, e.g., ``"PISO.nCorrectors"``.
+    Otherwise, if it is not a top-level entry, the first matching entry in
+    any sub-dictionary is returned. Returns ``None`` if not found.
+    """
+    if keyword in tree:
+        return tree[keyword]
+    val = tree
+    for part in keyword.split("."):
+        if not isinstance(val, dict) or part not in val:
+            break
+        val = val[part]
+    else:
+        return val
+    for val in tree.values():
+        if isinstance(val, dict):
+            found = lookup_keyword(val, keyword)
+            if found is not None:
+                return found
+    return None
+
+
+def dictpath_from_name(dictname, casedir="./"):
+    """Find the path of a standard dictionary in a case directory."""
+    if dictname in system_dicts:
+        return os.path.join(casedir, "system", dictname)
+    elif dictname in constant_dicts:
+        return os.path.join(casedir, "constant", dictname)
+    raise ValueError("Unknown dictionary {}".format(dictname))
+
+
+def format_value(val):
+    """Convert a Python value to the text of an OpenFOAM entry value."""
+    if isinstance(val, bool):
+        return str(val).lower()
+    if isinstance(val, (FoamList, FoamArray)):
+        return str(val)
+    if isinstance(val, dict):
+        # Format an unnamed copy, leaving the name of the caller's dict
+        sub = FoamSubDict()
+        sub.update(val)
+        return str(sub).lstrip()
+    if isinstance(val, (list, tuple)):
+        return "(" + " ".join(format_value(v) for v in val) + ")"
+    if isinstance(val, np.ndarray) and val.dtype.kind in "iuf":
+        return str(FoamArray(val))
+    if hasattr(val, "tolist"):
+        return format_value(val.tolist())
+    return str(val)
+
+
+def _value_spans(text, paths):
+    """Find the text spans of the values of entries given by dotted
+    ``paths`` in one pass over the tokens of a dictionary.
+
+    Returns a dict of paths and ``(start, end)`` spans. Sub-dictionary
+    values span their braces.
+    """
+    tokens = tokenize_dict(text)
+    spans = {}
+    scope = []
+    n = len(tokens)
+    i = 0
+    while i < n:
+        kind = tokens[i][0]
+        if kind == "}":
+            if scope:
+                scope.pop()
+            i += 1
+            continue
+        if kind == "directive":
+            i += 2
+            continue
+        if kind not in ("word", "string"):
+            i += 1
+            continue
+        path = ".".join(scope + [tokens[i][1]])
+        if i + 1 < n and tokens[i + 1][0] == "{":
+            if path not in paths:
+                scope.append(tokens[i][1])
+                i += 2
+                continue
+        # Find the end of the value at the same nesting level
+        depth = 0
+        j = i + 1
+        while j < n:
+            k = tokens[j][0]
+            if k in ("(", "{"):
+                depth += 1
+            elif k in (")", "}"):
+                depth -= 1
+                if depth == 0 and k == "}" and tokens[i + 1][0] == "{":
+                    j += 1
+                    break
+                if depth < 0:
+                    break
+            elif k == ";" and depth == 0:
+                break
+            j += 1
+        if path in paths:
+            if j > i + 1:
+                spans[path] = (tokens[i + 1][2], tokens[j - 1][3])
+            else:
+                # Empty value
+                spans[path] = (tokens[i][3], tokens[i][3])
+        i = j + 1 if j < n and tokens[j][0] == ";" else j
+    return spans
+
+
+def replace_values(dictpath, values):
+    """Replace the values of many entries in a dictionary file in one pass.
+
+    Parameters
+    ----------
+    dictpath : str
+        Path to the dictionary file.
+    values : dict
+        New values keyed by entry, where nested entries are given as dotted
+        paths, e.g., ``{"PISO.nCorrectors": 2, "deltaT": 1e-4}``. Values
+        are converted with ``format_value``.
+
+    Formatting and comments outside the replaced values are kept, and the
+    file is written atomically. Raises ``KeyError`` if any entry is not
+    found, in which case the file is not changed. A sub-dictionary replaced
+    with a value that is not a dict becomes an entry ending in ``;``.
+    """
+    with open(dictpath) as f:
+        text = f.read()
+    spans = _value_spans(text, set(values))
+    missing = [path for path in values if path not in spans]
+    if missing:
+        raise KeyError("{} not found in {}".format(", ".join(missing),
+                                                   dictpath))
+    write_atomic(dictpath, _splice_values(text, spans, values))
+
+
+def _splice_values(text, spans, values):
+    """Replace the text spans from ``_value_spans`` with formatted values."""
+    pieces = []
+    pos = 0
+    for path, (start, end) in sorted(spans.items(), key=lambda s: s[1]):
+        newvalue = format_value(values[path])
+        if start == end:
+            newvalue = " " + newvalue
+        elif text[start] == "{" and not isinstance(values[path], dict):
+            # The span of a sub-dictionary has no terminating semicolon
+            newvalue += ";"
+        pieces.append(text[pos:start])
+        pieces.append(newvalue)
+        pos = end
+    pieces.append(text[pos:])
+    return "".join(pieces)
+
+
+def _replace_values_case(args):
+    casedir, dictname, values = args
+    replace_values(dictpath_from_name(dictname, casedir), values)
+
+
+def replace_values_cases(casedirs, dictname, values, nproc=None):
+    """Replace values in the same dictionary of many cases in parallel.
+
+    Parameters
+    ----------
+    casedirs : list
+        Case directories.
+    dictname : str
+        Dictionary name, e.g., ``"controlDict"``.
+    values : dict or list
+        Values passed to ``replace_values``, either the same for all cases
+        or a list with one dict per case.
+    nproc : int
+        Number of worker processes. Defaults to the number of CPUs; if 1,
+        cases are edited serially in this process.
+    """
+    if isinstance(values, dict):
+        values = [values]*len(casedirs)
+    args = list(zip(casedirs, [dictname]*len(casedirs), values))
+    if nproc == 1 or len(args) < 2:
+        for a in args:
+            _replace_values_case(a)
+        return
+    pool = multiprocessing.Pool(nproc)
+    try:
+        pool.map(_replace_values_case, args)
+    finally:
+        pool.close()
+        pool.join()
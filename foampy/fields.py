@@ -0,0 +1,239 @@
+"""Reading OpenFOAM field files, e.g., ``0/U`` or ``<time>/p``, into NumPy
+arrays.
+"""
+
+from __future__ import division, print_function, absolute_import
+import os
+import io
+import re
+import gzip
+import mmap
+import numpy as np
+import pandas
+from .dictionaries import parse_dict
+from .types import FoamSubDict
+
+
+n_components = {"scalar": 1, "vector": 3, "symmTensor": 6, "tensor": 9,
+                "sphericalTensor": 1, "label": 1}
+
+_foamfile_regex = re.compile(br"FoamFile\s*\{(.*?)\}", re.DOTALL)
+_dimensions_regex = re.compile(br"^\s*dimensions\s+(\[[^\]]*\])\s*;",
+                               re.MULTILINE)
+_internal_regex = re.compile(br"^\s*internalField\s+(uniform|nonuniform)\b",
+                             re.MULTILINE)
+_boundary_regex = re.compile(br"^\s*boundaryField\b", re.MULTILINE)
+_list_regex = re.compile(br"\s*(?:List<(\w+)>)?\s*(\d+)\s*\(")
+_nonuniform_regex = re.compile(br"\bnonuniform\b")
+_list_end_regex = re.compile(br"\)\s*;")
+_paren_table = bytes.maketrans(b"()", b"  ")
+
+
+def _map_file(fpath):
+    """Memory-map a file, or read it into memory if it is compressed."""
+    if fpath.endswith(".gz"):
+        with gzip.open(fpath, "rb") as f:
+            return f.read()
+    with open(fpath, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return b""
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _parse_flat(data):
+    """Parse ASCII numbers, ignoring parentheses, into a flat array."""
+    return np.fromstring(data.translate(_paren_table), sep=" ")
+
+
+def _parse_ascii_list(data, n, ncomp):
+    """Parse the body of an ASCII list of ``n`` values with ``ncomp``
+    components each into a flat array.
+
+    OpenFOAM writes one value per line with single spaces, which the pandas C
+    parser reads about twice as fast as ``np.fromstring``. Anything else falls
+    back to ``np.fromstring``.
+    """
+    data = data.translate(None, b"()")
+    try:
+        values = pandas.read_csv(io.BytesIO(data), sep=" ", header=None,
+                                 dtype=np.float64, engine="c",
+                                 float_precision="high").values
+        if values.shape == (n, ncomp):
+            return values.ravel()
+    except (ValueError, pandas.errors.EmptyDataError):
+        pass
+    return np.fromstring(data, sep=" ")
+
+
+class FoamField(object):
+    """Object that represents an OpenFOAM field file.
+
+    The header is parsed on construction. The internal field and boundary
+    field are read when first accessed. Binary lists are returned as
+    read-only views into the memory-mapped file, without copying.
+
+    Parameters
+    ----------
+    fpath : str
+        Path to the field file. If it does not exist but a ``.gz`` version
+        does, that is read instead.
+    """
+    def __init__(self, fpath):
+        if not os.path.isfile(fpath) and os.path.isfile(fpath + ".gz"):
+            fpath += ".gz"
+        self.fpath = fpath
+        self._buf = _map_file(fpath)
+        m = _foamfile_regex.search(self._buf, 0, 65536)
+        if m is None:
+            raise ValueError("No FoamFile header in {}".format(fpath))
+        self.foamfile = parse_dict(m.group(1).decode())
+        self.foamfile.name = "FoamFile"
+        self.format = self.foamfile.get("format", "ascii")
+        self.fieldclass = self.foamfile.get("class", "")
+        arch = str(self.foamfile.get("arch", "LSB;label=32;scalar=64"))
+        arch = arch.strip('"')
+        self.byteorder = ">" if "MSB" in arch else "<"
+        sizes = dict(re.findall(r"(label|scalar)=(\d+)", arch))
+        self.label_size = int(sizes.get("label", 32))//8
+        self.scalar_size = int(sizes.get("scalar", 64))//8
+        self._header_end = m.end()
+        m = _dimensions_regex.search(self._buf, self._header_end)
+        self.dimensions = m.group(1).decode() if m else None
+        self._internal_field = None
+        self._boundary_field = None
+        self._internal_end = None
+        self._uniform = None
+
+    @property
+    def value_type(self):
+        """Value type inferred from the field class, e.g., ``"vector"``."""
+        for t in ["SphericalTensor", "SymmTensor", "Tensor", "Vector",
+                  "Scalar", "Label"]:
+            if t in self.fieldclass:
+                return t[0].lower() + t[1:]
+        return "scalar"
+
+    def _dtype(self, value_type):
+        if value_type == "label":
+            return np.dtype("{}i{}".format(self.byteorder, self.label_size))
+        return np.dtype("{}f{}".format(self.byteorder, self.scalar_size))
+
+    def read_list(self, pos, value_type=None):
+        """Read a list such as ``List<vector> N (...)`` starting at byte
+        ``pos``, returning the array and the position after the list.
+        """
+        m = _list_regex.match(self._buf, pos)
+        if m is None:
+            raise ValueError("Expected a list at byte {} of {}".format(
+                pos, self.fpath))
+        if m.group(1):
+            value_type = m.group(1).decode()
+        elif value_type is None:
+            value_type = self.value_type
+        n = int(m.group(2))
+        ncomp = n_components.get(value_type, 1)
+        dtype = self._dtype(value_type)
+        start = m.end()
+        if self.format == "binary":
+            count = n*ncomp
+            data = np.frombuffer(self._buf, dtype=dtype, count=count,
+                                 offset=start)
+            end = start + count*dtype.itemsize + 1
+        else:
+            m = _list_end_regex.search(self._buf, start)
+            end = m.start() + 1 if m else len(self._buf)
+            data = _parse_ascii_list(bytes(self._buf[start:end - 1]), n,
+                                     ncomp)
+            data = data.astype(dtype.newbyteorder("="), copy=False)
+        if ncomp > 1:
+            data = data.reshape(n, ncomp)
+        return data, end
+
+    def _read_internal_field(self):
+        m = _internal_regex.search(self._buf, self._header_end)
+        if m is None:
+            raise ValueError("No internalField in {}".format(self.fpath))
+        self._uniform = m.group(1) == b"uniform"
+        if self._uniform:
+            end = self._buf.find(b";", m.end())
+            value = _parse_flat(bytes(self._buf[m.end():end]))
+            self._internal_end = end + 1
+            return value[0] if value.size == 1 else value
+        data, self._internal_end = self.read_list(m.end())
+        return data
+
+    @property
+    def internal_field(self):
+        """Internal field values as an array with shape ``(ncells,)`` or
+        ``(ncells, ncomponents)``. For uniform fields, the single value is
+        returned.
+        """
+        if self._internal_field is None:
+            self._internal_field = self._read_internal_field()
+        return self._internal_field
+
+    @property
+    def uniform(self):
+        """``True`` if the internal field is uniform."""
+        self.internal_field
+        return self._uniform
+
+    def _read_boundary_field(self):
+        self.internal_field
+        m = _boundary_regex.search(self._buf, self._internal_end)
+        if m is None:
+            return FoamSubDict(name="boundaryField")
+        # Replace nonuniform lists, which may be binary, with placeholders
+        # before parsing the rest as a dictionary
+        pieces = []
+        arrays = {}
+        pos = m.start()
+        while True:
+            m = _nonuniform_regex.search(self._buf, pos)
+            if m is None:
+                pieces.append(bytes(self._buf[pos:]))
+                break
+            pieces.append(bytes(self._buf[pos:m.start()]))
+            data, pos = self.read_list(m.end())
+            key = "__foampy_list_{}__".format(len(arrays))
+            arrays[key] = data
+            pieces.append(key.encode())
+        txt = b"".join(pieces).decode("utf-8", "replace")
+        tree = parse_dict(txt, fpath=self.fpath).get("boundaryField",
+                                                     FoamSubDict())
+        tree.name = "boundaryField"
+        _substitute(tree, arrays)
+        return tree
+
+    @property
+    def boundary_field(self):
+        """Boundary field as a ``FoamSubDict`` of patches, read on first
+        access. Nonuniform values are NumPy arrays.
+        """
+        if self._boundary_field is None:
+            self._boundary_field = self._read_boundary_field()
+        return self._boundary_field
+
+
+def _substitute(tree, arrays):
+    """Replace list placeholders in a parsed tree with arrays in place."""
+    for key, val in tree.items():
+        if isinstance(val, dict):
+            _substitute(val, arrays)
+        elif isinstance(val, str) and "__foampy_list_" in val:
+            tree[key] = arrays[val.split()[-1]]
+
+
+def load_field(casedir="./", time=0, name="U"):
+    """Load the internal field values of a field in a time directory.
+
+    Returns an array with shape ``(ncells,)`` for scalars or ``(ncells,
+    ncomponents)`` otherwise. If the field is only in the processor
+    directories of a decomposed case, it is assembled from them.
+    """
+    fpath = os.path.join(casedir, str(time), name)
+    if not os.path.isfile(fpath) and not os.path.isfile(fpath + ".gz") \
+            and os.path.isdir(os.path.join(casedir, "processor0")):
+        from .decomposed import load_decomposed_field
+        return load_decomposed_field(casedir, time, name)
+    return FoamField(fpath).internal_field
@@ -3,9 +3,121 @@ Module for working with foil data.
 """
 from __future__ import division, print_function
 import os
+import re
 import numpy as np
 
 
+_reynolds_regex = re.compile(r"^\s*Re(?:ynolds number)?\s*[:=]\s*(\S+)",
+                             re.MULTILINE | re.IGNORECASE)
+_text_regex = re.compile(r"[^-+.\deE\s]")
+_number_table = dict.fromkeys(map(ord, "-+.0123456789eE \t\n\r\f\v"))
+_paren_table = {ord("("): None, ord(")"): None}
+_data_table = {ord("("): None, ord(")"): None, ord(","): " "}
+
+
+def _is_data_line(line):
+    """Check if a line, with parentheses removed and commas replaced, has at
+    least three numbers and nothing else.
+    """
+    try:
+        return len([float(v) for v in line.split()]) >= 3
+    except ValueError:
+        return False
+
+
+class _DataLines(object):
+    """Lines of a foil data file prepared for finding blocks of data."""
+    def __init__(self, txt):
+        self.raw = txt.splitlines(True)
+        self.lines = txt.translate(_data_table).splitlines()
+        self.ntokens = np.fromiter(map(len, map(str.split, self.lines)),
+                                   dtype=int, count=len(self.lines))
+
+    def find_block(self, start=0):
+        """Find the first block of consecutive data lines at or after line
+        ``start``, returning its start and end lines and values as a 2-D
+        array, or ``None``.
+
+        Candidate lines with at least three values are found from token
+        counts, and parsed all at once. A line with something other than
+        numbers ends the block.
+        """
+        lines = self.lines
+        ntokens = self.ntokens
+        while True:
+            candidates = np.flatnonzero(ntokens[start:] >= 3)
+            if not len(candidates):
+                return None
+            start += candidates[0]
+            if not _is_data_line(lines[start]):
+                start += 1
+                continue
+            short = np.flatnonzero(ntokens[start:] < 3)
+            end = start + short[0] if len(short) else len(lines)
+            text = "\n".join(lines[start:end])
+            # Only lines with characters other than those of plain numbers
+            # need to be checked one by one
+            pos = 0
+            nlines = 0
+            m = None
+            if text.translate(_number_table):
+                m = _text_regex.search(text)
+            while m is not None:
+                nlines += text.count("\n", pos, m.start())
+                if not _is_data_line(lines[start + nlines]):
+                    end = start + nlines
+                    text = text[:text.rfind("\n", 0, m.start()) + 1]
+                    break
+                pos = text.find("\n", m.start()) + 1
+                if not pos:
+                    break
+                nlines += 1
+                m = _text_regex.search(text, pos)
+            try:
+                values = np.fromstring(text, sep=" ")
+            except ValueError:
+                values = None
+            counts = ntokens[start:end]
+            if values is None or len(values) != counts.sum():
+                # Malformed numbers, e.g., "1e", are found line by line
+                for n in range(start, end):
+                    if not _is_data_line(lines[n]):
+                        end = n
+                        break
+                counts = ntokens[start:end]
+                values = np.array(" ".join(lines[start:end]).split(),
+                                  dtype=float)
+            return start, end, _rows(values, counts, np.cumsum(counts))
+
+
+def _rows(values, counts, offsets):
+    """Arrange a flat array of values into rows of four columns, given the
+    number of values in each row.
+    """
+    if (counts == counts[0]).all():
+        rows = values[:offsets[-1]].reshape(len(counts), counts[0])
+        if counts[0] >= 4:
+            return rows[:, :4]
+        return np.column_stack((rows, np.zeros(len(rows))))
+    rows = np.zeros((len(counts), 4))
+    starts = offsets - counts
+    for i in range(4):
+        has = counts > i
+        rows[has, i] = values[starts[has] + i]
+    return rows
+
+
+def _format_rows(fmt, columns):
+    """Format columns of values into lines of text with one ``%``-format
+    operation.
+    """
+    n = min(len(c) for c in columns)
+    flat = [None]*(n*len(columns))
+    for i, c in enumerate(columns):
+        flat[i::len(columns)] = np.asarray(c)[:n].tolist()
+    return (fmt*n) % tuple(flat)
+
+
 class FoilData(object):
     """
     Object that represents a foil characteristic database.
@@ -22,43 +134,27 @@ class FoilData(object):
         """
         Reads foil data from file. Format is detected automatically, but
         column order is not.
+
+        The first block of consecutive lines with at least three numbers
+        between ``startline`` and ``stopline`` is read. If ``comments`` is
+        ``True``, the lines before it are kept as comments.
         """
-        self.alpha = []
-        self.cl = []
-        self.cd = []
-        self.cm = []
-        if comments:
-            self.comments = []
-        in_block = False
         with open(fpath, "r") as f:
-            for n, line in enumerate(f.readlines()):
-                if startline is not None and n+1 < startline:
-                    pass
-                elif stopline is not None and n+1 > stopline:
-                    pass
-                else:
-                    try:
-                        line = line.replace("(", "")
-                        line = line.replace(")", "")
-                        a = [float(n) for n in line.replace(",", " ").split()]
-                        self.alpha.append(a[0])
-                        self.cl.append(a[1])
-                        self.cd.append(a[2])
-                        if len(a) > 3:
-                            self.cm.append(a[3])
-                        else:
-                            self.cm.append(0.0)
-                        in_block = True
-                    except (ValueError, IndexError):
-                        if in_block:
-                            break
-                        else:
-                            if comments:
-                                self.comments.append(line)
-        self.alpha = np.asarray(self.alpha)
-        self.cl = np.asarray(self.cl)
-        self.cd = np.asarray(self.cd)
-        self.cm = np.asarray(self.cm)
+            txt = f.read()
+        if startline is not None or stopline is not None:
+            lines = txt.splitlines(True)
+            start = startline - 1 if startline is not None else 0
+            txt = "".join(lines[max(start, 0):stopline])
+        data = _DataLines(txt)
+        block = data.find_block()
+        if comments:
+            head = data.raw[:block[0]] if block else data.raw
+            self.comments = [line.translate(_paren_table) for line in head]
+        values = block[2] if block else np.zeros((0, 4))
+        self.alpha = values[:, 0].copy()
+        self.cl = values[:, 1].copy()
+        self.cd = values[:, 2].copy()
+        self.cm = values[:, 3].copy()
 
     def mirror(self):
         """Mirror positive coefficients about zero degrees angle of attack."""
@@ -80,8 +176,169 @@ class FoilData(object):
                 if comment.strip()[:2] != "//":
                     comment = "// " + comment
                 f.write(comment)
-            for a, cl, cd, cm in zip(self.alpha, self.cl, self.cd, self.cm):
-                f.write("({} {} {} {})\n".format(a, cl, cd, cm))
+            f.write(_format_rows("(%s %s %s %s)\n", [self.alpha, self.cl,
+                                                       self.cd, self.cm]))
+
+
+def _bracket(grid, x):
+    """Find the lower indices and weights of linear interpolation in a
+    sorted grid, clamped to its ends.
+    """
+    if len(grid) == 1:
+        return np.zeros(x.shape, dtype=int), np.zeros(x.shape), 0
+    i = np.clip(np.searchsorted(grid, x, side="right") - 1, 0, len(grid) - 2)
+    w = np.clip((x - grid[i])/(grid[i + 1] - grid[i]), 0.0, 1.0)
+    return i, w, 1
+
+
+class FoilDatabase(object):
+    """Foil coefficients at many Reynolds numbers, stored as one array with
+    shape ``(nre, nalpha, 3)`` of ``cl``, ``cd``, and ``cm`` on a common
+    angle of attack grid.
+
+    Parameters
+    ----------
+    tables : dict
+        ``FoilData`` objects keyed by Reynolds number.
+    alpha : array_like
+        Angle of attack grid in degrees. Defaults to the union of the
+        angles of attack of all tables. Tables are interpolated linearly
+        onto it, and held constant outside their range.
+    log_re : bool
+        Whether to interpolate linearly in the logarithm of the Reynolds
+        number, rather than the Reynolds number itself, in which case
+        Reynolds numbers must be positive.
+    """
+    def __init__(self, tables=None, alpha=None, log_re=True):
+        self.log_re = log_re
+        self.re = np.array([])
+        self.alpha = np.array([])
+        self.coeffs = np.zeros((0, 0, 3))
+        if tables:
+            self.set_tables(tables, alpha)
+
+    def set_tables(self, tables, alpha=None):
+        """Replace the data with ``FoilData`` objects keyed by Reynolds
+        number.
+        """
+        re_values = sorted(tables, key=float)
+        if self.log_re and re_values and float(re_values[0]) <= 0:
+            raise ValueError("Reynolds numbers must be positive with "
+                             "log_re")
+        if alpha is None:
+            alpha = np.unique(np.concatenate(
+                [np.asarray(tables[r].alpha, dtype=float)
+                 for r in re_values]))
+        self.alpha = np.asarray(alpha, dtype=float)
+        self.re = np.array(re_values, dtype=float)
+        self.coeffs = np.empty((len(re_values), len(self.alpha), 3))
+        for n, r in enumerate(re_values):
+            fd = tables[r]
+            table_alpha = np.asarray(fd.alpha, dtype=float)
+            columns = np.column_stack((fd.cl, fd.cd, fd.cm))
+            if np.array_equal(table_alpha, self.alpha):
+                self.coeffs[n] = columns
+                continue
+            order = np.argsort(table_alpha, kind="stable")
+            for i in range(3):
+                self.coeffs[n, :, i] = np.interp(self.alpha,
+                                                 table_alpha[order],
+                                                 columns[order, i])
+
+    def read(self, fpath):
+        """Read every block of data in a file, each preceded by a line like
+        ``Reynolds Number: 1e5``, as in CACTUS airfoil files.
+        """
+        with open(fpath, "r") as f:
+            txt = f.read()
+        data = _DataLines(txt)
+        tables = {}
+        end = 0
+        while True:
+            block = data.find_block(end)
+            if block is None:
+                break
+            labels = _reynolds_regex.findall("".join(data.raw[end:block[0]]))
+            if not labels:
+                raise ValueError("No Reynolds number for data at line {} "
+                                 "of {}".format(block[0] + 1, fpath))
+            start, end, values = block
+            fd = FoilData()
+            fd.alpha, fd.cl, fd.cd, fd.cm = values.T.copy()
+            tables[float(labels[-1])] = fd
+        if not tables:
+            raise ValueError("No foil data in {}".format(fpath))
+        self.set_tables(tables)
+
+    def write(self, fpath):
+        """Write all tables to one file in the format read by ``read``."""
+        with open(fpath, "w") as f:
+            for r, coeffs in zip(self.re, self.coeffs):
+                f.write("Reynolds Number: {!r}\n".format(float(r)))
+                f.write("AOA (deg) CL CD Cm25\n")
+                f.write(_format_rows("%r\t%r\t%r\t%r\n", [self.alpha]
+                                     + [coeffs[:, i] for i in range(3)]))
+                f.write("\n")
+
+    def table(self, re):
+        """Return the table at Reynolds number ``re`` as ``FoilData``."""
+        n = np.flatnonzero(self.re == float(re))
+        if not len(n):
+            raise KeyError(re)
+        fd = FoilData()
+        fd.alpha = self.alpha.copy()
+        fd.cl, fd.cd, fd.cm = self.coeffs[n[0]].T.copy()
+        return fd
+
+    def coefficients(self, alpha, re):
+        """Interpolate ``cl``, ``cd``, and ``cm`` bilinearly at angles of
+        attack ``alpha`` in degrees and Reynolds numbers ``re``, which are
+        broadcast against each other.
+
+        Returns an array with the broadcast shape of the inputs plus a last
+        axis of length 3. Queries outside the range of the data are clamped
+        to it.
+        """
+        return self._interpolate(alpha, re, self.coeffs)
+
+    def _interpolate(self, alpha, re, c):
+        alpha, re = np.broadcast_arrays(np.asarray(alpha, dtype=float),
+                                        np.asarray(re, dtype=float))
+        ia, wa, da = _bracket(self.alpha, alpha)
+        if self.log_re:
+            if (re <= 0).any():
+                raise ValueError("Reynolds numbers must be positive with "
+                                 "log_re")
+            ir, wr, dr = _bracket(np.log(self.re), np.log(re))
+        else:
+            ir, wr, dr = _bracket(self.re, re)
+        if c.ndim == 3:
+            wa = wa[..., np.newaxis]
+            wr = wr[..., np.newaxis]
+        lower = c[ir, ia]*(1 - wa) + c[ir, ia + da]*wa
+        upper = c[ir + dr, ia]*(1 - wa) + c[ir + dr, ia + da]*wa
+        return lower*(1 - wr) + upper*wr
+
+    def cl(self, alpha, re):
+        """Interpolate the lift coefficient."""
+        return self._interpolate(alpha, re, self.coeffs[..., 0])
+
+    def cd(self, alpha, re):
+        """Interpolate the drag coefficient."""
+        return self._interpolate(alpha, re, self.coeffs[..., 1])
+
+    def cm(self, alpha, re):
+        """Interpolate the moment coefficient."""
+        return self._interpolate(alpha, re, self.coeffs[..., 2])
+
+
+def read_foil_database(fpath, **kwargs):
+    """Read a ``FoilDatabase`` from a file with tables at many Reynolds
+    numbers.
+    """
+    db = FoilDatabase(**kwargs)
+    db.read(fpath)
+    return db
 
 
 def reformat_foildata(input_path, output_path, startline=None, stopline=None):
@@ -5,6 +5,7 @@ try:
     from PyQt4 import QtCore, QtGui
 except:
     from PyQt5 import QtCore, QtGui
+from .monitor import ProgressMonitor
 
 
 class ProgressThread(QtCore.QThread):
@@ -12,32 +13,12 @@ class ProgressThread(QtCore.QThread):
     part_done = QtCore.pyqtSignal(int)
     timeleft_solverate = QtCore.pyqtSignal(list)
     def run(self):
-        controldict = read_dict("controlDict")
-        solver = controldict["application"]
-        endtime = float(controldict["endTime"])
-        done = False
-        while not done:
-            for d in os.listdir("./"):
-                try:
-                    if float(d) == endtime:
-                        done = True
-                except:
-                    pass
-            t, deltat, exectime = get_solver_times(solver)
-            try:
-                t_per_step = exectime[-1] - exectime[-2]
-                tps2 = exectime[-2] - exectime[-3]
-                t_per_step = (t_per_step + tps2)/2
-            except IndexError:
-                t, deltat, exectime = get_solver_times(solver, window=2000)
-                t_per_step = exectime[-1] - exectime[-2]
-            try:
-                deltat = deltat[-1]
-            except IndexError:
-                deltat = get_deltat()
-            self.part_done.emit(int(t[-1]/endtime*100))
-            self.timeleft_solverate.emit([(endtime - t[-1]), t_per_step/deltat/3600])
-            time.sleep(1)
+        def emit(monitor):
+            self.part_done.emit(int(monitor.fraction_done*100))
+            if monitor.solve_rate is not None:
+                self.timeleft_solverate.emit([monitor.endtime - monitor.time,
+                                              monitor.solve_rate/3600])
+        ProgressMonitor(["./"]).run(emit)
         self.finished.emit(True)
 
 
@@ -0,0 +1,185 @@
+"""Parsing solver logs into time series of residuals, Courant numbers,
+continuity errors, and timing.
+"""
+
+from __future__ import division, print_function, absolute_import
+import re
+import array
+import numpy as np
+import pandas
+
+
+_log_regex = re.compile(
+    br"^[ \t]*(?:"
+    br"Time = (?P<time>\S+)"
+    br"|deltaT = (?P<delta_t>\S+)"
+    br"|Courant Number mean: (?P<courant_mean>\S+) max: (?P<courant_max>\S+)"
+    br"|(?P<solver>\w+):\s+Solving for (?P<field>\w+), "
+    br"Initial residual = (?P<initial>[^,\s]+), "
+    br"Final residual = (?P<final>[^,\s]+), No Iterations (?P<iterations>\d+)"
+    br"|time step continuity errors : sum local = (?P<continuity_local>\S+), "
+    br"global = (?P<continuity_global>\S+), "
+    br"cumulative = (?P<continuity_cumulative>\S+)"
+    br"|ExecutionTime = (?P<exectime>\S+) s\s+ClockTime = (?P<clocktime>\S+) s"
+    br")", re.MULTILINE)
+
+_number_regex = re.compile(br"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?")
+
+
+def _to_float(token):
+    """Convert a token to a float, using its leading number if it has
+    trailing characters, e.g., a unit, or NaN if it has none.
+    """
+    try:
+        return float(token)
+    except ValueError:
+        m = _number_regex.match(token)
+        return float(m.group()) if m else np.nan
+
+
+class LogParser(object):
+    """Single-pass parser for solver logs that builds one row of data per
+    time step.
+
+    Output is passed to ``feed`` in blocks of complete lines, so a log can
+    be parsed in chunks of bounded size, or incrementally while the solver
+    runs. The columns are:
+
+    * ``time``, ``delta_t``
+    * ``courant_mean``, ``courant_max``
+    * ``<field>_initial``: initial residual of the first solution of each
+      field in the time step
+    * ``<field>_final``: final residual of the last solution
+    * ``<field>_iterations``: total number of solver iterations
+    * ``continuity_local``, ``continuity_global``, ``continuity_cumulative``:
+      the last continuity errors of the time step
+    * ``exectime``, ``clocktime``
+
+    Solvers such as pisoFoam print the Courant number and ``deltaT`` after
+    ``Time =``, while pimpleFoam and others print them before it. These
+    values are added to the current time step if it has no solver output
+    yet, otherwise they are held for the next one.
+
+    Values that are missing for a time step are NaN.
+    """
+    def __init__(self):
+        self.columns = {}
+        self.nrows = 0
+        self.solvers = {}
+        self._row = None
+        self._pending = {}
+        self._solved = False
+
+    def _end_row(self):
+        row = self._row
+        if row is None:
+            return
+        columns = self.columns
+        if row.keys() == columns.keys():
+            # Usual case of the same output every time step
+            for key, val in row.items():
+                columns[key].append(val)
+        else:
+            for key, val in row.items():
+                col = columns.get(key)
+                if col is None:
+                    col = array.array("d", [np.nan])*self.nrows
+                    columns[key] = col
+                col.append(val)
+            for key, col in columns.items():
+                if len(col) == self.nrows:
+                    col.append(np.nan)
+        self.nrows += 1
+        self._row = None
+
+    def feed(self, data):
+        """Parse a block of complete lines of the log as bytes."""
+        row = self._row
+        solvers = self.solvers
+        pending = self._pending
+        for m in _log_regex.finditer(data):
+            kind = m.lastindex
+            if kind == 1:
+                self._end_row()
+                row = self._row = {"time": _to_float(m.group(1))}
+                if pending:
+                    row.update(pending)
+                    pending.clear()
+                self._solved = False
+            elif kind == 4 or kind == 2:
+                # Courant number or time step, for this time step or the next
+                target = pending if row is None or self._solved else row
+                if kind == 4:
+                    target["courant_mean"] = float(m.group(3))
+                    target["courant_max"] = float(m.group(4))
+                else:
+                    target["delta_t"] = float(m.group(2))
+            elif row is None:
+                # Output before the first time step
+                continue
+            elif kind == 9:
+                self._solved = True
+                _, _, _, _, solver, field, initial, final, iterations = \
+                    m.groups()[:9]
+                field = field.decode()
+                if field not in solvers:
+                    solvers[field] = solver.decode()
+                key = field + "_initial"
+                if key not in row:
+                    row[key] = float(initial)
+                row[field + "_final"] = float(final)
+                key = field + "_iterations"
+                row[key] = row.get(key, 0) + int(iterations)
+            elif kind == 12:
+                local, glob, cumulative = m.group(10, 11, 12)
+                row["continuity_local"] = float(local)
+                row["continuity_global"] = float(glob)
+                row["continuity_cumulative"] = float(cumulative)
+            else:
+                exectime, clocktime = m.group(13, 14)
+                row["exectime"] = float(exectime)
+                row["clocktime"] = float(clocktime)
+                self._solved = True
+
+    def dataframe(self):
+        """Return the time steps parsed so far, including the current one, as
+        a DataFrame. The solver used for each field is stored in
+        ``df.attrs["solvers"]``.
+        """
+        columns = self.columns
+        row = self._row
+        if row is not None:
+            # Include the current time step without ending it, since more of
+            # its output may follow
+            columns = {key: col + array.array("d", [row.get(key, np.nan)])
+                       for key, col in columns.items()}
+            for key, val in row.items():
+                if key not in columns:
+                    columns[key] = array.array("d", [np.nan]*self.nrows
+                                               + [val])
+        # Columns are kept as compact arrays of doubles until now
+        df = pandas.DataFrame({key: np.frombuffer(col, dtype=float).copy()
+                               for key, col in columns.items()})
+        df.attrs["solvers"] = dict(self.solvers)
+        return df
+
+
+def parse_log(fpath, chunksize=1 << 24):
+    """Parse a solver log into a DataFrame with one row per time step.
+
+    The log is read in chunks of ``chunksize`` bytes, so it is never held in
+    memory as a whole. See ``LogParser`` for the columns.
+    """
+    parser = LogParser()
+    partial = b""
+    with open(fpath, "rb") as f:
+        while True:
+            chunk = f.read(chunksize)
+            if not chunk:
+                break
+            chunk = partial + chunk
+            end = chunk.rfind(b"\n") + 1
+            partial = chunk[end:]
+            parser.feed(chunk[:end])
+    parser.feed(partial)
+    return parser.dataframe()
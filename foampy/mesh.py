@@ -0,0 +1,184 @@
+"""Reading mesh statistics from ``polyMesh`` files without running
+``checkMesh``.
+
+Counts are read from the file headers and list sizes, so only the first few
+kilobytes of each file are read, for both ASCII and binary meshes.
+"""
+
+from __future__ import division, print_function, absolute_import
+import os
+import re
+import gzip
+from .dictionaries import parse_dict
+from .fields import FoamField
+from .types import FoamSubDict
+
+
+_foamfile_regex = re.compile(br"FoamFile\s*\{(.*?)\}", re.DOTALL)
+_comment_regex = re.compile(br"//[^\n]*|/\*.*?\*/", re.DOTALL)
+_list_size_regex = re.compile(br"\s*(\d+)\s*\(")
+_note_count_regex = re.compile(r"n(\w+?)s?:\s*(\d+)")
+
+_note_keys = {"Point": "points", "Cell": "cells", "Face": "faces",
+              "InternalFace": "internal_faces"}
+_processor_regex = re.compile(r"processor(\d+)$")
+
+
+def processor_dirs(casedir="./"):
+    """List the ``processor*`` directories of a case, sorted by number."""
+    dirs = []
+    for name in os.listdir(casedir):
+        m = _processor_regex.match(name)
+        if m and os.path.isdir(os.path.join(casedir, name)):
+            dirs.append((int(m.group(1)), os.path.join(casedir, name)))
+    return [d for _, d in sorted(dirs)]
+
+
+def _mesh_file(meshdir, name):
+    fpath = os.path.join(meshdir, name)
+    if not os.path.isfile(fpath) and os.path.isfile(fpath + ".gz"):
+        fpath += ".gz"
+    return fpath
+
+
+def _read_start(fpath, nbytes=8192):
+    """Read the start of a possibly compressed file."""
+    opener = gzip.open if fpath.endswith(".gz") else open
+    with opener(fpath, "rb") as f:
+        return f.read(nbytes)
+
+
+def read_header(fpath):
+    """Read the ``FoamFile`` header of a file as a ``FoamSubDict``, and the
+    size of the first list after it, or ``None`` if there is no list in the
+    first few kilobytes.
+    """
+    data = _read_start(fpath)
+    m = _foamfile_regex.search(data)
+    if m is None:
+        raise ValueError("No FoamFile header in {}".format(fpath))
+    header = parse_dict(m.group(1).decode())
+    header.name = "FoamFile"
+    # Find the list size after the comments following the header
+    m = _list_size_regex.match(data, _skip_comments(data, m.end()))
+    size = int(m.group(1)) if m else None
+    return header, size
+
+
+def _note_counts(note):
+    """Parse counts from an ``owner`` note like
+    ``"nPoints:441 nCells:400 nFaces:1640 nInternalFaces:760"``.
+    """
+    counts = {}
+    for key, val in _note_count_regex.findall(str(note)):
+        if key in _note_keys:
+            counts[_note_keys[key]] = int(val)
+    return counts
+
+
+def read_boundary(meshdir):
+    """Read the patches of a ``polyMesh/boundary`` file as a ``FoamSubDict``
+    of patch dicts, in order.
+    """
+    fpath = _mesh_file(meshdir, "boundary")
+    opener = gzip.open if fpath.endswith(".gz") else open
+    with opener(fpath, "rb") as f:
+        txt = f.read().decode("utf-8", "replace")
+    patches = FoamSubDict(name="boundary")
+    for key, val in parse_dict(txt, fpath=fpath).items():
+        if key == "FoamFile":
+            continue
+        for patch in val:
+            if isinstance(patch, FoamSubDict):
+                patches[patch.name] = patch
+    return patches
+
+
+def _polymesh_stats(meshdir):
+    """Read counts from one ``polyMesh`` directory."""
+    header = read_header(_mesh_file(meshdir, "owner"))[0]
+    stats = _note_counts(header.get("note", ""))
+    if "points" not in stats:
+        stats["points"] = read_header(_mesh_file(meshdir, "points"))[1]
+    if "faces" not in stats:
+        header, size = read_header(_mesh_file(meshdir, "faces"))
+        # Compact face lists start with nFaces + 1 offsets
+        if "Compact" in str(header.get("class", "")):
+            size -= 1
+        stats["faces"] = size
+    if "cells" not in stats:
+        # Old meshes without a note: the cells are numbered by owner
+        owner = FoamField(_mesh_file(meshdir, "owner"))
+        pos = _skip_comments(owner._buf, owner._header_end)
+        stats["cells"] = int(owner.read_list(pos, "label")[0].max()) + 1
+    patches = read_boundary(meshdir)
+    stats["patches"] = patches
+    if "internal_faces" not in stats:
+        stats["internal_faces"] = min([int(p["startFace"]) for p in
+                                       patches.values()] + [stats["faces"]])
+    return stats
+
+
+def _skip_comments(buf, pos):
+    """Return the position of the first token at or after ``pos`` that is
+    not whitespace or a comment.
+    """
+    while True:
+        while pos < len(buf) and buf[pos:pos + 1].isspace():
+            pos += 1
+        m = _comment_regex.match(buf, pos)
+        if m is None:
+            return pos
+        pos = m.end()
+
+
+def mesh_stats(casedir="./", processors=None):
+    """Read cell, face, point, and patch counts of a mesh from the headers of
+    its ``constant/polyMesh`` files.
+
+    Parameters
+    ----------
+    casedir : str
+        Case directory.
+    processors : bool
+        Whether to sum the counts of ``processor*`` directories of a
+        decomposed case. By default, they are used only if there is no
+        ``constant/polyMesh``.
+
+    Returns
+    -------
+    dict
+        Keys ``"cells"``, ``"faces"``, ``"internal_faces"``, ``"points"``,
+        ``"npatches"``, and ``"patches"``, a ``FoamSubDict`` of the patch
+        dicts. For decomposed cases, faces and points on processor
+        boundaries are counted once per processor, and processor patches
+        are not included in ``"patches"``, whose ``nFaces`` are summed.
+    """
+    meshdir = os.path.join(casedir, "constant", "polyMesh")
+    if processors is None:
+        processors = not os.path.isdir(meshdir)
+    if not processors:
+        stats = _polymesh_stats(meshdir)
+        stats["npatches"] = len(stats["patches"])
+        return stats
+    procdirs = [d for d in processor_dirs(casedir) if os.path.isdir(
+                os.path.join(d, "constant", "polyMesh"))]
+    if not procdirs:
+        raise IOError("No polyMesh directories in {}".format(casedir))
+    stats = {"cells": 0, "faces": 0, "internal_faces": 0, "points": 0}
+    patches = FoamSubDict(name="boundary")
+    for procdir in procdirs:
+        s = _polymesh_stats(os.path.join(procdir, "constant", "polyMesh"))
+        for key in stats:
+            stats[key] += s[key]
+        for name, patch in s["patches"].items():
+            if patch.get("type") == "processor":
+                continue
+            if name not in patches:
+                patches[name] = FoamSubDict(name=name, **patch)
+                patches[name]["nFaces"] = 0
+                patches[name].pop("startFace", None)
+            patches[name]["nFaces"] += int(patch["nFaces"])
+    stats["patches"] = patches
+    stats["npatches"] = len(patches)
+    return stats
@@ -0,0 +1,277 @@
+"""Monitoring the progress of running solvers.
+
+Solver logs are followed incrementally from the last byte read. If inotify
+is available, the monitor sleeps until a case directory changes; otherwise,
+or for changes made on other hosts of a shared filesystem, it polls with an
+interval that grows while nothing happens.
+"""
+
+from __future__ import division, print_function, absolute_import
+import os
+import sys
+import time
+import select
+import struct
+import ctypes
+import ctypes.util
+from .core import DataFileFollower, ProgressParser
+from .dictionaries import dictpath_from_name, read_dict_cached
+
+
+class CaseMonitor(object):
+    """Follow the log of a solver and estimate its progress.
+
+    The solve rate, in wall clock seconds per simulated second, is an
+    exponentially weighted moving average over time steps, so it adapts to
+    changes in time step or load without being dominated by single steps.
+
+    Parameters
+    ----------
+    casedir : str
+        Case directory.
+    logname : str
+        Log file name. Defaults to ``log.<application>``.
+    alpha : float
+        Weight of the newest time step in the solve rate average.
+    tail_bytes : int
+        Only this many bytes at the end of an existing log are read when
+        monitoring starts.
+    """
+    def __init__(self, casedir="./", logname=None, alpha=0.1,
+                 tail_bytes=1 << 20):
+        self.casedir = casedir
+        controldict = read_dict_cached(dictpath_from_name("controlDict",
+                                                          casedir))
+        self.endtime = float(controldict["endTime"])
+        if logname is None:
+            logname = "log." + str(controldict["application"])
+        self.log_fpath = os.path.join(casedir, logname)
+        self.alpha = alpha
+        self.tail_bytes = tail_bytes
+        self.follower = DataFileFollower(self.log_fpath)
+        self.parser = ProgressParser()
+        self.time = None
+        self.delta_t = None
+        self.exectime = None
+        self.solve_rate = None
+        self._started = False
+        self._skip_partial = False
+
+    def _start(self):
+        """Skip to the end of an existing log, or return ``False`` if there
+        is no log yet.
+        """
+        try:
+            size = os.path.getsize(self.log_fpath)
+        except OSError:
+            return False
+        if size > self.tail_bytes:
+            self.follower.offset = size - self.tail_bytes
+            self._skip_partial = True
+        self._started = True
+        return True
+
+    def update(self):
+        """Read new output from the log. Returns ``True`` if any time steps
+        were completed since the last update.
+        """
+        if not self._started and not self._start():
+            return False
+        try:
+            data = self.follower.read_new_bytes()
+        except (IOError, OSError):
+            return False
+        if self._skip_partial and data:
+            # Discard the partial line at the start of the tail
+            data = data[data.find(b"\n") + 1:]
+            self._skip_partial = False
+        events = self.parser.feed_bytes(data)
+        for event in events:
+            self._add(event)
+        return len(events) > 0
+
+    def _add(self, event):
+        if event["time"] is None or event["exectime"] is None:
+            return
+        if self.time is not None and event["time"] > self.time:
+            rate = (event["exectime"] - self.exectime)/(event["time"]
+                                                        - self.time)
+            if self.solve_rate is None:
+                self.solve_rate = rate
+            else:
+                self.solve_rate += self.alpha*(rate - self.solve_rate)
+        self.time = event["time"]
+        self.delta_t = event["delta_t"]
+        self.exectime = event["exectime"]
+
+    @property
+    def done(self):
+        """``True`` if the solver has written ``End`` or reached the end
+        time.
+        """
+        return self.parser.finished or (self.time is not None
+                                        and self.time >= self.endtime)
+
+    @property
+    def fraction_done(self):
+        """Fraction of the simulated time completed."""
+        if self.time is None:
+            return 0.0
+        return min(self.time/self.endtime, 1.0)
+
+    @property
+    def time_left(self):
+        """Estimated wall clock time left in seconds, or ``None`` if not
+        yet known.
+        """
+        if self.solve_rate is None:
+            return None
+        return max(self.endtime - self.time, 0.0)*self.solve_rate
+
+
+class _Inotify(object):
+    """Minimal inotify wrapper using ``ctypes``, mapping watched directories
+    to keys.
+    """
+    mask = 0x00000002 | 0x00000008 | 0x00000100 | 0x00000080
+    _event_header = struct.Struct("iIII")
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._libc = libc
+        self.fd = libc.inotify_init1(os.O_NONBLOCK)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.keys = {}
+
+    def add_watch(self, dirpath, key):
+        wd = self._libc.inotify_add_watch(self.fd, dirpath.encode(),
+                                          self.mask)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_add_watch failed")
+        self.keys[wd] = key
+
+    def read(self, timeout):
+        """Wait up to ``timeout`` seconds for events and return the set of
+        keys of the directories that changed.
+        """
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        keys = set()
+        while ready:
+            try:
+                data = os.read(self.fd, 65536)
+            except (IOError, OSError):
+                break
+            pos = 0
+            while pos < len(data):
+                wd, _, _, length = self._event_header.unpack_from(data, pos)
+                pos += self._event_header.size + length
+                if wd in self.keys:
+                    keys.add(self.keys[wd])
+        return keys
+
+    def close(self):
+        os.close(self.fd)
+
+
+def _inotify_or_none():
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        return _Inotify()
+    except (OSError, AttributeError):
+        return None
+
+
+class ProgressMonitor(object):
+    """Monitor the progress of solvers in many cases from one process.
+
+    Parameters
+    ----------
+    casedirs : list
+        Case directories.
+    min_interval : float
+        Minimum time in seconds between updates of a case.
+    max_interval : float
+        Maximum time in seconds between checks for output the inotify
+        events may have missed. The interval doubles from ``min_interval``
+        while no case makes progress.
+    use_inotify : bool
+        Whether to use inotify when it is available.
+    kwargs :
+        Passed to ``CaseMonitor``.
+    """
+    def __init__(self, casedirs, min_interval=1.0, max_interval=30.0,
+                 use_inotify=True, **kwargs):
+        self.monitors = [CaseMonitor(casedir, **kwargs)
+                         for casedir in casedirs]
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min_interval
+        self.inotify = _inotify_or_none() if use_inotify else None
+        if self.inotify is not None:
+            try:
+                for n, monitor in enumerate(self.monitors):
+                    self.inotify.add_watch(os.path.abspath(monitor.casedir),
+                                           n)
+            except OSError:
+                self.inotify.close()
+                self.inotify = None
+
+    @property
+    def done(self):
+        """``True`` if all solvers are done."""
+        return all(monitor.done for monitor in self.monitors)
+
+    def update(self, indices=None):
+        """Update the monitors of cases not yet done, or only those in
+        ``indices``, and return the monitors that made progress.
+        """
+        if indices is None:
+            indices = range(len(self.monitors))
+        return [self.monitors[n] for n in sorted(indices)
+                if not self.monitors[n].done and self.monitors[n].update()]
+
+    def wait(self):
+        """Wait for output, returning the indices of cases that may have
+        changed, or ``None`` if all cases should be checked.
+        """
+        if self.inotify is None:
+            time.sleep(self.interval)
+            return None
+        t0 = time.time()
+        indices = self.inotify.read(self.interval)
+        if not indices:
+            return None
+        # Collect events for at least the minimum interval
+        remaining = self.min_interval - (time.time() - t0)
+        if remaining > 0:
+            time.sleep(remaining)
+            indices |= self.inotify.read(0)
+        return indices
+
+    def run(self, callback=None):
+        """Monitor until all solvers are done, calling ``callback`` with
+        each monitor that made progress.
+        """
+        indices = None
+        try:
+            while True:
+                updated = self.update(indices)
+                if callback is not None:
+                    for monitor in updated:
+                        callback(monitor)
+                if self.done:
+                    break
+                if updated:
+                    self.interval = self.min_interval
+                elif indices is None:
+                    self.interval = min(2*self.interval, self.max_interval)
+                indices = self.wait()
+        finally:
+            self.close()
+
+    def close(self):
+        if self.inotify is not None:
+            self.inotify.close()
+            self.inotify = None
@@ -0,0 +1,103 @@
+"""Running statistics for streams of data chunks, e.g., from
+``foampy.iter_forces`` or ``foampy.iter_probes_data``.
+"""
+
+from __future__ import division, print_function, absolute_import
+import numpy as np
+
+
+class RunningStats(object):
+    """Accumulate count, mean, variance, minimum, and maximum over chunks of
+    data along the first axis, without keeping the data in memory.
+
+    Chunks are merged with the parallel algorithm of Chan et al., which is
+    numerically stable for long streams.
+    """
+    def __init__(self):
+        self.count = 0
+        self.mean = None
+        self.m2 = None
+        self.min = None
+        self.max = None
+
+    def update(self, chunk):
+        """Add a chunk of samples (an array or DataFrame) to the
+        statistics.
+        """
+        chunk = np.asarray(chunk, dtype=float)
+        n = len(chunk)
+        if n == 0:
+            return
+        mean = chunk.mean(axis=0)
+        m2 = ((chunk - mean)**2).sum(axis=0)
+        if self.count == 0:
+            self.count, self.mean, self.m2 = n, mean, m2
+            self.min, self.max = chunk.min(axis=0), chunk.max(axis=0)
+            return
+        count = self.count + n
+        delta = mean - self.mean
+        self.mean = self.mean + delta*n/count
+        self.m2 = self.m2 + m2 + delta**2*self.count*n/count
+        self.count = count
+        self.min = np.minimum(self.min, chunk.min(axis=0))
+        self.max = np.maximum(self.max, chunk.max(axis=0))
+
+    def var(self, ddof=0):
+        """Return the variance."""
+        return self.m2/(self.count - ddof)
+
+    def std(self, ddof=0):
+        """Return the standard deviation."""
+        return np.sqrt(self.var(ddof))
+
+
+class WindowedMean(object):
+    """Accumulate averages over fixed-width time windows from chunks of
+    time-ordered data.
+
+    Parameters
+    ----------
+    window : float
+        Width of each time window.
+    t0 : float
+        Start time of the first window.
+    """
+    def __init__(self, window, t0=0.0):
+        self.window = window
+        self.t0 = t0
+        self._sums = {}
+        self._counts = {}
+
+    def update(self, t, chunk):
+        """Add samples ``chunk`` taken at times ``t``."""
+        t = np.asarray(t, dtype=float)
+        chunk = np.asarray(chunk, dtype=float)
+        if len(t) == 0:
+            return
+        bins = np.floor((t - self.t0)/self.window).astype(int)
+        # Windows are contiguous in time-ordered data, so sum each run
+        starts = np.flatnonzero(np.diff(bins, prepend=bins[0] - 1))
+        sums = np.add.reduceat(chunk, starts, axis=0)
+        counts = np.diff(np.append(starts, len(bins)))
+        for b, s, c in zip(bins[starts], sums, counts):
+            if b in self._sums:
+                self._sums[b] = self._sums[b] + s
+                self._counts[b] += c
+            else:
+                self._sums[b] = s
+                self._counts[b] = c
+
+    def result(self):
+        """Return window start times and mean values for each window."""
+        bins = sorted(self._sums)
+        t = self.t0 + np.array(bins, dtype=float)*self.window
+        means = np.array([self._sums[b]/self._counts[b] for b in bins])
+        return t, means
+
+
+def stream_stats(chunks):
+    """Compute ``RunningStats`` over an iterable of chunks."""
+    stats = RunningStats()
+    for chunk in chunks:
+        stats.update(chunk)
+    return stats
@@ -0,0 +1,335 @@
+"""Generating parameter sweeps of cases from a base case.
+
+The base case is read once. Swept values are spliced into the text of the
+base dictionaries, so comments, directives, and macros are kept, while
+large inputs that are the same in every case, such as the mesh, are shared
+with the base case through reflinks or hardlinks rather than copied, so disk
+use and setup time scale with what differs between cases.
+"""
+
+from __future__ import division, print_function, absolute_import
+import os
+import json
+import shutil
+import fnmatch
+import tempfile
+import itertools
+import multiprocessing
+import pandas
+from .dictionaries import dictpath_from_name, _value_spans, _splice_values
+
+
+share_dirs = ["constant/polyMesh", "constant/triSurface",
+              "constant/extendedFeatureEdgeMesh"]
+ignore_patterns = ["processor*", "postProcessing", "log.*", "*.pyc"]
+
+# ioctl request to clone a file's extents on Linux (btrfs, XFS, ...)
+_FICLONE = 0x40049409
+
+
+def expand_grid(param_grid):
+    """Expand a parameter grid into a list of parameter dicts.
+
+    A dict of lists gives their Cartesian product, in key order; a list of
+    dicts is returned as is.
+    """
+    if isinstance(param_grid, dict):
+        keys = list(param_grid)
+        return [dict(zip(keys, vals)) for vals in
+                itertools.product(*[param_grid[k] for k in keys])]
+    return [dict(params) for params in param_grid]
+
+
+def split_key(key):
+    """Split a parameter key into the path of a dictionary relative to the
+    case directory and a list of keywords.
+
+    Keys are a dictionary name or path, then a dotted keyword path, e.g.,
+    ``"controlDict.endTime"``, ``"fvSolution.PIMPLE.nCorrectors"``, or
+    ``"0/U.boundaryField.inlet.value"``.
+    """
+    dirname, _, tail = key.rpartition("/")
+    name, _, path = tail.partition(".")
+    if not path:
+        raise ValueError("No keyword in parameter {}".format(key))
+    if dirname:
+        relpath = os.path.join(dirname, name)
+    else:
+        relpath = os.path.relpath(dictpath_from_name(name, ""))
+    return relpath, path.split(".")
+
+
+def _reflink(src, dst):
+    import fcntl
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        try:
+            fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+        except IOError as e:
+            os.remove(dst)
+            raise OSError(e.errno, "Reflink failed: {}".format(dst))
+    shutil.copymode(src, dst)
+
+
+def link_file(src, dst, method="hardlink"):
+    """Create ``dst`` as a file sharing the data of ``src``.
+
+    Parameters
+    ----------
+    method : str
+        ``"reflink"`` (a copy-on-write clone), ``"hardlink"``, ``"symlink"``
+        (to the absolute path of ``src``), or ``"copy"``.
+    """
+    if method == "reflink":
+        _reflink(src, dst)
+    elif method == "hardlink":
+        os.link(src, dst)
+    elif method == "symlink":
+        os.symlink(os.path.abspath(src), dst)
+    elif method == "copy":
+        shutil.copy2(src, dst)
+    else:
+        raise ValueError("Unknown link method {}".format(method))
+
+
+def detect_link_method(src, dirpath):
+    """Find the best method to share ``src`` with files in ``dirpath``:
+    ``"reflink"`` if the filesystem supports it, then ``"hardlink"``, then
+    ``"copy"``.
+    """
+    tmpdir = tempfile.mkdtemp(dir=dirpath, prefix=".foampy-link-")
+    try:
+        for method in ["reflink", "hardlink"]:
+            try:
+                link_file(src, os.path.join(tmpdir, method), method)
+                return method
+            except (OSError, ImportError):
+                pass
+        return "copy"
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+def _ignored(name, patterns):
+    return any(fnmatch.fnmatch(name, p) for p in patterns)
+
+
+def _shared(relpath, share):
+    return any(relpath == d or relpath.startswith(d + os.sep)
+               for d in share)
+
+
+def scan_case(casedir, share=share_dirs, ignore=ignore_patterns,
+              exclude=[]):
+    """List the directories and files of a case to be cloned.
+
+    Returns a list of directories and a list of ``(relpath, shared)`` file
+    tuples, with paths relative to ``casedir``. Files and directories whose
+    names match ``ignore`` patterns, and files or directories in
+    ``exclude``, are skipped.
+    """
+    share = [os.path.normpath(d) for d in share]
+    exclude = set(os.path.normpath(p) for p in exclude)
+    dirs = []
+    files = []
+    for dirpath, dirnames, filenames in os.walk(casedir):
+        reldir = os.path.relpath(dirpath, casedir)
+        if reldir == ".":
+            reldir = ""
+        dirnames[:] = sorted(
+            d for d in dirnames if not _ignored(d, ignore)
+            and os.path.join(reldir, d) not in exclude)
+        # Symlinks to directories are cloned as links
+        links = [d for d in dirnames
+                 if os.path.islink(os.path.join(dirpath, d))]
+        dirnames[:] = [d for d in dirnames if d not in links]
+        dirs += [os.path.join(reldir, d) for d in dirnames]
+        for name in sorted(filenames + links):
+            relpath = os.path.join(reldir, name)
+            if _ignored(name, ignore) or relpath in exclude:
+                continue
+            files.append((relpath, _shared(relpath, share)))
+    return dirs, files
+
+
+def _clone_file(src, dst, shared, method):
+    if os.path.islink(src):
+        os.symlink(os.readlink(src), dst)
+    elif shared or method == "reflink":
+        # Unshared files may be cloned too, since reflinks are copy-on-write
+        link_file(src, dst, method)
+    else:
+        shutil.copy2(src, dst)
+
+
+# State shared by the workers that make the cases of a sweep
+_sweep = {}
+
+
+def _init_sweep(state):
+    _sweep.clear()
+    _sweep.update(state)
+
+
+def _make_case(args):
+    casedir, params = args
+    base = _sweep["base"]
+    if os.path.isdir(casedir):
+        if not _sweep["overwrite"]:
+            raise IOError("Case directory {} exists".format(casedir))
+        shutil.rmtree(casedir)
+    os.makedirs(casedir)
+    for d in _sweep["dirs"]:
+        os.mkdir(os.path.join(casedir, d))
+    for relpath, shared in _sweep["files"]:
+        _clone_file(os.path.join(base, relpath),
+                    os.path.join(casedir, relpath), shared, _sweep["method"])
+    for relpath, (text, spans) in _sweep["texts"].items():
+        values = {path: params[key] for key, path in _sweep["keys"][relpath]}
+        fpath = os.path.join(casedir, relpath)
+        with open(fpath, "w") as f:
+            f.write(_splice_values(text, spans, values))
+        shutil.copymode(os.path.join(base, relpath), fpath)
+    return casedir
+
+
+def _jsonable(val):
+    if hasattr(val, "tolist"):
+        return val.tolist()
+    if isinstance(val, tuple):
+        return list(val)
+    return val
+
+
+def generate_sweep(base_casedir, param_grid, root=None,
+                   name_format="case{:04d}", link="auto", share=share_dirs,
+                   ignore=ignore_patterns, manifest="manifest.json",
+                   overwrite=False, nproc=None):
+    """Create a case directory for every set of parameters in a grid.
+
+    Each case is a clone of the base case in which the swept dictionary
+    entries are set. Dictionaries are read and their entries located once,
+    and for each case the new values are spliced into their text, as by
+    ``dictionaries.replace_values``. Files in ``share`` directories are
+    shared with the base case; other files are copied, or cloned if the
+    filesystem supports reflinks.
+
+    Parameters
+    ----------
+    base_casedir : str
+        Base case directory.
+    param_grid : dict or list
+        Dict of parameter keys and lists of values, swept over their
+        Cartesian product, or a list of dicts with one set of parameters
+        per case. Keys are a dictionary name or path and a dotted keyword
+        path, e.g., ``"controlDict.endTime"`` or
+        ``"0/U.internalField"``; the entries must exist in the base case.
+    root : str
+        Directory in which to create the cases. Defaults to
+        ``<base_casedir>_sweep``.
+    name_format : str or callable
+        Format string for the case directory names, given the index of the
+        case, or a function of the index and parameter dict.
+    link : str
+        How to share files: ``"auto"`` uses reflinks if possible, then
+        hardlinks, then copies. Hardlinked or symlinked files must not be
+        modified in place, e.g., by ``refineMesh -overwrite``, since that
+        changes them in every case.
+    share : list
+        Directories, relative to the case directory, whose files are
+        shared.
+    ignore : list
+        Glob patterns of file and directory names that are not cloned.
+    manifest : str
+        File name, in ``root``, of the JSON manifest mapping case
+        directories to parameters, or ``None`` to not write one.
+    overwrite : bool
+        Whether to replace existing case directories.
+    nproc : int
+        Number of worker processes. Defaults to the number of CPUs; if 1,
+        cases are created serially in this process.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Parameters indexed by case directory.
+    """
+    base = os.path.normpath(base_casedir)
+    if root is None:
+        root = base + "_sweep"
+    param_sets = expand_grid(param_grid)
+    if not param_sets:
+        raise ValueError("Parameter grid is empty")
+    keys = {}
+    for key in param_sets[0]:
+        relpath, path = split_key(key)
+        keys.setdefault(relpath, []).append((key, ".".join(path)))
+    texts = {}
+    for relpath in keys:
+        fpath = os.path.join(base, relpath)
+        if not os.path.isfile(fpath):
+            raise IOError("No dictionary {} in {}".format(relpath, base))
+        with open(fpath) as f:
+            text = f.read()
+        # Check the entries exist before creating any cases
+        paths = [path for _, path in keys[relpath]]
+        spans = _value_spans(text, set(paths))
+        missing = [path for path in paths if path not in spans]
+        if missing:
+            raise KeyError("{} not found in {}".format(", ".join(missing),
+                                                       fpath))
+        texts[relpath] = (text, spans)
+    if not os.path.isdir(root):
+        os.makedirs(root)
+    exclude = list(keys)
+    if os.path.abspath(root).startswith(os.path.abspath(base) + os.sep):
+        exclude.append(os.path.relpath(root, base))
+    dirs, files = scan_case(base, share=share, ignore=ignore,
+                            exclude=exclude)
+    if link == "auto":
+        shared = [relpath for relpath, s in files if s]
+        link = detect_link_method(os.path.join(base, shared[0]), root) \
+            if shared else "copy"
+    if callable(name_format):
+        names = [name_format(n, p) for n, p in enumerate(param_sets)]
+    else:
+        names = [name_format.format(n) for n in range(len(param_sets))]
+    casedirs = [os.path.join(root, name) for name in names]
+    state = {"base": base, "dirs": dirs, "files": files, "method": link,
+             "texts": texts, "keys": keys, "overwrite": overwrite}
+    args = list(zip(casedirs, param_sets))
+    if nproc == 1 or len(args) < 2:
+        _init_sweep(state)
+        for a in args:
+            _make_case(a)
+    else:
+        pool = multiprocessing.Pool(nproc, _init_sweep, (state,))
+        try:
+            pool.map(_make_case, args)
+        finally:
+            pool.close()
+            pool.join()
+    if manifest is not None:
+        cases = [{"casedir": name, "params": {k: _jsonable(v) for k, v in
+                                              params.items()}}
+                 for name, params in zip(names, param_sets)]
+        with open(os.path.join(root, manifest), "w") as f:
+            json.dump({"base_casedir": os.path.abspath(base),
+                       "link": link, "cases": cases}, f, indent=2)
+    df = pandas.DataFrame(param_sets, index=casedirs)
+    df.index.name = "casedir"
+    return df
+
+
+def read_manifest(fpath):
+    """Read a sweep manifest as a DataFrame of parameters indexed by case
+    directory, relative to the directory of the manifest.
+    """
+    with open(fpath) as f:
+        manifest = json.load(f)
+    root = os.path.dirname(fpath)
+    cases = manifest["cases"]
+    df = pandas.DataFrame([case["params"] for case in cases],
+                          index=[os.path.join(root, case["casedir"])
+                                 for case in cases])
+    df.index.name = "casedir"
+    return df
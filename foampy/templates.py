@@ -2,9 +2,12 @@
 
 from __future__ import division, print_function, absolute_import
 import re
+import string
 import subprocess
 import os
+import multiprocessing
 import foampy
+from .dictionaries import write_atomic
 
 
 def to_snake_case(keyword):
@@ -41,15 +44,18 @@ def make_template(fpath, template_dir="templates", keywords=[], git=True,
         txt = f.read()
     txt = txt.replace("{", "{{")
     txt = txt.replace("}", "}}")
-    new_txt = ""
-    for line in txt.split("\n"):
-        for kw in keywords:
-            if line.strip().startswith(kw):
-                val = line.replace(";", " ").strip().split()[1]
-                line = line.replace(val, "{" + to_snake_case(kw) + "}")
-        new_txt += line + "\n"
+    lines = txt.split("\n")
+    if keywords:
+        fields = [(kw, "{" + to_snake_case(kw) + "}") for kw in keywords]
+        for n, line in enumerate(lines):
+            stripped = line.strip()
+            for kw, field in fields:
+                if stripped.startswith(kw):
+                    val = line.replace(";", " ").strip().split()[1]
+                    line = line.replace(val, field)
+            lines[n] = line
     with open(fpath_template, "w") as f:
-        f.write(new_txt)
+        f.write("\n".join(lines) + "\n")
     # Now delete old file
     if git and delete:
         try:
@@ -74,6 +80,39 @@ def make_template(fpath, template_dir="templates", keywords=[], git=True,
                     f.write(txt)
 
 
+_template_cache = {}
+
+
+def load_template(fpath):
+    """Load a template file, reusing the text from earlier calls unless the
+    file has changed.
+    """
+    stat = os.stat(fpath)
+    state = (stat.st_mtime_ns, stat.st_size)
+    key = os.path.abspath(fpath)
+    entry = _template_cache.get(key)
+    if entry is None or entry[0] != state:
+        with open(fpath) as f:
+            entry = (state, f.read())
+        _template_cache[key] = entry
+    return entry[1]
+
+
+def write_if_changed(fpath, txt):
+    """Write text to a file atomically unless it already has that content.
+    Returns ``True`` if the file was written.
+    """
+    try:
+        if os.path.getsize(fpath) == len(txt.encode()):
+            with open(fpath) as f:
+                if f.read() == txt:
+                    return False
+    except (IOError, OSError):
+        pass
+    write_atomic(fpath, txt)
+    return True
+
+
 def gen_from_template_dir(fpath_out, template_dir="templates", fname_out=None,
                           **params):
     """Generate a file from a template with the same relative path inside
@@ -82,10 +121,8 @@ def gen_from_template_dir(fpath_out, template_dir="templates", fname_out=None,
     fpath_template = os.path.join(template_dir, fpath_out)
     if fname_out is not None:
         fpath_out = os.path.join(os.path.dirname(fpath_out), fname_out)
-    with open(fpath_template) as f:
-        txt = f.read()
-    with open(fpath_out, "w") as f:
-        f.write(txt.format(**params))
+    txt = load_template(fpath_template)
+    write_if_changed(fpath_out, txt.format(**params))
 
 
 def fill_template(src, dest=None, **params):
@@ -94,7 +131,127 @@ def fill_template(src, dest=None, **params):
     """
     if dest is None:
         dest = src.replace(".template", "")
-    with open(src) as f:
-        txt = f.read()
-    with open(dest, "w") as f:
-        f.write(txt.format(**params))
+    write_if_changed(dest, load_template(src).format(**params))
+
+
+def template_keywords(txt):
+    """Return the set of keywords a template requires."""
+    keywords = set()
+    for _, field, _, _ in string.Formatter().parse(txt):
+        if field is None:
+            continue
+        name = re.split(r"[.\[]", field, maxsplit=1)[0]
+        if not name or name.isdigit():
+            raise ValueError("Templates must use named fields, not "
+                             "{{{}}}".format(field))
+        keywords.add(name)
+    return keywords
+
+
+class TemplateSet(object):
+    """All templates in a template directory, loaded and checked once.
+
+    The keywords required by each template are found when it is loaded, so
+    parameter sets can be validated before any files are written.
+
+    Parameters
+    ----------
+    template_dir : str
+        Directory of templates, whose paths relative to it are the paths of
+        the generated files relative to a case directory.
+    """
+    def __init__(self, template_dir="templates"):
+        self.template_dir = template_dir
+        self.templates = {}
+        self.keywords = {}
+        for dirpath, dirnames, fnames in os.walk(template_dir):
+            dirnames.sort()
+            for fname in sorted(fnames):
+                fpath = os.path.join(dirpath, fname)
+                relpath = os.path.relpath(fpath, template_dir)
+                txt = load_template(fpath)
+                self.templates[relpath] = txt
+                self.keywords[relpath] = template_keywords(txt)
+
+    def __len__(self):
+        return len(self.templates)
+
+    @property
+    def all_keywords(self):
+        """Set of keywords required by any template."""
+        return set().union(*self.keywords.values())
+
+    def missing(self, params, relpaths=None):
+        """Return a dict of templates and the keywords missing from
+        ``params`` to render them, for templates missing any.
+        """
+        if relpaths is None:
+            relpaths = self.templates
+        missing = {}
+        for relpath in relpaths:
+            m = self.keywords[relpath].difference(params)
+            if m:
+                missing[relpath] = sorted(m)
+        return missing
+
+    def validate(self, params, relpaths=None):
+        """Raise ``KeyError`` if ``params`` is missing keywords required by
+        the templates.
+        """
+        missing = self.missing(params, relpaths)
+        if missing:
+            raise KeyError("Missing template parameters: " + "; ".join(
+                "{}: {}".format(k, ", ".join(v))
+                for k, v in sorted(missing.items())))
+
+    def render(self, relpath, **params):
+        """Render one template to text."""
+        return self.templates[relpath].format(**params)
+
+    def render_case(self, casedir="./", params=None, relpaths=None):
+        """Render templates into a case directory, skipping files whose
+        content would not change.
+
+        Returns the list of files written.
+        """
+        params = params or {}
+        if relpaths is None:
+            relpaths = sorted(self.templates)
+        self.validate(params, relpaths)
+        written = []
+        for relpath in relpaths:
+            fpath = os.path.join(casedir, relpath)
+            dirname = os.path.dirname(fpath)
+            if dirname and not os.path.isdir(dirname):
+                os.makedirs(dirname)
+            if write_if_changed(fpath, self.render(relpath, **params)):
+                written.append(fpath)
+        return written
+
+    def _render_case(self, args):
+        return self.render_case(*args)
+
+    def render_cases(self, casedirs, param_sets, relpaths=None, nproc=None):
+        """Render templates into many case directories, with one parameter
+        dict per case.
+
+        All parameter sets are validated before any files are written.
+        Cases are rendered with ``nproc`` worker processes (defaults to the
+        number of CPUs); if 1, they are rendered serially in this process.
+        Returns a list of the files written for each case.
+        """
+        param_sets = list(param_sets)
+        if len(param_sets) != len(casedirs):
+            raise ValueError("Need one parameter set per case")
+        for params in param_sets:
+            self.validate(params, relpaths)
+        args = [(casedir, params, relpaths) for casedir, params
+                in zip(casedirs, param_sets)]
+        if nproc == 1 or len(args) < 2:
+            return [self._render_case(a) for a in args]
+        pool = multiprocessing.Pool(nproc)
+        try:
+            return pool.map(self._render_case, args)
+        finally:
+            pool.close()
+            pool.join()
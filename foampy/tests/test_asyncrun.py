@@ -0,0 +1,48 @@
+"""Tests for the `asyncrun` module."""
+
+from __future__ import division, print_function, absolute_import
+import sys
+import time
+import asyncio
+import pytest
+from foampy.asyncrun import *
+
+solver_script = """
+import sys
+for n in range(1, 4):
+    print("Time = {}".format(n*0.1))
+    print("deltaT = 0.1")
+    print("ExecutionTime = {} s  ClockTime = {} s".format(n*0.5, n))
+    print()
+sys.exit(3)
+"""
+
+
+def test_run_async(tmpdir):
+    """Test running an application with streamed output."""
+    lines = []
+    events = []
+    returncode = asyncio.run(run_async(sys.executable, casedir=str(tmpdir),
+                                       args=["-c", solver_script],
+                                       logname="log.solver",
+                                       on_output=lines.append,
+                                       on_progress=events.append))
+    assert returncode == 3
+    assert lines[0] == "Time = 0.1"
+    assert len(lines) == 12
+    assert tmpdir.join("log.solver").read().splitlines() == lines
+    assert len(events) == 3
+    assert events[-1] == {"time": 0.30000000000000004, "delta_t": 0.1,
+                          "exectime": 1.5, "clocktime": 3.0}
+    with pytest.raises(IOError):
+        asyncio.run(run_async(sys.executable, casedir=str(tmpdir),
+                              logname="log.solver"))
+
+
+def test_run_async_timeout(tmpdir):
+    """Test that applications are stopped on timeout."""
+    t0 = time.time()
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(run_async("sleep", casedir=str(tmpdir), args=["10"],
+                              timeout=0.2))
+    assert time.time() - t0 < 5
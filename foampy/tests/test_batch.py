@@ -0,0 +1,39 @@
+"""Tests for the `batch` module."""
+
+from __future__ import division, print_function, absolute_import
+import os
+import pytest
+from foampy.batch import *
+
+
+def test_run_batch(tmpdir):
+    """Test running and resuming a batch of jobs."""
+    casedirs = [str(tmpdir.mkdir("case{}".format(n))) for n in range(4)]
+    ledger = str(tmpdir.join("ledger.jsonl"))
+    jobs = [(casedir, "sleep", 1, ["0.3"]) for casedir in casedirs]
+    jobs += [(casedirs[0], "false", 1), (casedirs[0], "true", 1),
+             (casedirs[1], "notAnApplication", 1)]
+    df = run_batch(jobs, ncores=4, ledger=ledger, verbose=False)
+    # The sleep jobs run at the same time
+    ends = df.start[:4] + df.walltime[:4]
+    assert df.start[:4].max() < ends.min()
+    assert list(df.state) == ["done"]*4 + ["failed", "skipped", "failed"]
+    assert list(df.returncode[:5]) == [0, 0, 0, 0, 1]
+    assert (df.walltime[:4] >= 0.3).all()
+    assert os.path.isfile(os.path.join(casedirs[0], "log.sleep"))
+    # Nothing is run again when resuming
+    starts = list(df.start[:5])
+    df = run_batch(jobs, ncores=4, ledger=ledger, verbose=False)
+    assert list(df.start[:5]) == starts
+    assert list(df.state) == ["done"]*4 + ["failed", "skipped", "failed"]
+    jobs[4] = (casedirs[0], "true", 1, ["-a"])
+    df = run_batch(jobs, ncores=1, ledger=ledger, verbose=False)
+    assert list(df.state[4:]) == ["done", "done", "failed"]
+
+
+def test_run_batch_duplicate_jobs(tmpdir):
+    """Test that jobs with the same key are rejected."""
+    casedir = str(tmpdir)
+    with pytest.raises(ValueError):
+        run_batch([(casedir, "true", 1), (casedir, "true", 1)],
+                  verbose=False)
@@ -0,0 +1,43 @@
+"""Tests for the `cache` module."""
+
+from __future__ import division, print_function, absolute_import
+import os
+import shutil
+import numpy as np
+import foampy
+from foampy import cache
+
+
+def test_cache(tmpdir):
+    index_fpath = cache.index_fpath
+    cache.index_fpath = str(tmpdir.join("cache_index"))
+    casedir = str(tmpdir.join("case"))
+    shutil.copytree("test/postProcessing", os.path.join(casedir,
+                                                         "postProcessing"))
+    fpath = os.path.join(casedir, "postProcessing", "forces", "0",
+                         "forces.dat")
+    cache.enable()
+    try:
+        df = foampy.load_forces(casedir=casedir, start_time=0)
+        sidecar = cache.sidecar_path(fpath)
+        assert os.path.isfile(sidecar)
+        data = foampy.read_numeric_data(fpath)
+        assert isinstance(data, np.memmap)
+        assert np.all(data[:, 0] == df.time)
+        foampy.load_probes_data(casedir=casedir)
+        assert cache.size() > os.path.getsize(sidecar)
+        # Evict everything but the most recently used sidecar
+        os.utime(sidecar, (0, 0))
+        cache.evict(cache.size() - 1)
+        assert not os.path.isfile(sidecar)
+        foampy.read_numeric_data(fpath)
+        assert os.path.isfile(sidecar)
+        cache.invalidate(fpath)
+        assert not os.path.isfile(sidecar)
+        foampy.read_numeric_data(fpath)
+        cache.clear()
+        assert not os.path.isfile(sidecar)
+        assert cache.size() == 0
+    finally:
+        cache.disable()
+        cache.index_fpath = index_fpath
@@ -2,6 +2,7 @@
 
 from __future__ import division, print_function, absolute_import
 import foampy
+import pytest
 import os
 import numpy as np
 
@@ -26,6 +27,23 @@ def test_gen_dynmeshdict():
     os.system("git checkout test/constant/dynamicMeshDict")
 
 
+def test_gen_dynmeshdict_omega(tmpdir):
+    """Test writing a custom omega table and integrating it for theta."""
+    tmpdir.mkdir("constant")
+    t = np.linspace(0, 2, 101)
+    omega = 2*t
+    foampy.gen_dynmeshdict(1, 1, 1, t=t, omega=omega, casedir=str(tmpdir))
+    t2, theta, omega2 = foampy.load_theta_omega(str(tmpdir),
+                                                theta_units="radians")
+    assert (t2 == t).all()
+    assert (omega2 == omega).all()
+    assert np.allclose(theta, t**2)
+    foampy.gen_dynmeshdict(1, 1, 1, t=t, omega=np.sin, casedir=str(tmpdir))
+    t2, theta, omega2 = foampy.load_theta_omega(str(tmpdir),
+                                                theta_units="radians")
+    assert np.allclose(theta, 1 - np.cos(t), atol=1e-4)
+
+
 def test_run():
     foampy.run("blockMesh", args=["-help"], tee=True)
     assert os.path.isfile("log.blockMesh")
@@ -65,6 +83,13 @@ def test_get_solver_times():
 def test_read_dict():
     d = foampy.read_dict(casedir="test", dictname="controlDict")
     assert d["application"] == "pimpleDyMFoam"
+    assert d["deltaT"] == "2e-4"
+    # Nested entries are flattened by default
+    d = foampy.read_dict(casedir="test", dictname="fvSolution")
+    assert d["nCorrectors"] == "2"
+    d = foampy.read_dict(casedir="test", dictname="fvSolution", tree=True)
+    assert "nCorrectors" not in d
+    assert d["PIMPLE"]["nCorrectors"] == 2
 
 
 def test_load_forces():
@@ -77,3 +102,206 @@ def test_load_probes_data():
     print(df)
     df2 = foampy.load_probes_data(casedir="test", field_name="p")
     print(df2)
+
+
+def test_parse_numeric_data():
+    data = (b"# Time  forces\n"
+            b"1.0\t((1 2 3) (4 5 6))\n"
+            b"2.0\t((7 8 9) (10 11 12))\n"
+            b"3.0\t((13 14")
+    a = foampy.parse_numeric_data(data)
+    assert a.shape == (2, 7)
+    assert a[1, -1] == 12
+    assert foampy.parse_numeric_data(b"# Header only\n").size == 0
+    # The last line of a finished file may have no newline
+    data = data[:data.rstrip().rfind(b"\n") + 1]
+    a = foampy.parse_numeric_data(data + b"3.0\t((13 14 15) (1 2 3))",
+                                  complete=True)
+    assert a.shape == (3, 7)
+    assert a[2, 3] == 15
+
+
+def test_data_file_follower(tmpdir):
+    fpath = str(tmpdir.mkdir("postProcessing").mkdir("forces").mkdir("0")
+                .join("forces.dat"))
+    with open("test/postProcessing/forces/0/forces.dat", "rb") as f:
+        lines = f.readlines()
+    with open(fpath, "wb") as f:
+        f.write(b"".join(lines[:10]) + lines[10][:20])
+    follower = foampy.ForcesFollower(casedir=str(tmpdir))
+    df = follower.read()
+    assert len(df) == 7
+    assert len(follower.read()) == 0
+    with open(fpath, "ab") as f:
+        f.write(lines[10][20:] + b"".join(lines[11:20]))
+    df = follower.read()
+    assert len(df) == 10
+    assert df.time.iloc[0] == 2e-3*8
+    follower = foampy.ProbesFollower(casedir="test")
+    assert len(follower.read()) == 5
+    assert len(follower.read()) == 0
+    # Following a probes file before the solver writes to it
+    with open("test/postProcessing/probes/0/U", "rb") as f:
+        lines = f.readlines()
+    probesdir = tmpdir.mkdir("probes").mkdir("postProcessing").mkdir(
+        "probes").mkdir("0")
+    fpath = str(probesdir.join("U"))
+    open(fpath, "wb").close()
+    follower = foampy.ProbesFollower(casedir=str(tmpdir.join("probes")))
+    assert len(follower.read()) == 0
+    with open(fpath, "ab") as f:
+        f.write(lines[0] + lines[1][:10])
+    assert len(follower.read()) == 0
+    with open(fpath, "ab") as f:
+        f.write(lines[1][10:] + b"".join(lines[2:4]))
+    assert len(follower.read()) == 0
+    with open(fpath, "ab") as f:
+        f.write(b"".join(lines[4:]))
+    df = follower.read()
+    assert len(df) == 5
+    assert df[(0.102, 0.102, 9.872)].iloc[0] == (-9.85204573955e-06,
+                                                 -7.97569804085e-06,
+                                                 1.20819496995e-05)
+    assert len(follower.read()) == 0
+
+
+def test_load_all_forces_data():
+    fpaths = foampy.find_forces_files(casedir="test")
+    assert [os.path.basename(os.path.dirname(f)) for f in fpaths] \
+        == ["0", "3.84"]
+    data = foampy.load_all_forces_data(casedir="test")
+    assert np.all(np.diff(data[:, 0]) > 0)
+    assert data[0, 0] == 2e-3
+    assert data[-1, 0] == 4.0
+    # Rows of the first run from 3.842 onwards are replaced by the restart
+    df = foampy.load_forces(casedir="test", start_time=0)
+    assert len(data) == len(df) - 6 + 80
+
+
+def test_load_probes_array():
+    t, data, locs = foampy.load_probes_array(casedir="test")
+    assert data.shape == (5, 2, 3)
+    assert not data.flags.owndata
+    assert locs.loc[1, "x"] == 0.102
+    df = foampy.load_probes_data(casedir="test")
+    assert df[(0.102, 0.102, 9.872)][0] == tuple(data[0, 1])
+    df = foampy.load_probes_data(casedir="test", multiindex=True)
+    assert df[1]["z"].iloc[0] == data[0, 1, 2]
+
+
+def test_iter_forces():
+    chunks = list(foampy.iter_forces(casedir="test", chunksize=500))
+    assert [len(c) for c in chunks] == [500, 500, 500, 420, 80]
+    df = foampy.load_forces(casedir="test")
+    assert np.all(np.concatenate([c.fx for c in chunks]) == df.fx)
+    chunks = list(foampy.iter_forces(casedir="test", start_time=0,
+                                     chunksize=1000, as_array=True))
+    assert sum(len(c) for c in chunks) == 1926
+
+
+def test_iter_probes_data():
+    chunks = list(foampy.iter_probes_data(casedir="test", chunksize=2,
+                                          as_array=True))
+    assert [c[1].shape for c in chunks] == [(2, 2, 3), (2, 2, 3), (1, 2, 3)]
+    chunks = list(foampy.iter_probes_data(casedir="test", chunksize=2,
+                                          multiindex=True))
+    assert len(chunks[-1]) == 1
+
+
+def test_summarize_cases():
+    df = foampy.summarize_cases(["test", "does-not-exist", "test"], nproc=2,
+                                sweep="a")
+    assert list(df.index) == ["test", "does-not-exist", "test"]
+    assert df.delta_t["test"].tolist() == [2e-4, 2e-4]
+    assert df.error.isnull().tolist() == [True, False, True]
+    assert "FileNotFoundError" in df.error["does-not-exist"] \
+        or "IOError" in df.error["does-not-exist"]
+    assert df.sweep.iloc[0] == "a"
+
+
+def _write_sets(tmpdir, times, npoints=5):
+    folder = tmpdir.mkdir("postProcessing").mkdir("sets")
+    folder.mkdir("notATime")
+    y = np.linspace(0, 1, npoints)
+    for t in times:
+        data = np.column_stack([y] + [y*float(t) + n for n in range(3)])
+        np.savetxt(str(folder.mkdir(t).join("profile_U.xy")), data)
+    return y
+
+
+def test_set_collection(tmpdir):
+    """Test indexing and loading sets with `SetCollection`."""
+    y = _write_sets(tmpdir, ["1", "0", "0.5", "2"])
+    sets = foampy.SetCollection(str(tmpdir), axis="y")
+    assert len(sets) == 4
+    assert sets.time_values == [0, 0.5, 1, 2]
+    assert sets.names == ["profile_U.xy"]
+    t, data = sets.load("profile_U.xy")
+    assert data.shape == (4, 5, 3)
+    assert (t == [0, 0.5, 1, 2]).all()
+    assert np.allclose(data[3, :, 1], 2*y + 1)
+    t, data = sets.load("profile_U.xy", start=0.5, stop=1)
+    assert (t == [0.5, 1]).all()
+    t, data = sets.load("profile_U.xy", time=2, coordinates=True)
+    assert data.shape == (1, 5, 4)
+    assert np.allclose(data[0, :, 0], y)
+    assert np.allclose(sets.coordinates("profile_U.xy")[:, 0], y)
+    d = foampy.load_set(str(tmpdir), axis="y")
+    assert d["time"] == [0, 0.5, 1, 2]
+    assert np.allclose(d[0.5]["w"], 0.5*y + 2)
+    assert np.allclose(d[1]["y"], y)
+    d = foampy.load_sample_xy(str(tmpdir))
+    assert d["u"].shape == (5, 4)
+    assert np.allclose(d["v"][:, 2], y + 1)
+
+
+def test_set_collection_cache(tmpdir):
+    """Test that cache sidecars are not listed as sets."""
+    _write_sets(tmpdir, ["0", "1"])
+    index_fpath = foampy.cache.index_fpath
+    foampy.cache.index_fpath = str(tmpdir.join("cache_index"))
+    foampy.cache.enable()
+    try:
+        foampy.SetCollection(str(tmpdir), axis="y").load("profile_U.xy")
+        sets = foampy.SetCollection(str(tmpdir), axis="y")
+        assert len(os.listdir(sets.folder + "/0")) == 2
+        assert sets.names == ["profile_U.xy"]
+        assert foampy.load_set(str(tmpdir), axis="y")["time"] == [0, 1]
+    finally:
+        foampy.cache.clear()
+        foampy.cache.disable()
+        foampy.cache.index_fpath = index_fpath
+
+
+def test_tail_lines(tmpdir):
+    """Test reading lines from the end of a file."""
+    with open("test/log.icoFoam", "rb") as f:
+        lines = f.read().splitlines()
+    for blocksize in [1, 7, 4096]:
+        for n in [1, 20, 2000]:
+            tail = foampy.tail_lines("test/log.icoFoam", n,
+                                     blocksize=blocksize)
+            assert tail == lines[-n:]
+        tail = foampy.tail_lines("test/log.icoFoam", pattern="^Time = ",
+                                 count=2, blocksize=blocksize)
+        assert tail[0] == b"Time = 0.035"
+        assert tail == lines[-len(tail):]
+    fpath = tmpdir.join("no_newline")
+    fpath.write("a\nb\nc")
+    assert foampy.tail_lines(str(fpath), 2, blocksize=1) == [b"b", b"c"]
+    assert foampy.tail_lines(str(fpath), pattern="x") == [b"a", b"b", b"c"]
+    td = foampy.get_solver_times(log_fpath="test/log.icoFoam", nsteps=1)
+    assert td["time"] == [0.035, 0.04]
+    assert td["exectime"][-1] == 0.02
+
+
+def test_get_ncells(tmpdir):
+    """Test reading counts from the checkMesh log."""
+    assert foampy.get_ncells(casedir="test") > 0
+    with pytest.raises(KeyError):
+        foampy.get_ncells(casedir="test", keyword="notAKeyword")
+    # A failed checkMesh run leaves no log behind
+    casedir = str(tmpdir)
+    with pytest.raises(RuntimeError):
+        foampy.get_ncells(casedir=casedir, keyword="faces:")
+    assert os.listdir(casedir) == []
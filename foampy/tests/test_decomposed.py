@@ -0,0 +1,102 @@
+"""Tests for the `decomposed` module."""
+
+from __future__ import division, print_function, absolute_import
+import numpy as np
+import pytest
+import foampy.fields
+from foampy.decomposed import *
+
+header = """FoamFile
+{{
+    version     2.0;
+    format      {fmt};
+    class       {cls};
+    arch        "LSB;label=32;scalar=64";
+    object      {name};
+}}
+"""
+
+
+def write_list(fpath, cls, name, values, fmt="ascii", field=True):
+    if fmt == "binary":
+        body = b"(" + values.tobytes() + b")"
+    else:
+        rows = ["({})".format(" ".join(map(str, v))) if np.ndim(v) else
+                str(v) for v in values.tolist()]
+        body = ("(\n" + "\n".join(rows) + "\n)").encode()
+    txt = header.format(fmt=fmt, cls=cls, name=name).encode()
+    if field:
+        txt += b"dimensions [0 1 -1 0 0 0 0];\ninternalField nonuniform "
+        txt += "List<{}> ".format("vector" if values.ndim > 1
+                                  else "scalar").encode()
+        txt += str(len(values)).encode() + body + b";\n"
+        txt += b"boundaryField\n{\n}\n"
+    else:
+        txt += str(len(values)).encode() + body + b"\n"
+    fpath.write_binary(txt)
+
+
+def make_case(tmpdir):
+    """Decompose a case of 10 cells into 3 processors."""
+    U = np.arange(30, dtype=float).reshape(10, 3)
+    p = np.arange(10, dtype=float)/10
+    addressing = [np.array([0, 3, 6, 9]), np.array([1, 4, 7]),
+                  np.array([2, 5, 8])]
+    for n, a in enumerate(addressing):
+        procdir = tmpdir.mkdir("processor{}".format(n))
+        write_list(procdir.mkdir("constant").mkdir("polyMesh").join(
+            "cellProcAddressing"), "labelList", "cellProcAddressing",
+            a.astype("<i4"), fmt="binary" if n == 1 else "ascii",
+            field=False)
+        timedir = procdir.mkdir("0.5")
+        write_list(timedir.join("U"), "volVectorField", "U", U[a],
+                   fmt="binary" if n == 2 else "ascii")
+        write_list(timedir.join("p"), "volScalarField", "p", p[a])
+        procdir.mkdir("0").join("p").write(
+            header.format(fmt="ascii", cls="volScalarField", name="p")
+            + "internalField uniform 2;\nboundaryField\n{\n}\n")
+    return U, p
+
+
+def test_decomposed_case(tmpdir):
+    U, p = make_case(tmpdir)
+    case = DecomposedCase(str(tmpdir), workers=1)
+    assert case.times == ["0", "0.5"]
+    assert case.ncells == 10
+    fields = case.read_fields(["U", "p"], 0.5)
+    assert np.array_equal(fields["U"], U)
+    assert np.array_equal(fields["p"], p)
+    assert np.array_equal(case.read_field("p", "0"), np.full(10, 2.0))
+    # Subsets of processors and cells
+    assert np.array_equal(case.cells([0, 2]), [0, 2, 3, 5, 6, 8, 9])
+    assert np.array_equal(case.read_field("U", 0.5, processors=[0, 2]),
+                          U[[0, 2, 3, 5, 6, 8, 9]])
+    cells = [9, 1, 4]
+    assert np.array_equal(case.read_field("U", 0.5, cells=cells), U[cells])
+    with pytest.raises(ValueError):
+        case.read_field("U", 0.5, processors=[0], cells=cells)
+    # Reading with a pool, and through `load_field`
+    case = DecomposedCase(str(tmpdir), workers=2)
+    assert np.array_equal(case.read_field("U", "0.5"), U)
+    assert np.array_equal(foampy.fields.load_field(str(tmpdir), "0.5", "p"),
+                          p)
+
+
+def test_decomposed_case_changing_mesh(tmpdir):
+    """Test reading with the addressing of a time's own mesh."""
+    U, p = make_case(tmpdir)
+    # A refined mesh of 12 cells at time 1
+    p1 = np.arange(12, dtype=float)
+    addressing = [np.array([0, 1, 2, 3]), np.array([4, 5, 6, 7]),
+                  np.array([8, 9, 10, 11])]
+    for n, a in enumerate(addressing):
+        timedir = tmpdir.join("processor{}".format(n)).mkdir("1")
+        write_list(timedir.mkdir("polyMesh").join("cellProcAddressing"),
+                   "labelList", "cellProcAddressing", a.astype("<i4"),
+                   field=False)
+        write_list(timedir.join("p"), "volScalarField", "p", p1[a])
+    case = DecomposedCase(str(tmpdir), workers=1)
+    assert np.array_equal(case.read_field("p", 1), p1)
+    assert np.array_equal(case.read_field("p", 1, cells=[11, 0]), [11, 0])
+    assert np.array_equal(case.read_field("p", 0.5), p)
+    assert case.ncells == 10
@@ -2,6 +2,7 @@
 
 from __future__ import division, print_function, absolute_import
 import foampy
+import pytest
 from foampy.dictionaries import *
 
 
@@ -49,3 +50,153 @@ FoamFile
 |   \\  /    A nd           | Web:      www.OpenFOAM.org                      |
 |    \\/     M anipulation  |                                                 |
 \*---------------------------------------------------------------------------*/"""
+
+
+def test_parse_dict():
+    """Test the `dictionaries.parse_dict` function."""
+    txt = """
+    /* Block comment */
+    a   1;  // Line comment
+    b   2.5e-3;
+    c   "quoted string";
+    d   Gauss linear;
+    e   (1 2 (3 4) "five");
+    f   3(0 1 2);
+    div((nuEff*dev(T(grad(U))))) Gauss linear;
+    sub
+    {
+        g   $a;
+        sub2 { h yes; }
+    }
+    sub3
+    {
+        $sub;
+        i   ;
+    }
+    code #{ int x = 1; #};
+    j   ${a};
+    k   ${sub.sub2.h};
+    """
+    d = parse_dict(txt)
+    assert d["a"] == 1
+    assert d["b"] == 2.5e-3
+    assert d["c"] == '"quoted string"'
+    assert d["d"] == "Gauss linear"
+    assert d["e"] == [1, 2, [3, 4], '"five"']
+    assert d["f"] == [0, 1, 2]
+    assert d["div((nuEff*dev(T(grad(U)))))"] == "Gauss linear"
+    assert d["sub"]["g"] == 1
+    assert d["sub"]["sub2"]["h"] == "yes"
+    assert d["sub3"]["sub2"]["h"] == "yes"
+    assert d["sub3"]["i"] == ""
+    assert d["code"].startswith("#{")
+    assert d["j"] == 1
+    assert d["k"] == "yes"
+    assert lookup_keyword(d, "sub.sub2.h") == "yes"
+    assert lookup_keyword(d, "h") == "yes"
+    assert lookup_keyword(d, "missing") is None
+
+
+def test_parse_dict_file():
+    """Test parsing dictionaries from the test case."""
+    d = parse_dict_file("test/system/fvSolution")
+    assert d["solvers"]["pFinal"]["solver"] == "GAMG"
+    assert d["solvers"]["pFinal"]["relTol"] == 0
+    assert d["solvers"]['"(U|k|omega)"']["relTol"] == 0.1
+    d = parse_dict_file("test/system/snappyHexMeshDict")
+    # Entries from #include "meshQualityDict"
+    assert "maxNonOrtho" in d["meshQualityControls"]
+    d = parse_dict_file("test/system/blockMeshDict")
+    assert d["vertices"][1] == [2.16, 1.83, -1.22]
+    assert d["edges"] == []
+
+
+def test_parse_dict_include(tmpdir):
+    """Test resolving ``#include`` directives."""
+    casedir = tmpdir.mkdir("case")
+    casedir.mkdir("constant").join("commonDict").write("a 1;\n")
+    fpath = casedir.mkdir("system").join("someDict")
+    fpath.write('#include "$FOAM_CASE/constant/commonDict"\nb $a;\n')
+    d = parse_dict_file(str(fpath))
+    assert d["a"] == 1
+    assert d["b"] == 1
+    with pytest.raises(ValueError):
+        parse_dict("a 1;\n#include")
+
+
+def test_read_dict_cached(tmpdir):
+    """Test the parsed dictionary cache."""
+    clear_dict_cache()
+    foampy.get_deltat(casedir="test")
+    foampy.get_endtime(casedir="test")
+    foampy.get_max_courant_no(casedir="test")
+    info = dict_cache_info()
+    assert info["misses"] == 1
+    assert info["hits"] == 2
+    fpath = str(tmpdir.join("someDict"))
+    with open(fpath, "w") as f:
+        f.write("a 1;")
+    assert read_dict_cached(fpath)["a"] == 1
+    with open(fpath, "w") as f:
+        f.write("a 22;")
+    assert read_dict_cached(fpath)["a"] == 22
+    assert dict_cache_info()["misses"] == 3
+    # Copies from read_dict can be modified without changing the cache
+    d = foampy.read_dict(dictpath=fpath, tree=True)
+    d["a"] = 0
+    assert read_dict_cached(fpath)["a"] == 22
+    # Creating a missing #includeIfPresent file invalidates the entry
+    with open(fpath, "w") as f:
+        f.write('a 22;\n#includeIfPresent "extraDict"\n')
+    assert "b" not in read_dict_cached(fpath)
+    with open(str(tmpdir.join("extraDict")), "w") as f:
+        f.write("b 3;")
+    assert read_dict_cached(fpath)["b"] == 3
+
+
+def test_replace_values(tmpdir):
+    """Test replacing many values in one pass."""
+    dictpath = tmpdir.join("fvSolution")
+    dictpath.write(open("test/system/fvSolution").read())
+    replace_values(str(dictpath), {"PIMPLE.nCorrectors": 3,
+                                   "solvers.p.tolerance": 1e-8,
+                                   "solvers.\"(U|k|omega)\".relTol": 0.2,
+                                   "relaxationFactors.fields": {"p": 0.5}})
+    txt = dictpath.read()
+    assert "tolerance       1e-08; // 1e-6" in txt
+    tree = parse_dict_file(str(dictpath))
+    assert tree["PIMPLE"]["nCorrectors"] == 3
+    assert tree["solvers"]["p"]["tolerance"] == 1e-8
+    assert tree["solvers"]["pFinal"]["tolerance"] == 1e-5
+    assert tree["solvers"]["\"(U|k|omega)\""]["relTol"] == 0.2
+    assert tree["relaxationFactors"]["fields"]["p"] == 0.5
+    assert tree["relaxationFactors"]["equations"]
+    with pytest.raises(KeyError):
+        replace_values(str(dictpath), {"PIMPLE.nCorrectors": 4,
+                                       "PIMPLE.missing": 1})
+    assert dictpath.read() == txt
+    with pytest.raises(KeyError):
+        replace_value(str(dictpath), "missing", 1)
+    # A sub-dictionary replaced by a single value
+    replace_values(str(dictpath), {"PIMPLE": 3})
+    assert parse_dict_file(str(dictpath))["PIMPLE"] == 3
+    sub = FoamSubDict(name="PISO", nCorrectors=2)
+    format_value(sub)
+    assert sub.name == "PISO"
+
+
+def test_replace_values_cases(tmpdir):
+    """Test replacing values in many cases in parallel."""
+    casedirs = []
+    for n in range(3):
+        casedir = tmpdir.mkdir("case{}".format(n))
+        casedir.mkdir("system").join("controlDict").write(
+            open("test/system/controlDict").read())
+        casedirs.append(str(casedir))
+    replace_values_cases(casedirs, "controlDict",
+                         [{"endTime": n, "writeControl": "runTime"}
+                          for n in range(3)], nproc=2)
+    for n, casedir in enumerate(casedirs):
+        d = read_dict_cached(casedir + "/system/controlDict")
+        assert d["endTime"] == n
+        assert d["writeControl"] == "runTime"
@@ -0,0 +1,93 @@
+"""Tests for the `fields` module."""
+
+from __future__ import division, print_function, absolute_import
+import numpy as np
+from foampy.fields import *
+
+header = """FoamFile
+{{
+    version     2.0;
+    format      {fmt};
+    class       volVectorField;
+    arch        "LSB;label=32;scalar=64";
+    location    "0";
+    object      U;
+}}
+
+dimensions      [0 1 -1 0 0 0 0];
+
+internalField   nonuniform List<vector> {n}
+"""
+
+boundary = """boundaryField
+{{
+    inlet
+    {{
+        type            fixedValue;
+        value           uniform (1 0 0);
+    }}
+    outlet
+    {{
+        type            zeroGradient;
+    }}
+    wall
+    {{
+        type            fixedValue;
+        value           nonuniform List<vector> 2{values};
+    }}
+}}
+"""
+
+
+def write_field(fpath, fmt, internal, wall):
+    if fmt == "binary":
+        internal_txt = b"(" + internal.astype("<f8").tobytes() + b")"
+        wall_txt = b"(" + wall.astype("<f8").tobytes() + b")"
+    else:
+        internal_txt = ("(\n" + "\n".join("({} {} {})".format(*v)
+                                          for v in internal)
+                        + "\n)").encode()
+        wall_txt = ("(" + " ".join("({} {} {})".format(*v) for v in wall)
+                    + ")").encode()
+    with open(fpath, "wb") as f:
+        f.write(header.format(fmt=fmt, n=len(internal)).encode())
+        f.write(internal_txt + b"\n;\n\n")
+        f.write(boundary.format(values="{values}").encode()
+                .replace(b"{values}", wall_txt))
+
+
+def test_foamfield(tmpdir):
+    internal = np.arange(9.0).reshape(3, 3) + 0.5
+    wall = np.array([[0.0, 0.0, -1e-3], [1.0, 2.0, 3.0]])
+    for fmt in ["ascii", "binary"]:
+        fpath = str(tmpdir.join("U_" + fmt))
+        write_field(fpath, fmt, internal, wall)
+        field = FoamField(fpath)
+        assert field.format == fmt
+        assert field.value_type == "vector"
+        assert field.dimensions == "[0 1 -1 0 0 0 0]"
+        assert not field.uniform
+        assert np.all(field.internal_field == internal)
+        patches = field.boundary_field
+        assert list(patches) == ["inlet", "outlet", "wall"]
+        assert patches["inlet"]["value"] == "uniform (1 0 0)"
+        assert np.all(patches["wall"]["value"] == wall)
+    # Binary data is not copied
+    assert not field.internal_field.flags.writeable
+
+
+def test_load_field_uniform(tmpdir):
+    tmpdir.mkdir("0").join("p").write("""FoamFile
+{
+    format      ascii;
+    class       volScalarField;
+    object      p;
+}
+dimensions      [0 2 -2 0 0 0 0];
+internalField   uniform 0;
+boundaryField
+{
+}
+""")
+    assert load_field(casedir=str(tmpdir), time=0, name="p") == 0
+    assert FoamField(str(tmpdir.join("0", "p"))).uniform
@@ -1,6 +1,7 @@
 """Tests for the `foil` module."""
 
 from __future__ import division, print_function, absolute_import
+import pytest
 from foampy.foil import *
 
 
@@ -38,3 +39,49 @@ def test_mirror_foildata():
     reformat_foildata("test/NACA_0021.dat", "test/NACA_0021_4.txt",
                       startline=57)
     mirror_foildata("test/NACA_0021_4.txt", "test/NACA_0021_4_m.txt")
+
+
+def test_foildata_read_write(tmpdir):
+    fpath = str(tmpdir.join("foil.dat"))
+    with open(fpath, "w") as f:
+        f.write("Some foil\n(alpha cl cd)\n(-1, -0.1, 0.01)\n(0 0 0.008)\n"
+                "(1 0.1 0.01 0.02 5)\n\n(2 0.2 0.02)\n")
+    fd = FoilData()
+    fd.read(fpath, comments=True)
+    assert fd.alpha.tolist() == [-1, 0, 1]
+    assert fd.cl.tolist() == [-0.1, 0, 0.1]
+    assert fd.cm.tolist() == [0, 0, 0.02]
+    assert fd.comments == ["Some foil\n", "alpha cl cd\n"]
+    fd.write(fpath)
+    with open(fpath) as f:
+        assert f.read() == ("// Some foil\n// alpha cl cd\n"
+                            "(-1.0 -0.1 0.01 0.0)\n(0.0 0.0 0.008 0.0)\n"
+                            "(1.0 0.1 0.01 0.02)\n")
+
+
+def test_foil_database(tmpdir):
+    db = read_foil_database("test/NACA_0021.dat")
+    assert db.re[:3].tolist() == [1e4, 2e4, 4e4]
+    assert db.coeffs.shape == (len(db.re), len(db.alpha), 3)
+    fd = FoilData()
+    fd.read("test/NACA_0021.dat", startline=118)
+    # Exact table points, then halfway in alpha and in log(Re)
+    assert np.allclose(db.cl(fd.alpha, 2e4), fd.cl)
+    i = np.flatnonzero(fd.alpha == 8)[0]
+    assert np.isclose(db.cd(8.5, 2e4), (fd.cd[i] + fd.cd[i + 1])/2)
+    assert np.isclose(db.cl(8, np.sqrt(2e4*4e4)),
+                      (db.cl(8, 2e4) + db.cl(8, 4e4))/2)
+    assert np.allclose(db.table(4e4).cm, db.cm(db.alpha, 4e4))
+    # Batched queries broadcast, and are clamped outside the data
+    c = db.coefficients(np.linspace(-10, 10, 5)[:, None], [1e3, 1e4, 1e8])
+    assert c.shape == (5, 3, 3)
+    assert np.allclose(c[:, 0], c[:, 1])
+    assert np.allclose(c[:, 2], db.coefficients(np.linspace(-10, 10, 5),
+                                                db.re[-1]))
+    fpath = str(tmpdir.join("db.dat"))
+    db.write(fpath)
+    db2 = read_foil_database(fpath)
+    assert np.array_equal(db2.re, db.re)
+    assert np.array_equal(db2.coeffs, db.coeffs)
+    with pytest.raises(ValueError):
+        db.cl(0, 0)
@@ -0,0 +1,68 @@
+"""Tests for the `logs` module."""
+
+from __future__ import division, print_function, absolute_import
+import numpy as np
+from foampy.logs import *
+
+
+def test_parse_log():
+    """Test parsing a solver log."""
+    df = parse_log("test/log.icoFoam")
+    assert len(df) == 8
+    assert df.time.iloc[0] == 0.005
+    assert df.time.iloc[-1] == 0.04
+    assert df.courant_max.iloc[1] == 0.585607
+    assert df.Ux_initial.iloc[1] == 0.160686
+    # p is solved twice per time step
+    assert df.p_initial.iloc[1] == 0.428925
+    assert df.p_final.iloc[1] == 5.26569e-07
+    assert df.p_iterations.iloc[1] == 22 + 33
+    assert df.continuity_cumulative.iloc[0] == -4.44444e-19
+    assert df.exectime.iloc[-1] == 0.02
+    assert df.attrs["solvers"] == {"Ux": "smoothSolver", "Uy": "smoothSolver",
+                                   "p": "DICPCG"}
+    df2 = parse_log("test/log.icoFoam", chunksize=100)
+    assert df2.equals(df)
+
+
+def test_log_parser():
+    """Test parsing a log incrementally."""
+    parser = LogParser()
+    parser.feed(b"Courant Number mean: 0 max: 0\nTime = 1\n\ndeltaT = 0.5\n"
+                b"GAMG:  Solving for p, Initial residual = 1, "
+                b"Final residual = 0.01, No Iterations 3\n")
+    df = parser.dataframe()
+    assert len(df) == 1
+    assert df.delta_t[0] == 0.5
+    assert df.courant_max[0] == 0
+    parser.feed(b"ExecutionTime = 1.5 s  ClockTime = 2 s\n\nTime = 2\n"
+                b"smoothSolver:  Solving for k, Initial residual = 0.1, "
+                b"Final residual = 0.001, No Iterations 2\n")
+    df = parser.dataframe()
+    assert list(df.time) == [1, 2]
+    assert df.exectime[0] == 1.5
+    assert np.isnan(df.k_initial[0])
+    assert df.k_iterations[1] == 2
+    assert np.isnan(df.p_final[1])
+
+
+def test_log_parser_pimple():
+    """Test parsing a log with the Courant number and time step printed
+    before each time step, as by pimpleFoam.
+    """
+    log = b"Starting time loop\n\n"
+    for n in range(1, 4):
+        log += ("Courant Number mean: 0.{0} max: {0}.5\n"
+                "deltaT = 0.0{0}\nTime = 0.0{0}\n\n"
+                "PIMPLE: iteration 1\n"
+                "smoothSolver:  Solving for Ux, Initial residual = 1, "
+                "Final residual = 0.01, No Iterations 2\n"
+                "ExecutionTime = {0} s  ClockTime = {0} s\n\n").format(
+                    n).encode()
+    parser = LogParser()
+    parser.feed(log + b"Time = bad\n")
+    df = parser.dataframe()
+    assert list(df.time[:3]) == [0.01, 0.02, 0.03]
+    assert list(df.delta_t[:3]) == [0.01, 0.02, 0.03]
+    assert list(df.courant_max[:3]) == [1.5, 2.5, 3.5]
+    assert np.isnan(df.time[3])
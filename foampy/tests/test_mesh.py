@@ -0,0 +1,97 @@
+"""Tests for the `mesh` module."""
+
+from __future__ import division, print_function, absolute_import
+import numpy as np
+import foampy
+from foampy.mesh import *
+
+header = """FoamFile
+{{
+    version     2.0;
+    format      {fmt};
+    class       {cls};
+    arch        "LSB;label=32;scalar=64";
+{note}    location    "constant/polyMesh";
+    object      {obj};
+}}
+// * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * //
+
+"""
+
+boundary = """
+2
+(
+    walls
+    {
+        type            wall;
+        inGroups        1(wall);
+        nFaces          3;
+        startFace       2;
+    }
+    procBoundary0to1
+    {
+        type            processor;
+        nFaces          1;
+        startFace       5;
+        myProcNo        0;
+        neighbProcNo    1;
+    }
+)
+"""
+
+
+def write_mesh(meshdir, fmt="ascii", note=True):
+    """Write a mesh with 8 points, 6 faces, 2 internal faces and 3 cells."""
+    meshdir.ensure(dir=True)
+    note = ('    note        "nPoints:8  nCells:3  nFaces:6  '
+            'nInternalFaces:2";\n' if note else "")
+    owner = np.array([0, 1, 0, 1, 2, 2], dtype="<i4")
+    points = np.zeros((8, 3))
+    files = {"owner": ("labelList", owner),
+             "points": ("vectorField", points),
+             "faces": ("faceCompactList", np.arange(7, dtype="<i4"))}
+    for name, (cls, data) in files.items():
+        txt = header.format(fmt=fmt, cls=cls, obj=name,
+                            note=note if name == "owner" else "").encode()
+        if fmt == "binary":
+            body = data.tobytes()
+        else:
+            body = "\n".join(" ".join(str(v) for v in np.atleast_1d(row))
+                             for row in data).encode()
+        meshdir.join(name).write_binary(txt + "{}\n(".format(len(data))
+                                        .encode() + body + b")\n")
+    meshdir.join("boundary").write(header.format(
+        fmt="ascii", cls="polyBoundaryMesh", obj="boundary", note="")
+        + boundary)
+
+
+def test_mesh_stats(tmpdir):
+    """Test reading mesh statistics for ASCII and binary meshes."""
+    for fmt in ["ascii", "binary"]:
+        for note in [True, False]:
+            casedir = tmpdir.join(fmt + str(note))
+            write_mesh(casedir.join("constant", "polyMesh"), fmt, note)
+            stats = mesh_stats(str(casedir))
+            assert stats["cells"] == 3
+            assert stats["points"] == 8
+            assert stats["faces"] == 6
+            assert stats["internal_faces"] == 2
+            assert stats["npatches"] == 2
+            assert stats["patches"]["walls"]["nFaces"] == 3
+            assert foampy.get_ncells(str(casedir), autogen=False) == 3
+
+
+def test_mesh_stats_decomposed(tmpdir):
+    """Test summing mesh statistics over processor directories."""
+    for n in range(2):
+        write_mesh(tmpdir.join("processor{}".format(n), "constant",
+                               "polyMesh"), "binary")
+    # Collated processor directories and other files are skipped
+    write_mesh(tmpdir.join("processors2", "constant", "polyMesh"), "binary")
+    tmpdir.join("processor0.tar").write("")
+    assert processor_dirs(str(tmpdir)) == [str(tmpdir.join("processor0")),
+                                           str(tmpdir.join("processor1"))]
+    stats = mesh_stats(str(tmpdir))
+    assert stats["cells"] == 6
+    assert stats["npatches"] == 1
+    assert stats["patches"]["walls"]["nFaces"] == 6
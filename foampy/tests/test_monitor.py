@@ -0,0 +1,86 @@
+"""Tests for the `monitor` module."""
+
+from __future__ import division, print_function, absolute_import
+import os
+import time
+import threading
+import pytest
+from foampy.monitor import *
+
+controldict = """FoamFile
+{
+    version     2.0;
+    format      ascii;
+    class       dictionary;
+    object      controlDict;
+}
+
+application     testFoam;
+endTime         1;
+"""
+
+
+def _step(n, exectime):
+    return ("Time = {}\n\ndeltaT = 0.1\nsolving...\n"
+            "ExecutionTime = {} s  ClockTime = {} s\n\n").format(
+            n*0.1, exectime, int(exectime))
+
+
+def _make_case(tmpdir):
+    tmpdir.mkdir("system").join("controlDict").write(controldict)
+    return str(tmpdir)
+
+
+def test_case_monitor(tmpdir):
+    """Test following a log with `CaseMonitor`."""
+    casedir = _make_case(tmpdir)
+    monitor = CaseMonitor(casedir, alpha=0.5)
+    assert not monitor.update()
+    log = tmpdir.join("log.testFoam")
+    log.write(_step(1, 1.0) + _step(2, 3.0) + "Time = 0.3\n")
+    assert monitor.update()
+    assert monitor.time == 0.2
+    assert abs(monitor.solve_rate - 20) < 1e-9
+    assert not monitor.update()
+    log.write("\nExecutionTime = 7 s  ClockTime = 7 s\n", mode="a")
+    assert monitor.update()
+    assert abs(monitor.solve_rate - 30) < 1e-9
+    assert abs(monitor.time_left - 0.7*30) < 1e-9
+    assert not monitor.done
+    log.write("End\n", mode="a")
+    monitor.update()
+    assert monitor.done
+
+
+def test_case_monitor_tail(tmpdir):
+    """Test that only the end of a long existing log is read."""
+    casedir = _make_case(tmpdir)
+    tmpdir.join("log.testFoam").write("".join(_step(n, n) for n in
+                                              range(1, 9)))
+    monitor = CaseMonitor(casedir, tail_bytes=100)
+    assert monitor.update()
+    assert abs(monitor.time - 0.8) < 1e-9
+
+
+@pytest.mark.parametrize("use_inotify", [True, False])
+def test_progress_monitor(tmpdir, use_inotify):
+    """Test monitoring several cases until they are done."""
+    casedirs = [_make_case(tmpdir.mkdir("case{}".format(n))) for n in range(3)]
+
+    def write_logs():
+        for n in range(1, 11):
+            for casedir in casedirs:
+                with open(os.path.join(casedir, "log.testFoam"), "a") as f:
+                    f.write(_step(n, n))
+            time.sleep(0.02)
+
+    progress = []
+    thread = threading.Thread(target=write_logs)
+    thread.start()
+    monitor = ProgressMonitor(casedirs, min_interval=0.02, max_interval=0.1,
+                              use_inotify=use_inotify)
+    monitor.run(lambda m: progress.append(m.fraction_done))
+    thread.join()
+    assert monitor.done
+    assert progress[-1] == 1.0
+    assert all(abs(m.solve_rate - 10) < 1e-6 for m in monitor.monitors)
@@ -0,0 +1,34 @@
+"""Tests for the `stats` module."""
+
+from __future__ import division, print_function, absolute_import
+import numpy as np
+import foampy
+from foampy.stats import *
+
+
+def test_running_stats():
+    data = np.random.randn(1000, 3)*5 + 2
+    stats = stream_stats(np.array_split(data, 7))
+    assert stats.count == 1000
+    assert np.allclose(stats.mean, data.mean(axis=0))
+    assert np.allclose(stats.var(), data.var(axis=0))
+    assert np.allclose(stats.std(ddof=1), data.std(axis=0, ddof=1))
+    assert np.all(stats.min == data.min(axis=0))
+    assert np.all(stats.max == data.max(axis=0))
+
+
+def test_windowed_mean():
+    t = np.arange(100)*0.1
+    data = np.arange(100.0)
+    wm = WindowedMean(window=1.0)
+    for n in range(0, 100, 13):
+        wm.update(t[n:n + 13], data[n:n + 13])
+    tw, means = wm.result()
+    assert np.allclose(tw, np.arange(10))
+    assert np.allclose(means, data.reshape(10, 10).mean(axis=1))
+
+
+def test_stream_forces():
+    stats = stream_stats(c.fx for c in foampy.iter_forces(casedir="test",
+                                                            chunksize=300))
+    assert np.isclose(stats.mean, foampy.load_forces(casedir="test").fx.mean())
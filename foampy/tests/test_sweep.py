@@ -0,0 +1,89 @@
+"""Tests for sweep module"""
+
+import os
+import json
+import pytest
+import foampy.sweep
+from foampy.dictionaries import read_dict_cached
+
+
+def _make_base(tmpdir):
+    base = tmpdir.mkdir("base")
+    base.mkdir("system").join("controlDict").write(
+        "FoamFile\n{\n    object controlDict;\n}\n"
+        "endTime 1;\ndeltaT 0.1;\n"
+        "writeInterval $deltaT; // macro\n"
+        "#includeFunc residuals\n")
+    base.join("system").join("fvSolution").write(
+        "PIMPLE\n{\n    nCorrectors 2;\n}\n")
+    base.mkdir("constant").mkdir("polyMesh").join("points").write("(0 0 0)")
+    base.join("constant").join("transportProperties").write("nu 1e-06;\n")
+    base.join("log.icoFoam").write("")
+    return base
+
+
+def test_expand_grid():
+    grid = {"controlDict.endTime": [1, 2], "fvSolution.PIMPLE.nCorrectors":
+            [1, 2, 3]}
+    params = foampy.sweep.expand_grid(grid)
+    assert len(params) == 6
+    assert params[1] == {"controlDict.endTime": 1,
+                         "fvSolution.PIMPLE.nCorrectors": 2}
+    assert foampy.sweep.split_key("0/U.boundaryField.inlet.value") == \
+        (os.path.join("0", "U"), ["boundaryField", "inlet", "value"])
+
+
+def test_generate_sweep(tmpdir):
+    base = _make_base(tmpdir)
+    root = str(tmpdir.join("sweep"))
+    grid = {"controlDict.endTime": [2, 3],
+            "fvSolution.PIMPLE.nCorrectors": [1, 4]}
+    df = foampy.sweep.generate_sweep(str(base), grid, root=root, nproc=2,
+                                     link="hardlink")
+    assert len(df) == 4
+    casedir = df.index[3]
+    assert casedir == os.path.join(root, "case0003")
+    controldict = read_dict_cached(os.path.join(casedir, "system",
+                                                "controlDict"))
+    assert controldict["endTime"] == 3
+    assert controldict["deltaT"] == 0.1
+    fvsolution = read_dict_cached(os.path.join(casedir, "system",
+                                               "fvSolution"))
+    assert fvsolution["PIMPLE"]["nCorrectors"] == 4
+    # Directives, macros, and comments of the base case are kept
+    with open(os.path.join(casedir, "system", "controlDict")) as f:
+        txt = f.read()
+    assert txt.endswith("endTime 3;\ndeltaT 0.1;\n"
+                        "writeInterval $deltaT; // macro\n"
+                        "#includeFunc residuals\n")
+    # The mesh is shared and other files are copied
+    points = os.path.join(casedir, "constant", "polyMesh", "points")
+    assert os.stat(points).st_ino == \
+        os.stat(str(base.join("constant", "polyMesh", "points"))).st_ino
+    assert os.stat(points).st_nlink == 5
+    tp = os.path.join(casedir, "constant", "transportProperties")
+    assert os.stat(tp).st_nlink == 1
+    assert not os.path.exists(os.path.join(casedir, "log.icoFoam"))
+    # The base case is unchanged
+    assert "endTime 1;" in base.join("system", "controlDict").read()
+    with open(os.path.join(root, "manifest.json")) as f:
+        manifest = json.load(f)
+    assert manifest["cases"][3] == {
+        "casedir": "case0003",
+        "params": {"controlDict.endTime": 3,
+                   "fvSolution.PIMPLE.nCorrectors": 4}}
+    df2 = foampy.sweep.read_manifest(os.path.join(root, "manifest.json"))
+    assert (df2.values == df.values).all()
+    assert list(df2.index) == list(df.index)
+    # Existing cases are not overwritten by default
+    with pytest.raises(IOError):
+        foampy.sweep.generate_sweep(str(base), grid, root=root, nproc=1)
+
+
+def test_generate_sweep_missing_entry(tmpdir):
+    base = _make_base(tmpdir)
+    root = tmpdir.join("sweep")
+    with pytest.raises(KeyError):
+        foampy.sweep.generate_sweep(str(base), [{"controlDict.endTme": 2}],
+                                    root=str(root))
+    assert not root.check()
@@ -2,6 +2,7 @@
 
 import foampy.templates
 import os
+import pytest
 
 cwd = os.getcwd()
 
@@ -17,3 +18,31 @@ def test_gen_from_template_dir():
         assert "{delta_t}" in txt
     os.remove("templates/system/controlDict")
     os.chdir(cwd)
+
+
+def test_template_set(tmpdir):
+    """Test loading, validating, and rendering a set of templates."""
+    template_dir = tmpdir.mkdir("templates")
+    template_dir.mkdir("system").join("controlDict").write(
+        "FoamFile\n{{\n}}\nendTime {end_time};\ndeltaT {delta_t:.3f};\n")
+    template_dir.mkdir("constant").join("transportProperties").write(
+        "nu [0 2 -1 0 0 0 0] {nu};\n")
+    ts = foampy.templates.TemplateSet(str(template_dir))
+    assert len(ts) == 2
+    assert ts.keywords[os.path.join("system", "controlDict")] == \
+        {"end_time", "delta_t"}
+    assert ts.all_keywords == {"end_time", "delta_t", "nu"}
+    with pytest.raises(KeyError) as e:
+        ts.validate({"end_time": 1, "delta_t": 0.1})
+    assert "nu" in str(e.value)
+    casedirs = [str(tmpdir.join("case{}".format(n))) for n in range(3)]
+    params = [{"end_time": n, "delta_t": 0.1, "nu": 1e-6} for n in range(3)]
+    written = ts.render_cases(casedirs, params, nproc=2)
+    assert [len(w) for w in written] == [2, 2, 2]
+    with open(os.path.join(casedirs[2], "system", "controlDict")) as f:
+        assert f.read() == "FoamFile\n{\n}\nendTime 2;\ndeltaT 0.100;\n"
+    # Unchanged files are not written again
+    params[1]["nu"] = 2e-6
+    written = ts.render_cases(casedirs, params, nproc=1)
+    assert written == [[], [os.path.join(casedirs[1], "constant",
+                                         "transportProperties")], []]
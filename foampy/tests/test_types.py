@@ -1,6 +1,7 @@
 """Tests for the `types` module."""
 
 from __future__ import division, print_function, absolute_import
+import pytest
 from foampy.types import *
 
 
@@ -42,3 +43,96 @@ def test_foamlist():
 
     flist = FoamList("(0 0 0 0)", dtype=int)
     assert flist[:] == [0]*4
+
+
+def test_foamdict_read():
+    """Test reading entries with `FoamDict`."""
+    d = FoamDict(name="controlDict", casedir="test")
+    assert d["application"] == "pimpleDyMFoam"
+    assert d["deltaT"] == 2e-4
+    assert d.foamfile["location"] == '"system"'
+    assert "FoamFile" not in d
+    assert "functions" in d
+
+
+def test_foamsubdict_nested():
+    """Test text of nested `FoamSubDict`s."""
+    d = FoamSubDict(name="solvers", a=1)
+    d["p"] = FoamSubDict(solver="GAMG")
+    d["p"]["inner"] = FoamSubDict(b=True)
+    expected = ("solvers\n{\n"
+                "    a           1;\n"
+                "\n"
+                "    p\n    {\n"
+                "        solver      GAMG;\n"
+                "    \n"
+                "        inner\n        {\n"
+                "            b           true;\n"
+                "        }\n"
+                "    }\n"
+                "}")
+    assert str(d) == expected
+
+
+def test_foamdict_write(tmpdir):
+    """Test writing a `FoamDict` to file."""
+    tmpdir.mkdir("system")
+    d = FoamDict(name="testDict", casedir=str(tmpdir))
+    d["someInt"] = 5
+    d["subDict"] = FoamSubDict(otherInt=6)
+    d.write()
+    assert tmpdir.join("system", "testDict").read() == str(d)
+    assert tmpdir.join("system").listdir() == [tmpdir.join("system",
+                                                           "testDict")]
+    d2 = FoamDict(name="testDict", casedir=str(tmpdir))
+    assert d2["someInt"] == 5
+    assert d2["subDict"]["otherInt"] == 6
+
+
+def test_foamdict_round_trip(tmpdir):
+    """Test that multi-line values keep their layout when a `FoamDict` is
+    read and written repeatedly.
+    """
+    tmpdir.mkdir("constant").join("dynamicMeshDict").write(
+        open("test/constant/dynamicMeshDict").read())
+    texts = []
+    for n in range(3):
+        d = FoamDict(name="dynamicMeshDict", casedir=str(tmpdir),
+                     subdir="constant")
+        d.write()
+        texts.append(tmpdir.join("constant", "dynamicMeshDict").read())
+    assert texts[1] == texts[0]
+    assert texts[2] == texts[0]
+    assert "        omega       table\n        (\n" \
+        "            (0.0 0.806268453029)\n" in texts[0]
+
+
+def test_foamarray(tmpdir):
+    """Test `FoamArray` class."""
+    points = np.arange(12, dtype=float).reshape(4, 3)/4
+    flist = FoamArray(points)
+    assert np.shares_memory(flist, points)
+    assert str(flist[:2]) == "((0.0 0.25 0.5) (0.75 1.0 1.25))"
+    assert str(FoamArray(np.arange(3))) == "(0 1 2)"
+    assert str(FoamArray([True, False])) == "(true false)"
+    assert str(FoamArray(np.arange(3.0))) == str(FoamList(np.arange(3)))
+    parsed = FoamArray("4" + str(flist))
+    assert parsed.shape == (4, 3)
+    assert (parsed == points).all()
+    assert (FoamArray("(1 2 3)", dtype=int) == [1, 2, 3]).all()
+    # Empty lists and size prefixes
+    assert FoamArray("()").shape == (0,)
+    assert FoamArray("0()", dtype=int).shape == (0,)
+    assert FoamArray("2(1 2)", dtype=int).tolist() == [1, 2]
+    with pytest.raises(ValueError):
+        FoamArray("3(1 2)")
+    with pytest.raises(ValueError):
+        FoamArray("3((0 0 0) (1 0 0))")
+    assert str(FoamArray(np.array([0.1, 2.5], dtype=np.float32))) == \
+        "(0.1 2.5)"
+    tmpdir.mkdir("system")
+    d = FoamDict(name="testDict", casedir=str(tmpdir))
+    d["points"] = flist
+    d.write()
+    d2 = FoamDict(name="testDict", casedir=str(tmpdir))
+    assert np.array(d2["points"]).tolist() == points.tolist()
@@ -22,59 +22,91 @@ class FoamDict(OrderedDict):
         self.fpath = os.path.join(casedir, subdir, name)
         self.foam_version = foampy.foam_version
         self.header = ""
+        self.foamfile = FoamSubDict(name="FoamFile", version=2.0,
+                                    format="ascii")
+        self.foamfile["class"] = "dictionary"
+        self.foamfile["object"] = name
         if os.path.isfile(self.fpath):
             self.read()
         else:
             self.header = foampy.dictionaries.build_header(name,
                     self.foam_version, fileclass="dictionary",
                     incl_foamfile=False)
-        self.foamfile = FoamSubDict(name="FoamFile", version=2.0,
-                                    format="ascii")
-        self.foamfile["class"] = "dictionary"
-        self.foamfile["object"] = name
 
     def read(self):
         """Parse dictionary."""
-        # Read header first
         with open(self.fpath) as f:
-            in_header = False
-            for line in f:
-                if line[:2] == "/*":
-                    in_header = True
-                elif line[:2] == r"\*":
-                    self.header += line.strip()
-                    in_header = False
-                if in_header:
-                    self.header += line
+            txt = f.read()
+        # Read header first
+        self.header = ""
+        in_header = False
+        for line in txt.splitlines(True):
+            if line[:2] == "/*":
+                in_header = True
+            elif line[:2] == r"\*":
+                self.header += line.strip()
+                in_header = False
+            if in_header:
+                self.header += line
+            elif self.header:
+                break
         # Parse header for OpenFOAM version
         splitheader = self.header.split()
         if "Version:" in splitheader:
             index = splitheader.index("Version:") + 1
             self.foam_version = splitheader[index]
+        # Parse entries into the dictionary tree
+        tree = foampy.dictionaries.parse_dict(txt, fpath=self.fpath)
+        foamfile = tree.pop("FoamFile", None)
+        if isinstance(foamfile, FoamSubDict):
+            foamfile.name = "FoamFile"
+            self.foamfile = foamfile
+        self.clear()
+        self.update(tree)
 
 
-    def __str__(self):
-        """Create text from dictionary in OpenFOAM format."""
-        txt = self.header + "\n" + str(self.foamfile) + "\n"
-        txt += foampy.dictionaries.upper_rule + "\n\n"
+    def _emit(self, out):
+        """Append the text of the dictionary to the list ``out``."""
+        out.append(self.header)
+        out.append("\n")
+        self.foamfile._emit(out)
+        out.append("\n")
+        out.append(foampy.dictionaries.upper_rule)
+        out.append("\n\n")
         for key, val in self.items():
-            strval = str(val)
-            if isinstance(val, bool):
-                strval = strval.lower()
             if isinstance(val, FoamSubDict):
                 val.name = key
-                txt += str(val) + "\n\n"
-            elif len(key) < 16:
-                txt += "{:16s}{};\n\n".format(key, strval)
+                val._emit(out)
+                out.append("\n\n")
+                continue
+            strval = _format_value(val)
+            if len(key) < 16:
+                out.append("{:16s}{};\n\n".format(key, strval))
             else:
-                txt += "{} {};\n\n".format(key, strval)
-        txt += foampy.dictionaries.lower_rule + "\n"
-        return txt
+                out.append("{} {};\n\n".format(key, strval))
+        out.append(foampy.dictionaries.lower_rule)
+        out.append("\n")
+
+    def __str__(self):
+        """Create text from dictionary in OpenFOAM format."""
+        out = []
+        self._emit(out)
+        return "".join(out)
 
     def write(self):
-        """Write dictionary to file."""
-        with open(self.fpath, "w") as f:
-            f.write(str(self))
+        """Write dictionary to file.
+
+        The text is written to a temporary file that then replaces the
+        dictionary, so readers never see a partially written file.
+        """
+        foampy.dictionaries.write_atomic(self.fpath, str(self))
+
+
+def _format_value(val):
+    """Convert an entry value to text."""
+    if isinstance(val, bool):
+        return str(val).lower()
+    return str(val)
 
 
 class FoamSubDict(OrderedDict):
@@ -84,24 +116,34 @@ class FoamSubDict(OrderedDict):
         self.name = name
         OrderedDict.__init__(self, kwargs)
 
-    def __str__(self):
-        txt = self.name + "\n{\n"
+    def _emit(self, out, indent=""):
+        """Append the text of the dictionary to the list ``out``, with each
+        line prefixed by ``indent``.
+        """
+        out.append(self.name)
+        out.append("\n" + indent + "{\n")
+        inner = indent + "    "
         for key, val in self.items():
-            strval = str(val)
-            if isinstance(val, bool):
-                strval = strval.lower()
-            if not isinstance(val, FoamSubDict):
-                if len(key) < 12:
-                    txt += "    {:12s}{};\n".format(key, strval)
-                else:
-                    txt += "    {} {};\n".format(key, strval)
-            else:
+            if isinstance(val, FoamSubDict):
                 val.name = key
-                txt += "\n"
-                for line in str(val).split("\n"):
-                    txt += "    " + line + "\n"
-        txt += "}"
-        return txt
+                out.append(indent + "\n" + inner)
+                val._emit(out, inner)
+                out.append("\n")
+                continue
+            strval = _format_value(val)
+            if "\n" in strval:
+                # Lines after the first are indented to the keyword
+                strval = strval.replace("\n", "\n" + inner)
+            if len(key) < 12:
+                out.append("{}{:12s}{};\n".format(inner, key, strval))
+            else:
+                out.append("{}{} {};\n".format(inner, key, strval))
+        out.append(indent + "}")
+
+    def __str__(self):
+        out = []
+        self._emit(out)
+        return "".join(out)
 
 
 class BlockMeshDict(FoamDict):
@@ -111,24 +153,107 @@ class BlockMeshDict(FoamDict):
         FoamDict.__init__(self)
 
 
+_paren_table = {ord("("): " ", ord(")"): " "}
+
+
 class FoamList(list):
-    """Class that represents an OpenFOAM list."""
+    """Class that represents an OpenFOAM list.
+
+    Items may be of any type, e.g., nested lists or dictionaries. For large
+    lists of numbers, ``FoamArray`` is much faster.
+    """
 
     def __init__(self, list_in=None, dtype=float):
         if isinstance(list_in, list) or isinstance(list_in, np.ndarray):
-            py_list = [dtype(i) for i in list_in]
+            py_list = list(map(dtype, list_in))
         elif isinstance(list_in, str):
             # Attempt to parse string into list
-            list_in = list_in.replace("(", "").replace(")", "").split()
-            py_list = [dtype(i) for i in list_in]
+            list_in = list_in.translate(_paren_table).split()
+            py_list = list(map(dtype, list_in))
         else:
-            py_list=[]
+            py_list = []
         list.__init__(self, py_list)
 
     def __str__(self):
-        txt = "("
-        for i in self:
-            txt += str(i) + " "
-        txt = txt[:-1]
-        txt += ")"
-        return txt
+        return "(" + " ".join(map(str, self)) + ")"
+
+
+class FoamArray(np.ndarray):
+    """OpenFOAM list of numbers backed by a NumPy array.
+
+    A 1-D array is a list of scalars, e.g., ``(0 1 2)``, and a 2-D array a
+    list of vectors or tensors with one per row, e.g., ``((0 0 0) (1 0
+    0))``. Arrays are wrapped as views without copying, so a ``FoamArray``
+    can be used anywhere an array can, and written in a ``FoamDict`` in
+    place of a ``FoamList``.
+
+    Parameters
+    ----------
+    data : array_like or str
+        Values, or the text of a list to parse, optionally with a size
+        prefix, e.g., ``"2((0 0 0) (1 0 0))"``.
+    dtype : data-type
+        Data type. Defaults to that of ``data``, or float for text.
+    """
+
+    def __new__(cls, data=(), dtype=None):
+        if isinstance(data, str):
+            return cls.from_string(data, dtype=dtype)
+        return np.asarray(data, dtype=dtype).view(cls)
+
+    @classmethod
+    def from_string(cls, txt, dtype=None):
+        """Parse the text of a list of scalars, vectors, or tensors."""
+        txt = txt.strip()
+        start = txt.find("(")
+        if start < 0:
+            raise ValueError("No list in {!r}".format(txt[:40]))
+        # Rows are the parentheses inside the outer pair
+        nrows = txt.count("(", start + 1)
+        inner = txt[start:].translate(_paren_table)
+        if inner.strip():
+            values = np.fromstring(inner, sep=" ", dtype=dtype or float)
+        else:
+            # fromstring parses blank text as one value
+            values = np.array([], dtype=dtype or float)
+        if nrows:
+            values = values.reshape(nrows, -1)
+        size = txt[:start].strip()
+        if size and int(size) != len(values):
+            raise ValueError("List has {} items, not {}".format(len(values),
+                                                                size))
+        return values.view(cls)
+
+    def format(self, fmt=None):
+        """Create text in OpenFOAM format with one formatting operation.
+
+        Parameters
+        ----------
+        fmt : str
+            ``%``-format of each value. Defaults to the shortest text that
+            reads back exactly as the array's float type, e.g., ``"%.6g"``
+            is about three times faster to write for float64.
+        """
+        values = np.asarray(self)
+        if values.ndim == 0:
+            return str(values.item())
+        if values.dtype.kind == "b":
+            values = np.where(values, "true", "false")
+        elif fmt is None and values.dtype.kind == "f" \
+                and values.dtype != np.float64:
+            # NumPy gives the shortest text for the precision of the dtype,
+            # e.g., 0.1 rather than 0.10000000149011612 for float32
+            values = values.astype(str)
+        if fmt is None:
+            fmt = {"i": "%d", "u": "%d", "f": "%r"}.get(values.dtype.kind,
+                                                         "%s")
+        if values.ndim == 1:
+            fmt = " ".join([fmt]*len(values))
+        else:
+            values = values.reshape(len(values), -1)
+            row = "(" + " ".join([fmt]*values.shape[1]) + ")"
+            fmt = " ".join([row]*len(values))
+        return "(" + fmt % tuple(values.ravel().tolist()) + ")"
+
+    def __str__(self):
+        return self.format()